@@ -1,70 +1,129 @@
+import os
+
 import dash
+import flask
 from dash import dcc, html
-from dash.dependencies import Input, Output
-
-from paginas.portada import layout_portada
-from paginas.mapa import layout_mapa, register_callbacks_mapa
-from paginas.muertePorMes import layout_muerte_por_mes, register_callbacks_muerte_por_mes
-from paginas.CiudadesMasViolentas import (
-    layout_ciudades_mas_violentas,
-    register_callbacks_ciudades_mas_violentas
-)
-from paginas.IndiceMortalidad import (
-    layout_indice_mortalidad,
-    register_callbacks_indice_mortalidad
-)
-from paginas.TablaCausasMuertes import layout_tabla_causas, register_callbacks_tabla_causas
-from paginas.HistogramaMortalidad import (
-    layout_histograma_mortalidad,
-    register_callbacks_histograma_mortalidad
-)
-from paginas.MuertesPorSexo import (
-    layout_muertes_por_sexo,
-    register_callbacks_muertes_por_sexo
-)
+from dash.dependencies import Input, Output, State
+
+from datos import almacen, cache_figuras, metricas
+from paginas import registro
 
 
-app = dash.Dash(__name__, suppress_callback_exceptions=True)
+# VALIDAR_CALLBACKS=1 (desarrollo, CI): Dash valida los ids de los
+# callbacks contra un esqueleto de todas las páginas. Construirlo carga los
+# datos de todas al arrancar, así que por defecto no se valida y la carga
+# sigue siendo diferida. Se decide una sola vez, aquí.
+VALIDAR_CALLBACKS = os.environ.get('VALIDAR_CALLBACKS', '0') == '1'
+
+app = dash.Dash(__name__, suppress_callback_exceptions=not VALIDAR_CALLBACKS)
 server = app.server
-app.title = "Análisis de Mortalidad en Colombia 2019"
-app.layout = html.Div([
-    dcc.Location(id='url', refresh=False),
-    html.Div(id='page-content')
-])
+app.title = f"Análisis de Mortalidad en Colombia {almacen.texto_anios()}"
+
+
+def selector_anios():
+    # Selector global de años: alimenta los callbacks de todas las páginas
+    # y se conserva al navegar entre ellas (vacío = todos los años)
+    disponibles = almacen.anios()
+    return html.Div([
+        html.Label('Años:', style={'color': 'white', 'marginRight': '8px'}),
+        dcc.Dropdown(
+            id='filtro-anios',
+            options=[{'label': str(a), 'value': a} for a in disponibles],
+            value=list(almacen.anios_defecto()),
+            multi=True, placeholder='Todos los años',
+            style={'width': '320px', 'backgroundColor': 'fuchsia', 'color': 'black', 'fontWeight': 'bold'}
+        )
+    ], style={'display': 'flex', 'alignItems': 'center', 'padding': '10px 20px', 'backgroundColor': 'black'})
+
+
+def layout_principal():
+    # Se evalúa al cargar la app en el navegador, no al importar este módulo
+    return html.Div([
+        dcc.Location(id='url', refresh=False),
+        # Estado de los filtros compartido por todas las páginas (por pestaña)
+        dcc.Store(id=registro.FILTROS, storage_type='session', data={}),
+        selector_anios(),
+        html.Div(id='page-content')
+    ])
+
+
+if VALIDAR_CALLBACKS:
+    # Antes de asignar el layout: si no, Dash arma su propia validación con él
+    app.validation_layout = registro.esqueleto(layout_principal())
+app.layout = layout_principal
+
+# Los callbacks se registran al arrancar; los datos de cada página se
+# cargan en su primera visita o en el calentamiento (paginas/registro.py)
+registro.registrar_callbacks(app)
+
 
-register_callbacks_mapa(app)
-register_callbacks_muerte_por_mes(app)
-register_callbacks_ciudades_mas_violentas(app)
-register_callbacks_indice_mortalidad(app)
-register_callbacks_tabla_causas(app)
-register_callbacks_histograma_mortalidad(app)
-register_callbacks_muertes_por_sexo(app)
+# Con el servidor ya atendiendo, la primera petición lanza el calentamiento
+@server.before_request
+def calentar_paginas():
+    registro.calentar()
+
+
+# Cada petición usa de principio a fin la versión de los datos con la que
+# empezó; la primera también lanza el hilo que vigila ArchivosProcesados/
+@server.before_request
+def fijar_version_datos():
+    almacen.vigilar()
+    almacen.fijar()
+
+
+@server.teardown_request
+def soltar_version_datos(_):
+    almacen.soltar()
+
+
+# Contadores de la caché de figuras (aciertos, fallos, desalojos)
+@server.route('/cache-figuras')
+def estadisticas_cache_figuras():
+    return flask.jsonify(cache_figuras.estadisticas())
+
+
+# Estado del proceso para el balanceador / la plataforma de despliegue
+@server.route('/salud')
+def salud():
+    return flask.jsonify({
+        'estado': 'ok',
+        'pid': os.getpid(),
+        'paginas_listas': registro.listas(),
+        'formatos': almacen.formatos_cargados(),
+        'version_datos': almacen.version().id,
+    })
+
+
+# Latencia, fases y bytes de cada callback (formato de texto de Prometheus)
+@server.route('/metrics')
+def metricas_prometheus():
+    return flask.Response(metricas.exponer(), mimetype='text/plain; version=0.0.4')
+
+
+# Páginas ya preparadas y su tiempo de carga
+@server.route('/paginas')
+def estado_paginas():
+    return flask.jsonify(registro.estado())
 
 
 # Callbacks para la navegación entre páginas
 
 @app.callback(
     Output('page-content', 'children'),
-    Input('url', 'pathname')
+    Input('url', 'pathname'),
+    State(registro.FILTROS, 'data'),
+    State('filtro-anios', 'value')
 )
-def display_page(pathname):
-    if pathname == '/mapa':
-        return layout_mapa()
-    elif pathname == '/muerte-por-mes':
-        return layout_muerte_por_mes()
-    elif pathname == '/ciudades-mas-violentas':
-        return layout_ciudades_mas_violentas()
-    elif pathname == '/indice-mortalidad':
-        return layout_indice_mortalidad()
-    elif pathname == '/tabla-causas-muertes':
-        return layout_tabla_causas()
-    elif pathname == '/histograma-mortalidad':
-        return layout_histograma_mortalidad()
-    elif pathname == '/muertes-por-sexo':
-        return layout_muertes_por_sexo()
-    else:
-        return layout_portada()
+def display_page(pathname, filtros, anios_sel):
+    # Mientras el usuario ve esta página, se calcula la siguiente del recorrido
+    registro.anticipar(pathname, filtros, anios_sel)
+    return registro.layout(pathname)
+
+
+# Con todos los callbacks del servidor registrados, medir cada uno
+metricas.instrumentar(app)
 
 
 if __name__ == '__main__':
-    app.run(debug=True, host="0.0.0.0", port=8050)
+    # Servidor de desarrollo; en producción: gunicorn (ver gunicorn.conf.py)
+    app.run(debug=True, host="0.0.0.0", port=int(os.environ.get('PORT', '8050')))
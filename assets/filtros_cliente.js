@@ -0,0 +1,96 @@
+// ------------------------------------------------------------------
+// Archivo: assets/filtros_cliente.js
+// Descripción: Filtrado y agregación en el navegador de las tablas
+//              pequeñas codificadas por datos/cliente.py.
+// ------------------------------------------------------------------
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    cliente: {
+        /**
+         * Recibe los valores de los filtros (en el orden de `datos.filtros`)
+         * y, como último argumento, los datos codificados. Un filtro puede
+         * ser un valor o una lista (p. ej. los años): la fila pasa si su
+         * valor está en la lista; una lista vacía equivale a todos.
+         * Devuelve la figura base con x = grupos con datos (o todos si
+         * `datos.completar`) e y = total de cada grupo.
+         */
+        agregar: function () {
+            var args = Array.prototype.slice.call(arguments);
+            var datos = args.pop();
+            if (!datos) {
+                return window.dash_clientside.no_update;
+            }
+
+            // Códigos aceptados por filtro (null = todos, [-2] = valor inexistente)
+            var buscados = datos.filtros.map(function (col, i) {
+                var valores = Array.isArray(args[i]) ? args[i] : [args[i]];
+                valores = valores.filter(function (v) {
+                    return v !== null && v !== undefined && v !== '';
+                });
+                if (valores.length === 0) {
+                    return null;
+                }
+                var codigos = valores.map(function (v) {
+                    return col.categorias.indexOf(v);
+                }).filter(function (c) {
+                    return c !== -1;
+                });
+                return codigos.length ? codigos : [-2];
+            });
+
+            var grupos = datos.grupo.codigos;
+            var medida = datos.medida;
+            var totales = new Array(datos.grupo.categorias.length).fill(0);
+            var presentes = new Array(datos.grupo.categorias.length).fill(false);
+
+            for (var fila = 0; fila < grupos.length; fila++) {
+                var g = grupos[fila];
+                if (g < 0) {
+                    continue;
+                }
+                var coincide = true;
+                for (var f = 0; f < buscados.length; f++) {
+                    if (buscados[f] !== null && buscados[f].indexOf(datos.filtros[f].codigos[fila]) === -1) {
+                        coincide = false;
+                        break;
+                    }
+                }
+                if (coincide) {
+                    totales[g] += medida ? medida[fila] : 1;
+                    presentes[g] = true;
+                }
+            }
+
+            var x = [];
+            var y = [];
+            for (var i = 0; i < totales.length; i++) {
+                if (presentes[i] || datos.completar) {
+                    x.push(datos.grupo.categorias[i]);
+                    y.push(totales[i]);
+                }
+            }
+
+            var figura = JSON.parse(JSON.stringify(datos.figura));
+            figura.data[0].x = x;
+            figura.data[0].y = y;
+            return figura;
+        },
+
+        /**
+         * Decide en cada cambio de filtro dónde se calcula la figura. Con
+         * datos codificados (último argumento), aquí mismo con `agregar`;
+         * sin ellos (la tabla supera el umbral en esta versión de los
+         * datos), deja los valores de los filtros en el Store de consulta,
+         * que dispara el callback del servidor.
+         * Devuelve [figura, consulta].
+         */
+        enrutar: function () {
+            var args = Array.prototype.slice.call(arguments);
+            var datos = args[args.length - 1];
+            if (datos) {
+                return [window.dash_clientside.cliente.agregar.apply(null, args),
+                        window.dash_clientside.no_update];
+            }
+            return [window.dash_clientside.no_update, args.slice(0, -1)];
+        }
+    }
+});
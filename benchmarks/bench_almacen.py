@@ -0,0 +1,102 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_almacen.py
+# Descripción: Compara tiempo de arranque y memoria (RSS) entre la carga
+#              por página al importar (método anterior) y el almacén
+#              compartido de datos/almacen.py.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_almacen [--repeticiones 5]
+# ------------------------------------------------------------------
+import argparse
+import json
+import subprocess
+import sys
+
+# Cada variante corre en un proceso nuevo para medir arranque en frío.
+# Con pandas ya importado se mide la RSS retenida (tras liberar temporales)
+# y el pico de RSS durante la carga. La RSS actual se lee de /proc (Linux).
+_PLANTILLA = """
+import gc, json, os, resource, time
+import pandas as pd
+def rss_kb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+rss0, pico0 = rss_kb(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+t0 = time.perf_counter()
+{codigo}
+t = time.perf_counter() - t0
+gc.collect()
+print(json.dumps({{
+    'segundos': t,
+    'rss_kb': rss_kb() - rss0,
+    'pico_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - pico0,
+}}))
+"""
+
+# Réplica de lo que hacía cada módulo de paginas/ al importarse
+_ANTERIOR = """
+csv = dict(sep=';', encoding='utf-8-sig')
+mes_map = {i + 1: m for i, m in enumerate(['Enero','Febrero','Marzo','Abril','Mayo','Junio',
+           'Julio','Agosto','Septiembre','Octubre','Noviembre','Diciembre'])}
+frames = []
+# mapa.py
+d = pd.read_csv('ArchivosProcesados/MuertesPorDepartamento.csv', **csv)
+d['departamento'] = d['DEPARTAMENTO'].str.strip().str.upper(); frames.append(d)
+# MuertesPorSexo.py
+d = pd.read_csv('ArchivosProcesados/MuertesPorDepartamento.csv', **csv)
+d['Muertes'] = pd.to_numeric(d['Muertes'], errors='coerce').fillna(0).astype(int); frames.append(d)
+# muertePorMes.py
+frames.append(pd.read_csv('ArchivosProcesados/MuertesPorMes.csv', **csv))
+# CiudadesMasViolentas.py e IndiceMortalidad.py
+for _ in range(2):
+    d = pd.read_csv('ArchivosProcesados/MuertesPorMunicipio.csv', **csv)
+    d['mes_nombre'] = d['MES'].astype(int).map(mes_map); frames.append(d)
+# HistogramaMortalidad.py
+d = pd.read_csv('ArchivosProcesados/MuertesPorEdad.csv', **csv)
+d['mes_nombre'] = d['MES'].map(mes_map); frames.append(d)
+# TablaCausasMuertes.py
+d = pd.read_csv('ArchivosProcesados/MuertesPorMunicipioTabla.csv', **csv)
+d['MES'] = d['MES'].astype(int).map(mes_map); frames.append(d)
+"""
+
+# Los mismos datasets que lee la variante anterior (sin los catálogos CIE-10)
+_ALMACEN = """
+from datos import almacen
+nombres = ('MuertesPorDepartamento', 'MuertesPorDepartamento', 'MuertesPorMes',
+           'MuertesPorMunicipio', 'MuertesPorMunicipio', 'MuertesPorEdad', 'MuertesPorMunicipioTabla')
+almacen.precargar(sorted(set(nombres)))
+frames = [almacen.obtener(n) for n in nombres]
+"""
+
+
+def _medir(codigo):
+    salida = subprocess.run(
+        [sys.executable, '-c', _PLANTILLA.format(codigo=codigo)],
+        check=True, capture_output=True, text=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga de datos')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = {}
+    for nombre, codigo in (('anterior', _ANTERIOR), ('almacen', _ALMACEN)):
+        medidas = [_medir(codigo) for _ in range(args.repeticiones)]
+        resultados[nombre] = {
+            'segundos': min(m['segundos'] for m in medidas),
+            'rss_kb': min(m['rss_kb'] for m in medidas),
+            'pico_kb': min(m['pico_kb'] for m in medidas),
+        }
+
+    print(f"{'variante':<10} {'tiempo (ms)':>12} {'RSS (MB)':>10} {'pico (MB)':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<10} {r['segundos'] * 1000:>12.1f} "
+              f"{r['rss_kb'] / 1024:>10.1f} {r['pico_kb'] / 1024:>10.1f}")
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
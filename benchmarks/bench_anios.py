@@ -0,0 +1,94 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_anios.py
+# Descripción: Costo de consultar 1, 2 o todos los años de un almacén
+#              particionado por año. Arma en un directorio temporal
+#              --anios particiones anio=AAAA/ (enlaces a los CSV de
+#              ArchivosProcesados/, así cada año es una copia del mismo)
+#              y mide, por selección: particiones leídas, memoria de los
+#              datasets cargados y latencia en frío y en caliente de un
+#              cubo (mapa) y de la tabla de causas. Verifica además que
+#              la suma de N años sea N veces la de uno.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_anios [--anios 5]
+# ------------------------------------------------------------------
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from datos import almacen, causas, cubos
+
+_POR_ANIO = [n for n in almacen.ESQUEMAS if n not in almacen.GLOBALES]
+
+
+def _armar(directorio, n):
+    # Catálogo en la raíz y una partición por año con los mismos archivos
+    origen = os.path.abspath(almacen.DIR_DATOS)
+    for nombre in almacen.GLOBALES:
+        os.symlink(os.path.join(origen, nombre + '.csv'), os.path.join(directorio, nombre + '.csv'))
+    anios = tuple(range(almacen.ANIO_RAIZ - n + 1, almacen.ANIO_RAIZ + 1))
+    for anio in anios:
+        carpeta = almacen.particion(anio, directorio)
+        os.makedirs(carpeta)
+        for nombre in _POR_ANIO:
+            os.symlink(os.path.join(origen, nombre + '.csv'), os.path.join(carpeta, nombre + '.csv'))
+    return anios
+
+
+def _ms(funcion):
+    t = time.perf_counter()
+    resultado = funcion()
+    return (time.perf_counter() - t) * 1000, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del almacén particionado por año')
+    parser.add_argument('--anios', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        anios = _armar(directorio, args.anios)
+        almacen.DIR_DATOS = directorio
+        cubo = cubos.definir('departamento', 'MuertesPorDepartamento',
+                             ['SEXO', 'MANERA_MUERTE'], ['COD_DEPARTAMENTO'])
+
+        resultados, errores = {}, 0
+        un_anio = None
+        for seleccion in dict.fromkeys([anios[-1:], anios[-2:], anios]):
+            n = len(seleccion)
+            cubo_frio, df = _ms(lambda: cubo.consultar(seleccion, None, None))
+            cubo_caliente, _ = _ms(lambda: cubo.consultar(seleccion, None, None))
+            tabla_frio, (registros, _, _) = _ms(lambda: causas.pagina(anios=seleccion))
+            tabla_caliente, _ = _ms(lambda: causas.pagina(anios=seleccion, numero=1))
+
+            totales = (int(df['Muertes'].sum()), sum(r['Muertes'] for r in registros))
+            if un_anio is None:
+                un_anio = totales
+            elif totales != tuple(n * t for t in un_anio):
+                errores += 1
+                print(f'DIFERENCIA {n} años: {totales}, se esperaba {n} x {un_anio}', file=sys.stderr)
+
+            cargados = {c.split('/')[0] for c in almacen.memoria_bytes() if c.startswith(almacen.PREFIJO_PARTICION)}
+            resultados[n] = {
+                'particiones_leidas': len(cargados),
+                'memoria_mb': sum(almacen.memoria_bytes().values()) / 2**20,
+                'cubo_frio_ms': cubo_frio, 'cubo_caliente_ms': cubo_caliente,
+                'tabla_fria_ms': tabla_frio, 'tabla_caliente_ms': tabla_caliente,
+            }
+
+    print(f'{len(anios)} años en el almacén')
+    print(f"{'años':>5} {'leídos':>7} {'MB':>7} {'cubo frío':>10} {'caliente':>9} "
+          f"{'tabla fría':>11} {'caliente':>9}  (ms)")
+    for n, r in resultados.items():
+        print(f"{n:>5} {r['particiones_leidas']:>7} {r['memoria_mb']:>7.1f} {r['cubo_frio_ms']:>10.1f} "
+              f"{r['cubo_caliente_ms']:>9.2f} {r['tabla_fria_ms']:>11.1f} {r['tabla_caliente_ms']:>9.2f}")
+    print(f'diferencias: {errores}')
+    print(json.dumps({'anios': len(anios), 'por_seleccion': resultados, 'diferencias': errores}))
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
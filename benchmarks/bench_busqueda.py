@@ -0,0 +1,83 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_busqueda.py
+# Descripción: Latencia de la búsqueda de los dropdowns dinámicos
+#              (datos/busqueda.py) frente a recorrer todas las opciones
+#              normalizadas, y tamaño de la lista de opciones completa que
+#              ya no viaja en el layout. Índices: municipios y causas CIE-10.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_busqueda [--repeticiones 50]
+# ------------------------------------------------------------------
+import argparse
+import json
+import time
+
+from datos import almacen, busqueda, causas
+
+_CONSULTAS = {
+    'municipios': ['medellin', 'BOGOTÁ', 'san jose', 'medelin', 'sa'],
+    'causas': ['infarto miocardio', 'colera', 'I21', 'tumor estomago', 'diabetis'],
+}
+
+
+def _indices():
+    muertes = almacen.obtener('MuertesPorMunicipio').groupby('ETIQUETA_MUNICIPIO', observed=True)['Muertes'].sum()
+    t = time.perf_counter()
+    municipios = busqueda.IndiceTexto(muertes.index.astype(str), muertes.index.astype(str), muertes.to_numpy())
+    t_municipios = time.perf_counter() - t
+    anios = almacen.anios_defecto()
+    causas._jerarquia(anios)
+    t = time.perf_counter()
+    arbol = causas.indice_busqueda(anios)
+    t_causas = time.perf_counter() - t
+    return {'municipios': (municipios, t_municipios), 'causas': (arbol, t_causas)}
+
+
+def _lineal(indice, consulta):
+    # Referencia: normalizar y buscar la consulta en todas las opciones
+    palabras = busqueda.normalizar(consulta).split()
+    return [i for i, texto in enumerate(indice.textos) if all(p in texto for p in palabras)]
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    return min(tiempos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la búsqueda de los dropdowns')
+    parser.add_argument('--repeticiones', type=int, default=50)
+    args = parser.parse_args()
+
+    resultados = {}
+    for nombre, (indice, t_construccion) in _indices().items():
+        todas = [{'label': e, 'value': v} for e, v in zip(indice.etiquetas, indice.valores)]
+        resultados[nombre] = {
+            'opciones': len(indice),
+            'construccion_ms': t_construccion * 1000,
+            'lista_completa_kb': len(json.dumps(todas)) / 1024,
+            'consultas': {
+                consulta: {
+                    'indice_us': _medir(lambda: indice.buscar(consulta), args.repeticiones),
+                    'lineal_us': _medir(lambda: _lineal(indice, consulta), args.repeticiones),
+                    'primeros': [indice.etiquetas[i] for i in indice.buscar(consulta, 3)],
+                }
+                for consulta in _CONSULTAS[nombre]
+            },
+        }
+
+    for nombre, r in resultados.items():
+        print(f"{nombre}: {r['opciones']} opciones, índice en {r['construccion_ms']:.0f} ms, "
+              f"lista completa {r['lista_completa_kb']:.0f} KB")
+        print(f"  {'consulta':<20} {'índice (µs)':>12} {'lineal (µs)':>12}  primeros resultados")
+        for consulta, c in r['consultas'].items():
+            print(f"  {consulta:<20} {c['indice_us']:>12.1f} {c['lineal_us']:>12.1f}  {' | '.join(c['primeros'])[:70]}")
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
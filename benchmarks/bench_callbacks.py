@@ -0,0 +1,312 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_callbacks.py
+# Descripción: Latencia, memoria pico y bytes de respuesta de cada
+#              callback del servidor con datos sintéticos a 1x, 10x y
+#              100x el tamaño de ArchivosProcesados/ (mismos esquemas:
+#              cada tabla se repite N veces; la jerarquía CIE-10, que
+#              tiene un nodo por código, sólo multiplica sus muertes).
+#              Cada escala corre en un proceso aparte con DIR_DATOS
+#              apuntando a sus datos. Los callbacks se toman del mapa de
+#              callbacks de Dash (app.callback_map) y se llaman por
+#              /_dash-update-component con los valores del layout y, uno
+#              a la vez, con otras opciones de cada entrada.
+#              Se mide en dos pasadas: tiempos sin tracemalloc y memoria
+#              pico (tracemalloc) de la primera llamada de cada escenario.
+#              El resultado se escribe en JSON (--salida) para comparar
+#              entre versiones.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_callbacks [--escalas 1,10,100] [--anios 1]
+#         [--repeticiones 5] [--variantes 3] [--sin-cache] [--salida bench_callbacks.json]
+# ------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from datos import almacen
+
+# Tablas con una fila por nodo: se escalan sus muertes, no sus filas
+_UNICAS = {'JerarquiaCIE10'}
+
+# Valores de prueba para propiedades que no tienen opciones en el layout
+_EXTRAS = {
+    'search_value': ['medellin', 'neumonia', 'I21'],
+    'filter_query': ['{Muertes} > 100', '{Descripcion} contains infarto'],
+    'sort_by': [[{'column_id': 'Muertes', 'direction': 'desc'}], [{'column_id': 'COD_MUERTE', 'direction': 'asc'}]],
+    'page_current': [1, 50],
+    'n_clicks': [1],
+}
+
+
+def _armar(directorio, escala, n_anios):
+    """
+    Datos sintéticos en `directorio`: los GLOBALES y la geometría
+    enlazados, y `n_anios` particiones con cada tabla repetida `escala` veces.
+    """
+    import pandas as pd
+
+    origen = os.path.abspath(almacen.DIR_DATOS)
+    tablas = {}
+    for archivo in sorted(os.listdir(origen)):
+        nombre, extension = os.path.splitext(archivo)
+        if archivo.endswith('.geo.json') or (extension == '.csv' and nombre in almacen.GLOBALES):
+            os.symlink(os.path.join(origen, archivo), os.path.join(directorio, archivo))
+        elif extension == '.csv':
+            df = pd.read_csv(os.path.join(origen, archivo), sep=';', encoding='utf-8-sig')
+            if nombre in _UNICAS:
+                df['Muertes'] = df['Muertes'] * escala
+            else:
+                df = pd.concat([df] * escala, ignore_index=True)
+            tablas[nombre] = df
+    filas = {}
+    for anio in range(almacen.ANIO_RAIZ - n_anios + 1, almacen.ANIO_RAIZ + 1):
+        carpeta = almacen.particion(anio, directorio)
+        for nombre, df in tablas.items():
+            almacen.escribir(df, nombre, carpeta)
+            filas[nombre] = filas.get(nombre, 0) + len(df)
+    return filas
+
+
+def _componentes():
+    """
+    Componentes con id del layout principal y de todas las páginas.
+    """
+    from app import app
+    from paginas import registro
+
+    componentes = {}
+    principal = app.layout() if callable(app.layout) else app.layout
+    for raiz in [principal, *(registro.layout(p.ruta) for p in registro.PAGINAS)]:
+        for c in registro._con_id(raiz):
+            componentes.setdefault(c.id, c)
+    return componentes
+
+
+def _opciones(componente):
+    valores = []
+    for opcion in getattr(componente, 'options', None) or []:
+        valor = opcion.get('value') if isinstance(opcion, dict) else opcion
+        # Como los manda el navegador: escalares de Python, no numpy
+        valores.append(valor.item() if hasattr(valor, 'item') else valor)
+    return valores
+
+
+def _candidatos(id_componente, propiedad, componente, variantes):
+    """
+    Valor por defecto (el del layout) y otros valores para probar la entrada.
+    """
+    from paginas import registro
+
+    defecto = getattr(componente, propiedad, None) if componente is not None else None
+    if id_componente == 'filtro-anios':
+        todos = list(almacen.anios())
+        return defecto, [todos] if todos != defecto else []
+    if propiedad == 'pathname':
+        return '/', [p.ruta for p in registro.PAGINAS][1:variantes + 1]
+    if propiedad == 'active_cell':
+        from datos import causas
+        capitulos = causas.hijos()[:variantes]
+        return defecto, [{'row': i, 'column': 0, 'column_id': 'CODIGO', 'row_id': c['id']}
+                         for i, c in enumerate(capitulos)]
+    if propiedad == 'value' and _opciones(componente):
+        return defecto, [v for v in _opciones(componente) if v != defecto][:variantes]
+    return defecto, _EXTRAS.get(propiedad, [])[:variantes]
+
+
+def _salidas(clave):
+    # 'a.figure' o '..a.data...b.children..' -> [(id, propiedad)]
+    partes = clave[2:-2].split('...') if clave.startswith('..') else [clave]
+    return [tuple(p.rsplit('.', 1)) for p in partes]
+
+
+def _escenarios(variantes):
+    """
+    Por callback del servidor: nombre y cuerpos JSON de sus escenarios
+    (todo por defecto y luego cada entrada con otros valores).
+    """
+    from app import app
+
+    componentes = _componentes()
+    # Stores que llenan los callbacks del navegador con los valores de sus
+    # entradas (la consulta que pasan al servidor): se prueban con ellos
+    reenviados = {}
+    for clave, datos in app.callback_map.items():
+        if datos.get('callback') is None:
+            for i, p in _salidas(clave):
+                if p == 'data':
+                    reenviados[i] = datos['inputs']
+
+    def candidatos(d):
+        if d['id'] not in reenviados:
+            return _candidatos(d['id'], d['property'], componentes.get(d['id']), variantes)
+        origen = [_candidatos(e['id'], e['property'], componentes.get(e['id']), variantes)
+                  for e in reenviados[d['id']]]
+        defecto = [valor for valor, _ in origen]
+        otros = [defecto[:k] + [v] + defecto[k + 1:] for k, (_, vs) in enumerate(origen) for v in vs]
+        return defecto, otros[:variantes]
+
+    escenarios = []
+    for clave, datos in app.callback_map.items():
+        func = datos.get('callback')
+        if func is None:
+            continue
+        salidas = _salidas(clave)
+        outputs = [{'id': i, 'property': p} for i, p in salidas]
+
+        def especificar(lista):
+            return [(d['id'], d['property'], *candidatos(d)) for d in lista]
+        entradas, estados = especificar(datos['inputs']), especificar(datos.get('state', []))
+
+        def cuerpo(cambiada, valores):
+            return {
+                'output': clave,
+                'outputs': outputs[0] if len(outputs) == 1 else outputs,
+                'inputs': [{'id': i, 'property': p, 'value': v} for (i, p, *_), v in zip(entradas, valores)],
+                'changedPropIds': [cambiada],
+                'state': [{'id': i, 'property': p, 'value': d} for i, p, d, _ in estados],
+            }
+        defectos = [d for _, _, d, _ in entradas]
+        casos = [('defecto', cuerpo(f'{entradas[0][0]}.{entradas[0][1]}', defectos))]
+        for k, (i, p, _, otros) in enumerate(entradas):
+            for valor in otros:
+                valores = list(defectos)
+                valores[k] = valor
+                casos.append((f'{i}.{p}={json.dumps(valor, ensure_ascii=False)}', cuerpo(f'{i}.{p}', valores)))
+        escenarios.append((getattr(func, '__name__', clave), clave, casos))
+    return escenarios
+
+
+def _medir_escala(repeticiones, variantes, memoria):
+    """
+    En el proceso hijo (DIR_DATOS ya apunta a los datos sintéticos):
+    prepara las páginas y llama cada escenario. Con `memoria`, sólo mide
+    el pico de tracemalloc de la primera llamada.
+    """
+    import tracemalloc
+    import warnings
+    warnings.filterwarnings('ignore')
+
+    t = time.perf_counter()
+    from app import server
+    from paginas import registro
+    importar = time.perf_counter() - t
+    t = time.perf_counter()
+    escenarios = _escenarios(variantes)
+    preparar = time.perf_counter() - t
+    cliente = server.test_client()
+
+    resultados = {}
+    for nombre, clave, casos in escenarios:
+        por_caso = {}
+        for caso, cuerpo in casos:
+            if memoria:
+                tracemalloc.start()
+                respuesta = cliente.post('/_dash-update-component', json=cuerpo)
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                por_caso[caso] = {'pico_mb': pico / 2**20}
+                continue
+            t = time.perf_counter()
+            respuesta = cliente.post('/_dash-update-component', json=cuerpo)
+            frio = time.perf_counter() - t
+            calientes = []
+            for _ in range(repeticiones):
+                t = time.perf_counter()
+                cliente.post('/_dash-update-component', json=cuerpo)
+                calientes.append(time.perf_counter() - t)
+            calientes.sort()
+            por_caso[caso] = {
+                'estado_http': respuesta.status_code,
+                'bytes': len(respuesta.data),
+                'frio_ms': frio * 1000,
+                'caliente_ms': calientes[len(calientes) // 2] * 1000 if calientes else None,
+            }
+        resultados[nombre] = {'salida': clave, 'casos': por_caso}
+    return {
+        'importar_ms': importar * 1000,
+        'preparar_paginas_ms': preparar * 1000,
+        'paginas_ms': {r: e['ms'] for r, e in registro.estado().items()},
+        'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'callbacks': resultados,
+    }
+
+
+def _correr_hijo(directorio, args, memoria):
+    entorno = dict(os.environ, DIR_DATOS=directorio, CALENTAR_PAGINAS='0', RECARGAR_DATOS_S='0')
+    if args.sin_cache:
+        entorno['CACHE_FIGURAS_MB'] = '0'
+        entorno.pop('CACHE_FIGURAS_DIR', None)
+    comando = [sys.executable, '-m', 'benchmarks.bench_callbacks', '--hijo',
+               '--repeticiones', str(args.repeticiones), '--variantes', str(args.variantes)]
+    if memoria:
+        comando.append('--memoria')
+    salida = subprocess.run(comando, env=entorno, check=True, capture_output=True, text=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def _unir(tiempos, memoria):
+    # Agrega la memoria pico de la segunda pasada a cada caso de la primera
+    for nombre, datos in tiempos['callbacks'].items():
+        for caso, r in datos['casos'].items():
+            r['pico_mb'] = memoria['callbacks'].get(nombre, {}).get('casos', {}).get(caso, {}).get('pico_mb')
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de todos los callbacks a varias escalas de datos')
+    parser.add_argument('--escalas', default='1,10,100')
+    parser.add_argument('--anios', type=int, default=1, help='particiones por año (se consultan todas)')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--variantes', type=int, default=3, help='otros valores probados por entrada')
+    parser.add_argument('--sin-cache', action='store_true', help='sin caché de figuras (CACHE_FIGURAS_MB=0)')
+    parser.add_argument('--salida', default='bench_callbacks.json')
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--memoria', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(_medir_escala(args.repeticiones, args.variantes, args.memoria)))
+        return
+
+    por_escala = {}
+    for escala in (int(e) for e in args.escalas.split(',')):
+        with tempfile.TemporaryDirectory() as directorio:
+            t = time.perf_counter()
+            filas = _armar(directorio, escala, args.anios)
+            armar = time.perf_counter() - t
+            resultado = _unir(_correr_hijo(directorio, args, False), _correr_hijo(directorio, args, True))
+        resultado['filas'] = filas
+        resultado['armar_s'] = armar
+        por_escala[escala] = resultado
+
+        print(f'\nEscala {escala}x ({sum(filas.values())} filas por año, {args.anios} año(s)); '
+              f"RSS pico {resultado['rss_pico_mb']:.0f} MB")
+        print(f"{'callback':<28} {'caso':<44} {'frío (ms)':>10} {'caliente':>9} {'KB':>8} {'pico MB':>8}")
+        for nombre, datos in resultado['callbacks'].items():
+            for caso, r in datos['casos'].items():
+                caliente = '-' if r['caliente_ms'] is None else f"{r['caliente_ms']:.2f}"
+                pico = '-' if r['pico_mb'] is None else f"{r['pico_mb']:.1f}"
+                print(f"{nombre:<28} {caso[:44]:<44} {r['frio_ms']:>10.1f} {caliente:>9} "
+                      f"{r['bytes'] / 1024:>8.1f} {pico:>8}")
+
+    informe = {
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                                 capture_output=True, text=True).stdout.strip() or None,
+        'python': platform.python_version(),
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('hijo', 'memoria')},
+        'escalas': por_escala,
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(informe, f, ensure_ascii=False, indent=1)
+    print(f'\nResultados en {args.salida}')
+
+
+if __name__ == '__main__':
+    main()
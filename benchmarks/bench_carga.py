@@ -0,0 +1,184 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_carga.py
+# Descripción: Prueba de carga HTTP de los callbacks del servidor:
+#              peticiones por segundo y latencias p50/p95/p99 con el
+#              servidor de desarrollo (python app.py) y con gunicorn
+#              (gunicorn.conf.py). Cada servidor se arranca en un proceso
+#              aparte y se detiene al terminar.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_carga [--modos dev,gunicorn] [--clientes 8] [--segundos 10]
+# ------------------------------------------------------------------
+import argparse
+import http.client
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+from datos import almacen
+
+_SEXOS = [None, 'Masculino', 'Femenino']
+_MESES = [None, *almacen.O_MONTHS]
+_MANERAS = [None, 'Accidente', 'Homicidio', 'Natural', 'Suicidio']
+# Selector global de años: la selección inicial de la app
+_ANIOS = [list(almacen.anios_defecto())]
+
+# Callbacks del servidor: (componente, propiedades, [(entrada, valores)]).
+# Una entrada sin '.propiedad' es un dropdown ('value').
+ESCENARIOS = [
+    ('mapa-departamentos', 'figure',
+     [('filtro-sexo', _SEXOS), ('filtro-manera', _MANERAS), ('filtro-anios', _ANIOS)]),
+    ('grafico-ciudades', 'figure',
+     [('filtro-mes-ciudades', _MESES), ('filtro-sexo-ciudades', _SEXOS), ('filtro-anios', _ANIOS)]),
+    ('grafico-indice', 'figure',
+     [('filtro-mes-indice', _MESES), ('filtro-sexo-indice', _SEXOS), ('filtro-anios', _ANIOS)]),
+    ('tabla-causas', ('data', 'page_count', 'page_current'),
+     [('filtro-mes-causas', _MESES), ('filtro-sexo-causas', _SEXOS),
+      ('filtro-municipio-causas', [None]), ('tabla-causas.page_current', [0, 1]),
+      ('tabla-causas.page_size', [10]), ('tabla-causas.sort_by', [[]]),
+      ('tabla-causas.filter_query', ['']), ('filtro-anios', _ANIOS)]),
+    ('grafico-sexo-dep', 'figure', [('filtro-manera-sexo', _MANERAS), ('filtro-anios', _ANIOS)]),
+]
+
+_COMANDOS = {
+    'dev': [sys.executable, 'app.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+}
+
+
+def _cuerpos():
+    """
+    Cuerpos JSON de /_dash-update-component para todas las combinaciones
+    de filtros de ESCENARIOS, intercalados entre callbacks.
+    """
+    por_callback = []
+    for componente, propiedades, filtros in ESCENARIOS:
+        entradas = [(f.split('.') + ['value'])[:2] for f, _ in filtros]
+        if isinstance(propiedades, str):
+            output = f'{componente}.{propiedades}'
+            outputs = {'id': componente, 'property': propiedades}
+        else:
+            output = '..' + '...'.join(f'{componente}.{p}' for p in propiedades) + '..'
+            outputs = [{'id': componente, 'property': p} for p in propiedades]
+        cuerpos = []
+        for valores in itertools.product(*(v for _, v in filtros)):
+            cuerpos.append(json.dumps({
+                'output': output,
+                'outputs': outputs,
+                'inputs': [{'id': i, 'property': p, 'value': v}
+                           for (i, p), v in zip(entradas, valores)],
+                'changedPropIds': ['.'.join(entradas[0])],
+                'state': [],
+            }).encode('utf-8'))
+        por_callback.append(cuerpos)
+    return [c for grupo in itertools.zip_longest(*por_callback) for c in grupo if c is not None]
+
+
+def _esperar(puerto, limite=120):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        try:
+            conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=2)
+            conexion.request('GET', '/salud')
+            if conexion.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'El servidor no respondió en el puerto {puerto}')
+
+
+def _cliente(puerto, cuerpos, inicio, fin, latencias, errores):
+    conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+    cabeceras = {'Content-Type': 'application/json'}
+    for cuerpo in itertools.islice(itertools.cycle(cuerpos), inicio, None):
+        if time.monotonic() >= fin:
+            break
+        t = time.perf_counter()
+        try:
+            conexion.request('POST', '/_dash-update-component', body=cuerpo, headers=cabeceras)
+            respuesta = conexion.getresponse()
+            respuesta.read()
+            ok = respuesta.status == 200
+        except (OSError, http.client.HTTPException):
+            conexion.close()
+            conexion = http.client.HTTPConnection('127.0.0.1', puerto, timeout=30)
+            ok = False
+        if ok:
+            latencias.append(time.perf_counter() - t)
+        else:
+            errores.append(1)
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def medir(modo, puerto, clientes, segundos):
+    """
+    Arranca el servidor `modo`, lo calienta y lanza `clientes` hilos
+    durante `segundos`. Devuelve peticiones/s y latencias (ms).
+    """
+    entorno = dict(os.environ, PORT=str(puerto))
+    proceso = subprocess.Popen(_COMANDOS[modo], env=entorno, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _esperar(puerto)
+        cuerpos = _cuerpos()
+        # Calentamiento: una pasada por todas las combinaciones
+        _cliente(puerto, cuerpos, 0, time.monotonic() + 60, [], [])
+
+        latencias, errores = [], []
+        fin = time.monotonic() + segundos
+        hilos = [threading.Thread(target=_cliente,
+                                  args=(puerto, cuerpos, i * 7, fin, latencias, errores))
+                 for i in range(clientes)]
+        t0 = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        duracion = time.perf_counter() - t0
+    finally:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        proceso.wait(timeout=30)
+
+    if not latencias:
+        raise RuntimeError(f'{modo}: ninguna petición exitosa ({len(errores)} errores)')
+    return {
+        'peticiones_s': len(latencias) / duracion,
+        'p50_ms': _percentil(latencias, 0.50) * 1000,
+        'p95_ms': _percentil(latencias, 0.95) * 1000,
+        'p99_ms': _percentil(latencias, 0.99) * 1000,
+        'peticiones': len(latencias),
+        'errores': len(errores),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de los callbacks')
+    parser.add_argument('--modos', default='dev,gunicorn')
+    parser.add_argument('--clientes', type=int, default=8)
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--puerto', type=int, default=8071)
+    args = parser.parse_args()
+
+    resultados = {}
+    for i, modo in enumerate(m.strip() for m in args.modos.split(',')):
+        resultados[modo] = medir(modo, args.puerto + i, args.clientes, args.segundos)
+
+    print(f"{'servidor':<10} {'pet/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'errores':>8}")
+    for modo, r in resultados.items():
+        print(f"{modo:<10} {r['peticiones_s']:>8.1f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+              f"{r['p99_ms']:>9.1f} {r['errores']:>8}")
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_cubos.py
+# Descripción: Verifica que cada celda de los cubos de agregación sea
+#              idéntica a lo que calculaban las páginas antes de los
+#              cubos (filtrar el dataset por cada dropdown con valor +
+#              groupby(..., observed=True)), para todas las combinaciones
+#              de filtros, en cada año y con todos los años juntos, y
+#              compara el tiempo de ambas rutas.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_cubos
+# ------------------------------------------------------------------
+import itertools
+import json
+import sys
+import time
+
+import pandas as pd
+
+from datos import almacen, cubos
+# Las páginas registran sus cubos al importarse
+import paginas.mapa  # noqa: F401
+import paginas.muertePorMes  # noqa: F401
+import paginas.CiudadesMasViolentas  # noqa: F401
+import paginas.IndiceMortalidad  # noqa: F401
+import paginas.MuertesPorSexo  # noqa: F401
+import paginas.HistogramaMortalidad  # noqa: F401
+import paginas.Resumen  # noqa: F401
+
+
+# Código de las páginas antes de los cubos, uno por cubo (con los años
+# seleccionados leídos juntos). Las páginas filtraban con `if valor:`;
+# aquí con `is not None`, porque la hora 0 es un valor válido.
+
+def _leer(nombre, anios):
+    return almacen.concatenar(almacen.obtener(nombre, a) for a in anios)
+
+
+def _departamento(anios, sexo_sel, manera_sel):
+    # paginas/mapa.py
+    df_filtrado = _leer('MuertesPorDepartamento', anios)
+    if sexo_sel is not None:
+        df_filtrado = df_filtrado[df_filtrado['SEXO'] == sexo_sel]
+    if manera_sel is not None:
+        df_filtrado = df_filtrado[df_filtrado['MANERA_MUERTE'] == manera_sel]
+    return df_filtrado.groupby('COD_DEPARTAMENTO', as_index=False, observed=True).agg({'Muertes': 'sum'})
+
+
+def _mes(anios, sexo_sel, hora_sel, manera_sel):
+    # paginas/muertePorMes.py
+    df_f = _leer('MuertesPorMes', anios)
+    if sexo_sel is not None:
+        df_f = df_f[df_f['SEXO'] == sexo_sel]
+    if hora_sel is not None:
+        df_f = df_f[df_f['HORA'] == hora_sel]
+    if manera_sel is not None:
+        df_f = df_f[df_f['MANERA_MUERTE'] == manera_sel]
+    return df_f.groupby('MES', as_index=False, observed=True).agg({'Muertes': 'sum'})
+
+
+def _municipio(anios, mes_sel, sexo_sel):
+    # paginas/CiudadesMasViolentas.py, IndiceMortalidad.py y Resumen.py
+    df_f = _leer('MuertesPorMunicipio', anios)
+    if mes_sel is not None:
+        df_f = df_f[df_f['mes_nombre'] == mes_sel]
+    if sexo_sel is not None:
+        df_f = df_f[df_f['SEXO'] == sexo_sel]
+    return (df_f.groupby(almacen.CLAVE_MUNICIPIO + ['ETIQUETA_MUNICIPIO'], as_index=False, observed=True)
+            .agg({'Muertes': 'sum'}))
+
+
+def _departamento_sexo(anios, manera_sel):
+    # paginas/MuertesPorSexo.py y Resumen.py
+    dff = _leer('MuertesPorDepartamento', anios)
+    if manera_sel is not None:
+        dff = dff[dff['MANERA_MUERTE'] == manera_sel]
+    return dff.groupby(['DEPARTAMENTO', 'SEXO'], as_index=False, observed=True).agg({'Muertes': 'sum'})
+
+
+def _edad(anios, mes_sel, sexo_sel):
+    # paginas/HistogramaMortalidad.py
+    dff = _leer('MuertesPorEdad', anios)
+    if mes_sel is not None:
+        dff = dff[dff['mes_nombre'] == mes_sel]
+    if sexo_sel is not None:
+        dff = dff[dff['SEXO'] == sexo_sel]
+    return dff.groupby('edad_rango', as_index=False, observed=True).agg({'Muertes': 'sum'})
+
+
+_ORIGINALES = {
+    'departamento': _departamento,
+    'mes': _mes,
+    'municipio': _municipio,
+    'departamento_sexo': _departamento_sexo,
+    'edad': _edad,
+}
+
+
+def _selecciones():
+    # Cada año por separado y, si hay varios, todos juntos
+    anios = list(almacen.anios())
+    return [[a] for a in anios] + ([anios] if len(anios) > 1 else [])
+
+
+def _combinaciones(cubo):
+    # Dominio de cada filtro (en todos los años) más None ("todos")
+    df = _leer(cubo.dataset, almacen.anios())
+    dominios = [[None] + sorted(df[f].dropna().unique().tolist()) for f in cubo.filtros]
+    return list(itertools.product(*dominios))
+
+
+def _normalizar(df, grupo):
+    # Mismo orden de filas y tipos comparables: las categorías pueden
+    # diferir entre años y la suma de int32 puede salir como int64
+    categoricas = {c: df[c].to_numpy() for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)}
+    return df.assign(**categoricas).sort_values(grupo).reset_index(drop=True)
+
+
+def main():
+    t0 = time.perf_counter()
+    for anios in _selecciones():
+        cubos.construir_todos(anios)
+    t_construccion = time.perf_counter() - t0
+
+    sin_referencia = sorted(set(cubos._cubos) - set(_ORIGINALES))
+    if sin_referencia:
+        print(f'Cubos sin código original de referencia: {sin_referencia}', file=sys.stderr)
+        sys.exit(1)
+
+    resultados, errores = {}, 0
+    for nombre, cubo in cubos._cubos.items():
+        if not almacen.confiable(cubo.dataset):
+            print(f'Cubo {nombre} omitido: {cubo.dataset} no es confiable', file=sys.stderr)
+            continue
+        original = _ORIGINALES[nombre]
+        combinaciones = _combinaciones(cubo)
+        t_cubo = t_pandas = 0.0
+        n = 0
+        for anios in _selecciones():
+            for valores in combinaciones:
+                t = time.perf_counter()
+                obtenido = cubo.consultar(anios, *valores)
+                t_cubo += time.perf_counter() - t
+                t = time.perf_counter()
+                esperado = original(anios, *valores)
+                t_pandas += time.perf_counter() - t
+                n += 1
+                try:
+                    pd.testing.assert_frame_equal(_normalizar(obtenido, cubo.grupo),
+                                                  _normalizar(esperado, cubo.grupo), check_dtype=False)
+                except AssertionError as e:
+                    errores += 1
+                    print(f'DIFERENCIA {nombre} {anios} {valores}: {e}', file=sys.stderr)
+        resultados[nombre] = {
+            'combinaciones': n,
+            'cubo_us': t_cubo / n * 1e6,
+            'pandas_us': t_pandas / n * 1e6,
+            **cubos.estado()[nombre],
+        }
+
+    print(f"{'cubo':<18} {'comb.':>6} {'cubo (µs)':>10} {'original (µs)':>14} {'KB':>8}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<18} {r['combinaciones']:>6} {r['cubo_us']:>10.1f} "
+              f"{r['pandas_us']:>14.1f} {r['bytes'] / 1024:>8.1f}")
+    print(f'construcción: {t_construccion * 1000:.1f} ms, diferencias: {errores}')
+    print(json.dumps(resultados))
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_formatos.py
+# Descripción: Tiempo de carga de cada archivo procesado según su formato
+#              (CSV, Arrow/Feather mapeado en memoria y Parquet), por la
+#              misma ruta que usa la app (datos/almacen.py, esquema y
+#              columnas derivadas incluidos). Requiere pyarrow.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_formatos [--repeticiones 5]
+# ------------------------------------------------------------------
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from datos import almacen
+
+
+def _preparar(base):
+    # Un directorio por formato, con sólo ese formato, para forzar la ruta de lectura
+    directorios = {}
+    for formato in almacen.FORMATOS:
+        directorio = os.path.join(base, formato)
+        os.makedirs(directorio)
+        for nombre in almacen.ESQUEMAS:
+            if formato == 'csv':
+                shutil.copy(almacen._ruta(nombre, 'csv'), directorio)
+            else:
+                almacen.escribir(almacen._leer_csv(nombre), nombre, directorio, (formato,))
+        directorios[formato] = directorio
+    return directorios
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de formatos de almacenamiento')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+    if almacen.pa is None:
+        raise SystemExit('Este benchmark requiere pyarrow')
+
+    resultados = {}
+    original = almacen.DIR_DATOS
+    with tempfile.TemporaryDirectory() as base:
+        directorios = _preparar(base)
+        for nombre in almacen.ESQUEMAS:
+            resultados[nombre] = {}
+            for formato, directorio in directorios.items():
+                almacen.DIR_DATOS = directorio
+                tiempos = []
+                for _ in range(args.repeticiones):
+                    t = time.perf_counter()
+                    almacen._leer(nombre)
+                    tiempos.append(time.perf_counter() - t)
+                resultados[nombre][formato] = {
+                    'carga_ms': min(tiempos) * 1000,
+                    'kb': os.path.getsize(almacen._ruta(nombre, formato)) / 1024,
+                }
+        almacen.DIR_DATOS = original
+
+    print(f"{'archivo':<26}" + ''.join(f'{f + " (ms)":>16}{"KB":>9}' for f in almacen.FORMATOS))
+    for nombre, r in resultados.items():
+        print(f'{nombre:<26}' + ''.join(
+            f"{r[f]['carga_ms']:>16.1f}{r[f]['kb']:>9.0f}" for f in almacen.FORMATOS))
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
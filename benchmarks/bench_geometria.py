@@ -0,0 +1,52 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_geometria.py
+# Descripción: Tamaño del payload y tiempo de construcción/serialización
+#              de la figura del mapa con la geometría original y con cada
+#              nivel simplificado de datos/geometria.py.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m datos.geometria            # si aún no existen los niveles
+#     python -m benchmarks.bench_geometria [--repeticiones 5]
+# ------------------------------------------------------------------
+import argparse
+import json
+import time
+
+import plotly.io as pio
+
+from datos import geometria
+from paginas import mapa
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la geometría del mapa')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    df_full = mapa.valores_mapa(None, None)
+    elegido = geometria.elegir_nivel(mapa.GRADOS_POR_PIXEL)
+
+    resultados = {}
+    for nivel in [None, *geometria.NIVELES]:
+        geojson = geometria.cargar(nivel)
+        tiempos = []
+        for _ in range(args.repeticiones):
+            t = time.perf_counter()
+            payload = pio.to_json(mapa.figura_mapa(df_full, geojson), validate=False)
+            tiempos.append(time.perf_counter() - t)
+        resultados[nivel or 'original'] = {
+            'tolerancia': geometria.NIVELES.get(nivel, 0),
+            'payload_bytes': len(payload.encode('utf-8')),
+            'render_ms': min(tiempos) * 1000,
+        }
+
+    print(f"{'nivel':<10} {'tolerancia':>10} {'payload (KB)':>13} {'render (ms)':>12}")
+    for nombre, r in resultados.items():
+        marca = '  <- usado por el mapa' if nombre == (elegido or 'original') else ''
+        print(f"{nombre:<10} {r['tolerancia']:>10} {r['payload_bytes'] / 1024:>13.1f} "
+              f"{r['render_ms']:>12.1f}{marca}")
+    print(json.dumps(resultados))
+
+
+if __name__ == '__main__':
+    main()
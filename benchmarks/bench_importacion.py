@@ -0,0 +1,109 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_importacion.py
+# Descripción: Perfil de importación de app.py (como `python -X importtime`)
+#              y costo de la primera visita a cada ruta, ahora que los
+#              datos de las páginas se cargan de forma diferida, frente a
+#              la segunda (layout ya construido).
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_importacion [--top 15] [--repeticiones 3]
+# ------------------------------------------------------------------
+import argparse
+import json
+import subprocess
+import sys
+
+# Proceso nuevo: importa app.py y luego visita cada ruta por primera vez
+_PRIMERA_VISITA = """
+import json, time, warnings
+warnings.filterwarnings('ignore')
+t0 = time.perf_counter()
+import app
+from paginas import registro
+importar = time.perf_counter() - t0
+rutas, segunda = {}, {}
+for pagina in registro.PAGINAS:
+    t = time.perf_counter()
+    registro.layout(pagina.ruta)
+    rutas[pagina.ruta] = time.perf_counter() - t
+    t = time.perf_counter()
+    registro.layout(pagina.ruta)
+    segunda[pagina.ruta] = time.perf_counter() - t
+print(json.dumps({'importar': importar, 'rutas': rutas, 'segunda': segunda}))
+"""
+
+
+def _perfil_importacion():
+    """
+    Tiempos propio y acumulado (µs) de cada módulo importado por app.py.
+    """
+    # -X importtime no registra importlib.import_module (lo que usa el
+    # registro), así que las páginas se importan antes con `import`
+    codigo = ('from paginas import registro\n'
+              'for pagina in registro.PAGINAS:\n'
+              '    __import__(pagina.modulo)\n'
+              'import app')
+    salida = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-W', 'ignore', '-c', codigo],
+        check=True, capture_output=True, text=True
+    )
+    modulos = []
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        modulos.append({'modulo': nombre.strip(), 'propio_us': int(propio), 'acumulado_us': int(acumulado)})
+    return modulos
+
+
+def _primera_visita():
+    salida = subprocess.run(
+        [sys.executable, '-c', _PRIMERA_VISITA],
+        check=True, capture_output=True, text=True
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Perfil de importación y primera visita')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    perfiles = [_perfil_importacion() for _ in range(args.repeticiones)]
+    # Mínimo por módulo entre repeticiones
+    minimos = {}
+    for perfil in perfiles:
+        for m in perfil:
+            actual = minimos.get(m['modulo'])
+            if actual is None or m['acumulado_us'] < actual['acumulado_us']:
+                minimos[m['modulo']] = m
+    modulos = sorted(minimos.values(), key=lambda m: m['acumulado_us'], reverse=True)
+    propios = [m for m in modulos if m['modulo'].split('.')[0] in ('app', 'datos', 'paginas')]
+
+    visitas = [_primera_visita() for _ in range(args.repeticiones)]
+    importar = min(v['importar'] for v in visitas)
+    rutas = {r: min(v['rutas'][r] for v in visitas) for r in visitas[0]['rutas']}
+    segunda = {r: min(v['segunda'][r] for v in visitas) for r in visitas[0]['segunda']}
+
+    print(f"{'módulo':<40} {'propio (ms)':>12} {'acumulado (ms)':>15}")
+    for m in modulos[:args.top]:
+        print(f"{m['modulo']:<40} {m['propio_us'] / 1000:>12.1f} {m['acumulado_us'] / 1000:>15.1f}")
+    print('\nMódulos del proyecto:')
+    for m in propios:
+        print(f"{m['modulo']:<40} {m['propio_us'] / 1000:>12.1f} {m['acumulado_us'] / 1000:>15.1f}")
+    print(f'\nimport app: {importar * 1000:.0f} ms')
+    print(f"{'ruta':<40} {'1.ª visita (ms)':>16} {'2.ª visita (ms)':>16}")
+    for ruta, t in rutas.items():
+        print(f'{ruta:<40} {t * 1000:>16.1f} {segunda[ruta] * 1000:>16.3f}')
+    print(json.dumps({
+        'importar_ms': importar * 1000,
+        'primera_visita_ms': {r: t * 1000 for r, t in rutas.items()},
+        'segunda_visita_ms': {r: t * 1000 for r, t in segunda.items()},
+        'modulos': modulos[:args.top],
+        'proyecto': propios,
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_jerarquia.py
+# Descripción: Verifica los hijos de cada nodo del árbol de causas
+#              (JerarquiaCIE10, datos/causas.py) contra un group-by con
+#              pandas sobre MuertesPorCodigo + catálogo CIE-10, y compara
+#              el tiempo de un paso del explorador con ambos caminos.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_jerarquia
+# ------------------------------------------------------------------
+import json
+import sys
+import time
+
+from datos import almacen, causas
+
+_COD3 = 'Código de la CIE-10 tres caracteres'
+_COD4 = 'Código de la CIE-10 cuatro caracteres'
+# Año de la selección inicial (el de MuertesPorCodigo de referencia)
+_ANIOS = almacen.anios_defecto()
+
+
+def _con_jerarquia():
+    # Cada fila de MuertesPorCodigo con su código de tres caracteres y capítulo
+    catalogo = almacen.obtener('CatalogoCIE10')
+    df = almacen.obtener('MuertesPorCodigo', _ANIOS[-1])
+    df['COD_MUERTE'] = df['COD_MUERTE'].astype(str)
+    cuatro = catalogo.set_index(_COD4)[_COD3].astype(str)
+    tres = catalogo.drop_duplicates(_COD3).set_index(_COD3)['Capítulo']
+    tres.index = tres.index.astype(str)
+    df['TRES'] = df['COD_MUERTE'].map(cuatro).fillna(df['COD_MUERTE'])
+    df['CAPITULO'] = df['TRES'].map(tres).astype(str)
+    df['CUATRO'] = df['COD_MUERTE'].where(df['COD_MUERTE'].isin(cuatro.index))
+    return df
+
+
+def _hijos_pandas(df, nivel_padre, codigo):
+    """
+    Un paso del explorador con pandas: filtra al padre y agrupa por el
+    nivel siguiente.
+    """
+    if nivel_padre is None:
+        hijos = df.groupby('CAPITULO')['Muertes'].sum()
+    elif nivel_padre == 'capitulo':
+        hijos = df[df['CAPITULO'] == codigo].groupby('TRES')['Muertes'].sum()
+    else:
+        hijos = df[df['TRES'] == codigo].groupby('CUATRO')['Muertes'].sum()
+    return {c: int(m) for c, m in hijos.items() if m}
+
+
+def main():
+    df = _con_jerarquia()
+    causas.precargar_jerarquia()
+    jerarquia = causas._jerarquia(_ANIOS)
+
+    # La raíz, todos los capítulos y todos los códigos de tres caracteres con hijos
+    nodos = [(None, almacen.RAIZ_CIE10)] + [
+        (nivel, codigo) for nivel, codigo in zip(jerarquia.niveles, jerarquia.codigos)
+        if nivel != 'cuatro' and causas.tiene_hijos(codigo, _ANIOS)
+    ]
+    errores = 0
+    t_indice = t_pandas = 0.0
+    for nivel, codigo in nodos:
+        t = time.perf_counter()
+        obtenido = {h['CODIGO']: h['Muertes'] for h in causas.hijos(codigo, _ANIOS)}
+        t_indice += time.perf_counter() - t
+        t = time.perf_counter()
+        esperado = _hijos_pandas(df, nivel, codigo)
+        t_pandas += time.perf_counter() - t
+        if obtenido != esperado:
+            errores += 1
+            print(f'DIFERENCIA {codigo}', file=sys.stderr)
+
+    n = len(nodos)
+    resultados = {'nodos': n, 'indice_us': t_indice / n * 1e6, 'pandas_us': t_pandas / n * 1e6,
+                  'diferencias': errores}
+    print(f"{'nodos':>6} {'índice (µs)':>12} {'pandas (µs)':>12}")
+    print(f"{n:>6} {resultados['indice_us']:>12.1f} {resultados['pandas_us']:>12.1f}")
+    print(f'diferencias: {errores}')
+    print(json.dumps(resultados))
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# ------------------------------------------------------------------
+# Archivo: benchmarks/bench_paginado.py
+# Descripción: Latencia de la tabla de causas paginada en el servidor
+#              (datos/causas.py) frente a armar la tabla completa con
+#              pandas (groupby + orden + to_dict de todos los códigos),
+#              y tamaño de la respuesta. Verifica además que cada página
+#              coincida con la misma página de la tabla completa.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m benchmarks.bench_paginado [--repeticiones 20]
+# ------------------------------------------------------------------
+import argparse
+import json
+import sys
+import time
+
+import pandas as pd
+
+from datos import almacen, causas
+
+# Año de la tabla de referencia y (mes, sexo) de las combinaciones medidas; None = todos
+_ANIOS = almacen.anios_defecto()
+_FILTROS = [(None, None), ('Enero', None), (None, 'Femenino'), ('Diciembre', 'Masculino')]
+_ORDEN_CODIGO = [{'column_id': 'COD_MUERTE', 'direction': 'asc'}]
+_CONSULTA = '{Descripcion} icontains "tumor"'
+
+
+def _tabla_completa(mes, sexo):
+    """
+    Referencia con pandas: todas las causas del índice con sus muertes,
+    ordenadas por casos (desc) y código, como registros.
+    """
+    indice = causas._indice(_ANIOS)
+    dff = almacen.obtener('MuertesPorMunicipioTabla', _ANIOS[-1])
+    if mes:
+        dff = dff[dff['mes_nombre'] == mes]
+    if sexo:
+        dff = dff[dff['SEXO'] == sexo]
+    muertes = dff.groupby('COD_MUERTE', observed=True)['Muertes'].sum()
+    muertes.index = muertes.index.astype(str).str.strip()
+    df = pd.DataFrame({'COD_MUERTE': indice.codigos, 'Descripcion': indice.descripciones})
+    df['Muertes'] = df['COD_MUERTE'].map(muertes).fillna(0).astype('int64')
+    df = df.sort_values(['Muertes', 'COD_MUERTE'], ascending=[False, True])
+    return df.to_dict('records')
+
+
+def _medir(funcion, repeticiones, antes=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if antes:
+            antes()
+        t = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t)
+    return min(tiempos) * 1000
+
+
+def _limpiar():
+    # Sin resultados en caché (el índice del catálogo se conserva)
+    causas._muertes.cache_clear()
+    causas._orden.cache_clear()
+    causas._mascara_texto.cache_clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la tabla paginada en el servidor')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+    n = args.repeticiones
+
+    causas.precargar()
+    errores = 0
+    for mes, sexo in _FILTROS:
+        completa = _tabla_completa(mes, sexo)
+        for numero in (0, 1, 57):
+            registros, _, _ = causas.pagina(mes, sexo, anios=_ANIOS, numero=numero)
+            if registros != completa[numero * 10:(numero + 1) * 10]:
+                errores += 1
+                print(f'DIFERENCIA {mes} {sexo} página {numero}', file=sys.stderr)
+
+    mes, sexo = 'Enero', 'Femenino'
+    completa = _tabla_completa(mes, sexo)
+    pagina, paginas, _ = causas.pagina(mes, sexo, anios=_ANIOS)
+    resultados = {
+        'tabla completa (pandas)': _medir(lambda: _tabla_completa(mes, sexo), n),
+        'primera página, filtros nuevos': _medir(lambda: causas.pagina(mes, sexo, anios=_ANIOS), n, _limpiar),
+        'cambio de página': _medir(lambda: causas.pagina(mes, sexo, anios=_ANIOS, numero=paginas // 2), n),
+        'orden nuevo (código)': _medir(
+            lambda: causas.pagina(mes, sexo, anios=_ANIOS, orden=_ORDEN_CODIGO), n, causas._orden.cache_clear),
+        'filtro de texto nuevo': _medir(
+            lambda: causas.pagina(mes, sexo, anios=_ANIOS, consulta=_CONSULTA), n, _limpiar),
+        'página con filtro de texto': _medir(
+            lambda: causas.pagina(mes, sexo, anios=_ANIOS, numero=2, consulta=_CONSULTA), n),
+    }
+    kb = {
+        'tabla completa': len(json.dumps(completa)) / 1024,
+        'una página': len(json.dumps(pagina)) / 1024,
+    }
+
+    print(f'{len(causas._indice(_ANIOS))} códigos, {paginas} páginas de 10')
+    print(f"{'operación':<34} {'ms':>9}")
+    for operacion, ms in resultados.items():
+        print(f'{operacion:<34} {ms:>9.3f}')
+    print(f"respuesta: tabla completa {kb['tabla completa']:.0f} KB, una página {kb['una página']:.1f} KB")
+    print(f'diferencias: {errores}')
+    print(json.dumps({'ms': resultados, 'kb': kb, 'diferencias': errores}))
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,744 @@
+# ------------------------------------------------------------------
+# Archivo: datos/almacen.py
+# Descripción: Capa única de acceso a los datos procesados. Cada archivo
+#              se lee una sola vez por proceso, con tipos compactos, y las
+#              páginas reciben vistas de solo lectura del mismo DataFrame.
+#              Si existe la versión Arrow/Feather (.arrow) se mapea en
+#              memoria; si no, Parquet; en último caso, el CSV.
+#              Los datasets de conteos se particionan por año
+#              (DIR_DATOS/anio=2019/...): una consulta sólo lee los años
+#              seleccionados. El catálogo CIE-10 es común a todos.
+#              Los datos tienen versiones: un hilo revisa DIR_DATOS y,
+#              si cambió, arma la versión nueva en segundo plano (sólo
+#              relee las particiones que cambiaron según el manifiesto
+#              del ETL) y la publica sin reiniciar; cada petición usa de
+#              principio a fin la versión con la que empezó.
+#
+# Uso (desde la raíz del proyecto):
+#     python -m datos.almacen     # genera los .arrow a partir de los CSV
+# ------------------------------------------------------------------
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from datos import metricas
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow es opcional: sin él sólo se leen los CSV
+    pa = feather = None
+
+# Con copy-on-write las vistas que se entregan a las páginas comparten
+# memoria con el DataFrame del almacén; cualquier escritura sobre una vista
+# genera una copia local y nunca modifica los datos compartidos.
+pd.set_option('mode.copy_on_write', True)
+
+# Carpeta de los archivos procesados (relativa a la raíz del proyecto)
+DIR_DATOS = os.environ.get('DIR_DATOS', 'ArchivosProcesados')
+# Carpeta de cada año dentro de DIR_DATOS: anio=2019/
+PREFIJO_PARTICION = 'anio='
+# Año de los archivos que están sueltos en DIR_DATOS (distribución sin
+# particiones); si existe su carpeta anio=..., se usa ésta
+ANIO_RAIZ = int(os.environ.get('ANIO_DATOS', '2019'))
+# Datasets comunes a todos los años: se leen siempre de la raíz
+GLOBALES = ('CatalogoCIE10',)
+# Manifiesto que escribe el ETL al terminar (datos/etl.py)
+MANIFIESTO = 'manifiesto.json'
+# Segundos entre revisiones de DIR_DATOS en busca de datos nuevos (0 = no se vigila)
+INTERVALO_RECARGA = float(os.environ.get('RECARGAR_DATOS_S', '30'))
+
+# Mapear MES numérico a nombre
+MESES = {
+    1:'Enero',2:'Febrero',3:'Marzo',4:'Abril',5:'Mayo',6:'Junio',
+    7:'Julio',8:'Agosto',9:'Septiembre',10:'Octubre',11:'Noviembre',12:'Diciembre'
+}
+# Orden cronológico de los meses
+O_MONTHS = list(MESES.values())
+
+# Rangos quinquenales de edad (18) y GRUPO_EDAD1 del DANE que cae en cada uno:
+# 0-8 son menores de un año y de 1 a 4 años, 25-28 son 85 y más, 29 es edad desconocida
+RANGOS_EDAD = [f'{i}-{i + 4}' for i in range(0, 85, 5)] + ['85+']
+GRUPOS_EDAD = {g: '0-4' for g in range(0, 9)}
+GRUPOS_EDAD.update({g: RANGOS_EDAD[g - 8] for g in range(9, 25)})
+GRUPOS_EDAD.update({g: '85+' for g in range(25, 29)})
+
+# Padre de los capítulos en JerarquiaCIE10 (raíz del árbol de causas)
+RAIZ_CIE10 = 'CIE10'
+
+# Un municipio es departamento + municipio: el código y el nombre del
+# municipio sólo son únicos dentro de su departamento
+CLAVE_MUNICIPIO = ['COD_DEPARTAMENTO', 'COD_MUNICIPIO']
+
+# Formatos en orden de preferencia de lectura y extensión de cada uno
+FORMATOS = {'feather': '.arrow', 'parquet': '.parquet', 'csv': '.csv'}
+
+_CAT = 'category'
+_MES_NOMBRE = pd.CategoricalDtype(O_MONTHS, ordered=True)
+_EDAD_RANGO = pd.CategoricalDtype(RANGOS_EDAD, ordered=True)
+_DESCRIPCION = 'Descripcion  de códigos mortalidad a cuatro caracteres'
+
+# Esquema de cada archivo procesado: tipos de columna a usar en la lectura.
+# Cadenas repetidas -> categóricas, contadores -> int32, códigos -> enteros pequeños.
+# Las columnas ausentes se ignoran (p. ej. COD_DEPARTAMENTO en tablas municipales
+# generadas antes de cruzar por departamento + municipio).
+ESQUEMAS = {
+    'MuertesPorDepartamento': {
+        'COD_DEPARTAMENTO': 'int8', 'SEXO': _CAT, 'MANERA_MUERTE': _CAT,
+        'Muertes': 'int32', 'DEPARTAMENTO': _CAT
+    },
+    'MuertesPorMes': {
+        'MES': _MES_NOMBRE, 'SEXO': _CAT, 'HORA': 'int8',
+        'MANERA_MUERTE': _CAT, 'Muertes': 'int32'
+    },
+    'MuertesPorMunicipio': {
+        'COD_DEPARTAMENTO': 'int8', 'COD_MUNICIPIO': 'int16', 'MES': 'int8', 'SEXO': _CAT,
+        'Muertes': 'int32', 'MUNICIPIO': _CAT, 'DEPARTAMENTO': _CAT
+    },
+    'MuertesPorEdad': {
+        'SEXO': _CAT, 'GRUPO_EDAD1': 'int8', 'MES': 'int8', 'Muertes': 'int32'
+    },
+    'MuertesPorMunicipioTabla': {
+        'COD_DEPARTAMENTO': 'int8', 'COD_MUNICIPIO': 'int16', 'MES': 'int8', 'SEXO': _CAT, 'COD_MUERTE': _CAT,
+        'Muertes': 'int32', 'MUNICIPIO': _CAT, 'DEPARTAMENTO': _CAT,
+        'Código de la CIE-10 cuatro caracteres': _CAT, _DESCRIPCION: _CAT
+    },
+    'CatalogoCIE10': {
+        'Capítulo': 'int8', 'Nombre capítulo': _CAT,
+        'Código de la CIE-10 tres caracteres': _CAT,
+        'Descripción  de códigos mortalidad a tres caracteres': _CAT,
+        'Código de la CIE-10 cuatro caracteres': 'str', _DESCRIPCION: 'str'
+    },
+    'JerarquiaCIE10': {
+        'NIVEL': _CAT, 'CODIGO': 'str', 'PADRE': 'str', 'DESCRIPCION': 'str', 'Muertes': 'int32'
+    },
+}
+
+
+def _derivar_mes_nombre(df):
+    df['mes_nombre'] = df['MES'].map(MESES).astype(_MES_NOMBRE)
+
+
+def _derivar_edad(df):
+    _derivar_mes_nombre(df)
+    df['edad_rango'] = df['GRUPO_EDAD1'].map(GRUPOS_EDAD).astype(_EDAD_RANGO)
+
+
+def _derivar_municipio(df):
+    # ETIQUETA_MUNICIPIO: 'MUNICIPIO (DEPARTAMENTO)', un valor por municipio
+    _derivar_mes_nombre(df)
+    if 'DEPARTAMENTO' in df:
+        departamento = df['DEPARTAMENTO'].astype(str)
+    elif 'COD_DEPARTAMENTO' in df:
+        departamento = df['COD_DEPARTAMENTO'].astype(str)
+    else:
+        # Archivo sin departamento: no confiable (ver _NO_CONFIABLE)
+        departamento = None
+    etiqueta = df['MUNICIPIO'].astype(str)
+    if departamento is not None:
+        etiqueta = etiqueta + ' (' + departamento + ')'
+    # Sin cruce con Divipola: sin etiqueta (no 'nan')
+    df['ETIQUETA_MUNICIPIO'] = etiqueta.where(df['MUNICIPIO'].notna()).astype(_CAT)
+
+
+# Tablas municipales sin estas columnas: son de antes de la corrección del
+# ETL, que cruzaba con Divipola sólo por código de municipio y repetía cada
+# conteo en todos los municipios con ese código (totales inflados)
+_NO_CONFIABLE = {
+    'MuertesPorMunicipio': CLAVE_MUNICIPIO,
+    'MuertesPorMunicipioTabla': CLAVE_MUNICIPIO,
+}
+
+# Columnas derivadas que comparten varias páginas; se calculan una sola vez
+_DERIVADAS = {
+    'MuertesPorMunicipio': _derivar_municipio,
+    'MuertesPorEdad': _derivar_edad,
+    'MuertesPorMunicipioTabla': _derivar_municipio,
+}
+
+
+def valor_municipio(cod_departamento, cod_municipio):
+    """
+    Valor de un municipio en los dropdowns: 'COD_DEPARTAMENTO-COD_MUNICIPIO'.
+    """
+    return f'{int(cod_departamento)}-{int(cod_municipio)}'
+
+
+def clave_municipio(valor):
+    """
+    (COD_DEPARTAMENTO, COD_MUNICIPIO) de un valor de valor_municipio(),
+    o None si el valor no tiene esa forma.
+    """
+    departamento, _, municipio = str(valor).partition('-')
+    if not (departamento.isdigit() and municipio.isdigit()):
+        return None
+    return int(departamento), int(municipio)
+
+
+def _leer_manifiesto(directorio):
+    # El ETL lo reemplaza de forma atómica: nunca se lee a medio escribir
+    ruta = os.path.join(directorio, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _anio_carpeta(carpeta):
+    # 'anio=2018' -> 2018; la raíz ('' o '.') -> ANIO_RAIZ; otra carpeta -> None
+    if carpeta in ('', '.'):
+        return ANIO_RAIZ
+    anio = carpeta[len(PREFIJO_PARTICION):]
+    return int(anio) if carpeta.startswith(PREFIJO_PARTICION) and anio.isdigit() else None
+
+
+def huellas(directorio=None):
+    """
+    Huella de cada partición de `directorio`: {anio: huella}, con la
+    clave None para los GLOBALES. Junta la versión de la partición en el
+    manifiesto del ETL con el nombre, tamaño y fecha de sus archivos de
+    datos: al recargar sólo se releen las particiones cuya huella cambió.
+    """
+    directorio = directorio or DIR_DATOS
+    carpetas = ['']
+    if os.path.isdir(directorio):
+        carpetas += sorted(e for e in os.listdir(directorio) if _anio_carpeta(e) is not None)
+    extensiones = tuple(FORMATOS.values())
+    partes = {}
+    for carpeta in carpetas:
+        ruta_carpeta = os.path.join(directorio, carpeta)
+        if not os.path.isdir(ruta_carpeta):
+            continue
+        for archivo in sorted(os.listdir(ruta_carpeta)):
+            nombre, extension = os.path.splitext(archivo)
+            if nombre in ESQUEMAS and extension in extensiones:
+                st = os.stat(os.path.join(ruta_carpeta, archivo))
+                clave = None if nombre in GLOBALES else _anio_carpeta(carpeta)
+                partes.setdefault(clave, []).append(
+                    f'{os.path.join(carpeta, archivo)}:{st.st_size}:{st.st_mtime_ns}')
+    manifiesto = _leer_manifiesto(directorio)
+    for carpeta, entrada in sorted(manifiesto.get('particiones', {}).items()):
+        anio = _anio_carpeta(carpeta)
+        if anio is not None:
+            partes.setdefault(anio, []).append(f'version:{entrada.get("version")}')
+    codigos = manifiesto.get('catalogos', {}).get('codigos')
+    if codigos:
+        partes.setdefault(None, []).append(f'codigos:{codigos.get("sha256")}')
+    return {clave: '\n'.join(lineas) for clave, lineas in partes.items()}
+
+
+def _firma(huellas_datos):
+    return '\n'.join(f'{clave}\n{huella}' for clave, huella in
+                     sorted(huellas_datos.items(), key=lambda item: (item[0] is not None, item[0] or 0)))
+
+
+def firma(directorio=None):
+    """
+    Huella de los datos procesados de `directorio`: la de todas sus
+    particiones (huellas()). Cambia con cada corrida del ETL o conversión
+    a binarios.
+    """
+    return _firma(huellas(directorio))
+
+
+class Version:
+    """
+    Una versión de los datos procesados: los datasets leídos y lo que se
+    calcula a partir de ellos (cubos, índices, layouts), en `estado`.
+    Cada petición fija la versión actual al empezar y la usa hasta
+    terminar; la versión reemplazada se libera cuando termina la última
+    petición que la usa.
+    """
+
+    def __init__(self, huellas_datos):
+        self.huellas = huellas_datos
+        self.firma = _firma(huellas_datos)
+        self.id = hashlib.sha1(self.firma.encode('utf-8')).hexdigest()[:12]
+        self.datasets = {}
+        self.origen = {}
+        self.no_confiables = set()
+        self.estado = {}
+        self.usos = 0
+        self.liberada = False
+        self.lock = threading.RLock()
+        self._lock_usos = threading.Lock()
+
+    def local(self, clave, crear):
+        """
+        Objeto `clave` de esta versión, creado con `crear()` la primera vez.
+        """
+        valor = self.estado.get(clave)
+        if valor is None:
+            with self.lock:
+                valor = self.estado.get(clave)
+                if valor is None:
+                    valor = self.estado[clave] = crear()
+        return valor
+
+    def liberar(self):
+        # Suelta las referencias: la memoria se recupera con la última vista en uso
+        self.liberada = True
+        self.datasets.clear()
+        self.origen.clear()
+        self.no_confiables.clear()
+        self.estado.clear()
+
+
+_actual = Version(huellas())
+_hilo = threading.local()
+_lock_recarga = threading.Lock()
+_lock_vigilante = threading.Lock()
+_calentadores = []
+_liberadores = []
+_vigilante = None
+
+
+def version():
+    """
+    Versión de los datos de este hilo: la que fijó su petición o, fuera
+    de una petición, la actual.
+    """
+    fijadas = getattr(_hilo, 'versiones', None)
+    return fijadas[-1] if fijadas else _actual
+
+
+def fijar(version_datos=None):
+    """
+    Fija en este hilo la versión actual (o `version_datos`, si todavía no
+    fue liberada) hasta el próximo soltar(). Se llama al empezar cada petición.
+    """
+    while True:
+        elegida = version_datos or _actual
+        with elegida._lock_usos:
+            if not elegida.liberada:
+                elegida.usos += 1
+                break
+        version_datos = None
+    if not hasattr(_hilo, 'versiones'):
+        _hilo.versiones = []
+    _hilo.versiones.append(elegida)
+    return elegida
+
+
+def _liberar_si_libre(version_datos):
+    with version_datos._lock_usos:
+        if version_datos is _actual or version_datos.usos or version_datos.liberada:
+            return
+        version_datos.liberar()
+    for liberar in list(_liberadores):
+        liberar(version_datos)
+
+
+def soltar():
+    """
+    Suelta la versión fijada por fijar(); si ya fue reemplazada y nadie
+    más la usa, se libera.
+    """
+    fijadas = getattr(_hilo, 'versiones', None)
+    if not fijadas:
+        return
+    soltada = fijadas.pop()
+    with soltada._lock_usos:
+        soltada.usos -= 1
+    _liberar_si_libre(soltada)
+
+
+@contextlib.contextmanager
+def usar(version_datos=None):
+    """
+    Contexto con `version_datos` (por defecto, la actual) fijada en este hilo.
+    """
+    fijada = fijar(version_datos)
+    try:
+        yield fijada
+    finally:
+        soltar()
+
+
+def por_version(maxsize=128):
+    """
+    Como functools.lru_cache, pero con una caché por versión de los
+    datos: lo calculado con una versión no se sirve con otra y se libera
+    junto con ella.
+    """
+    def decorador(func):
+        def cache():
+            return version().local(envoltura, lambda: functools.lru_cache(maxsize=maxsize)(func))
+
+        @functools.wraps(func)
+        def envoltura(*args):
+            return cache()(*args)
+        envoltura.cache_clear = lambda: cache().cache_clear()
+        envoltura.cache_info = lambda: cache().cache_info()
+        return envoltura
+    return decorador
+
+
+def al_recargar(funcion):
+    """
+    Registra `funcion(anterior)`, que se llama al armar cada versión nueva
+    (fijada en el hilo) antes de publicarla: p. ej. para construir los
+    cubos o layouts que la versión `anterior` ya tenía listos.
+    """
+    _calentadores.append(funcion)
+    return funcion
+
+
+def al_liberar(funcion):
+    """
+    Registra `funcion(liberada)`, que se llama cuando se libera una versión
+    reemplazada (ya no la usa ninguna petición): p. ej. para descartar lo
+    que se guardó fuera de ella con su id.
+    """
+    _liberadores.append(funcion)
+    return funcion
+
+
+def conservada(anterior, anio):
+    """
+    True si la partición `anio` (None = GLOBALES) no cambió entre la
+    versión `anterior` y la de este hilo: se reutiliza lo ya calculado.
+    """
+    huella = version().huellas.get(anio)
+    return huella is not None and huella == anterior.huellas.get(anio)
+
+
+def _anio_clave(clave):
+    # 'anio=2019/MuertesPorMes' -> 2019; 'CatalogoCIE10' -> None
+    particion_clave, _, _ = clave.rpartition('/')
+    return int(particion_clave[len(PREFIJO_PARTICION):]) if particion_clave else None
+
+
+def recargar(huellas_nuevas=None):
+    """
+    Arma en este hilo la versión nueva de los datos y la publica
+    reemplazando la referencia. De las particiones que no cambiaron
+    (conservada()) se reutilizan los datasets de la actual; de las que
+    cambiaron se releen los que tenía cargados. Después, los módulos
+    registrados con al_recargar preparan lo suyo. Las peticiones en curso
+    terminan con la anterior. Devuelve la versión nueva, o None si los
+    datos no cambiaron.
+    """
+    global _actual
+    with _lock_recarga:
+        huellas_nuevas = huellas_nuevas or huellas()
+        anterior = _actual
+        if _firma(huellas_nuevas) == anterior.firma:
+            return None
+        with usar(Version(huellas_nuevas)) as nueva:
+            disponibles = anios()
+            for clave, df in list(anterior.datasets.items()):
+                anio = _anio_clave(clave)
+                if conservada(anterior, anio):
+                    nueva.datasets[clave] = df
+                    nueva.origen[clave] = anterior.origen.get(clave)
+                    if clave in anterior.no_confiables:
+                        nueva.no_confiables.add(clave)
+                elif anio is None or anio in disponibles:
+                    obtener(clave.rpartition('/')[2], anio)
+            for calentar in list(_calentadores):
+                calentar(anterior)
+            _actual = nueva
+        _liberar_si_libre(anterior)
+        return nueva
+
+
+def _vigilar(intervalo):
+    vista = _actual.firma
+    while True:
+        time.sleep(intervalo)
+        try:
+            nuevas = huellas()
+            nueva = _firma(nuevas)
+            # Se recarga cuando la firma nueva se repite en dos revisiones
+            # seguidas: quien escribe los archivos ya terminó
+            if nueva != _actual.firma and nueva == vista:
+                inicio = time.perf_counter()
+                publicada = recargar(nuevas)
+                if publicada is not None:
+                    print(f'Datos recargados (versión {publicada.id}) en '
+                          f'{time.perf_counter() - inicio:.1f} s', file=sys.stderr)
+            vista = nueva
+        except Exception as error:  # el hilo no debe morir: se reintenta en la próxima vuelta
+            print(f'Error al recargar los datos: {error!r}', file=sys.stderr)
+
+
+def vigilar(intervalo=None):
+    """
+    Lanza (una sola vez por proceso) el hilo que revisa DIR_DATOS cada
+    `intervalo` segundos (INTERVALO_RECARGA) y recarga los datos si cambian.
+    """
+    global _vigilante
+    intervalo = INTERVALO_RECARGA if intervalo is None else intervalo
+    if intervalo <= 0 or _vigilante == os.getpid():
+        return
+    with _lock_vigilante:
+        if _vigilante == os.getpid():
+            return
+        # Por pid: tras el fork de gunicorn cada worker lanza el suyo
+        _vigilante = os.getpid()
+        threading.Thread(target=_vigilar, args=(intervalo,), name='vigilar-datos', daemon=True).start()
+
+
+def _ruta(nombre, formato, directorio=None):
+    return os.path.join(directorio or DIR_DATOS, nombre + FORMATOS[formato])
+
+
+def _esquema(nombre, df):
+    return {c: t for c, t in ESQUEMAS.get(nombre, {}).items() if c in df.columns}
+
+
+def _leer_csv(nombre, directorio=None):
+    return pd.read_csv(_ruta(nombre, 'csv', directorio), sep=';',
+                       encoding='utf-8-sig', dtype=ESQUEMAS.get(nombre))
+
+
+def _leer_tabla(nombre, directorio=None):
+    """
+    DataFrame con las columnas del archivo `nombre` en el primer formato
+    disponible, y el formato usado.
+    """
+    if feather is not None:
+        ruta = _ruta(nombre, 'feather', directorio)
+        if os.path.exists(ruta):
+            # Sin compresión y mapeado en memoria: las columnas numéricas
+            # apuntan a las páginas del archivo, compartidas entre procesos
+            tabla = feather.read_table(ruta, memory_map=True)
+            return tabla.to_pandas(split_blocks=True), 'feather'
+        ruta = _ruta(nombre, 'parquet', directorio)
+        if os.path.exists(ruta):
+            return pd.read_parquet(ruta, engine='pyarrow'), 'parquet'
+    return _leer_csv(nombre, directorio), 'csv'
+
+
+def _leer(nombre, directorio=None, clave=None):
+    """
+    Lee el archivo procesado `nombre` con su esquema compacto y
+    calcula las columnas derivadas.
+    """
+    df, formato = _leer_tabla(nombre, directorio)
+    if formato != 'csv':
+        # Los binarios ya traen el esquema; esto sólo corrige archivos viejos
+        df = df.astype(_esquema(nombre, df))
+    version().origen[clave or nombre] = formato
+    faltan = [c for c in _NO_CONFIABLE.get(nombre, ()) if c not in df.columns]
+    if faltan:
+        version().no_confiables.add(clave or nombre)
+        print(f'Aviso: {clave or nombre} no tiene {faltan}; sus totales no son confiables. '
+              f'Regenérelo con python -m datos.etl', file=sys.stderr)
+    derivar = _DERIVADAS.get(nombre)
+    if derivar:
+        derivar(df)
+    return df
+
+
+@por_version(maxsize=None)
+def _anios(directorio):
+    encontrados = set()
+    if os.path.isdir(directorio):
+        for entrada in os.listdir(directorio):
+            anio = entrada[len(PREFIJO_PARTICION):]
+            if (entrada.startswith(PREFIJO_PARTICION) and anio.isdigit()
+                    and os.path.isdir(os.path.join(directorio, entrada))):
+                encontrados.add(int(anio))
+    sueltos = [n for n in ESQUEMAS if n not in GLOBALES]
+    if any(os.path.exists(_ruta(n, f, directorio)) for n in sueltos for f in FORMATOS):
+        encontrados.add(ANIO_RAIZ)
+    return tuple(sorted(encontrados))
+
+
+def anios(directorio=None):
+    """
+    Años con datos procesados, de menor a mayor: uno por carpeta anio=AAAA
+    y ANIO_RAIZ si hay archivos por año sueltos en la raíz.
+    """
+    return _anios(directorio or DIR_DATOS)
+
+
+def anios_defecto():
+    """
+    Selección inicial del selector de años: el año más reciente.
+    """
+    return anios()[-1:]
+
+
+def seleccion_anios(valor=None):
+    """
+    Tupla ordenada de años disponibles para el valor del selector global
+    (un año o una lista). Vacío equivale a todos los años; los años que
+    no existen se ignoran.
+    """
+    disponibles = anios()
+    if valor in (None, '', []):
+        return disponibles
+    pedidos = {int(v) for v in (valor if isinstance(valor, (list, tuple)) else [valor])}
+    return tuple(a for a in disponibles if a in pedidos) or disponibles
+
+
+def texto_anios(valor=None):
+    """
+    Años de la selección para títulos: '2019', '2015-2019' o '2015, 2017'.
+    """
+    seleccion = seleccion_anios(valor)
+    if len(seleccion) > 2 and seleccion[-1] - seleccion[0] == len(seleccion) - 1:
+        return f'{seleccion[0]}-{seleccion[-1]}'
+    return ', '.join(str(a) for a in seleccion)
+
+
+def particion(anio, directorio=None):
+    """
+    Carpeta de la partición del año `anio` (exista o no).
+    """
+    return os.path.join(directorio or DIR_DATOS, f'{PREFIJO_PARTICION}{anio}')
+
+
+def directorio_anio(anio, directorio=None):
+    """
+    Carpeta con los archivos del año `anio`: su partición o, para
+    ANIO_RAIZ sin carpeta propia, la raíz de los datos.
+    """
+    directorio = directorio or DIR_DATOS
+    carpeta = particion(anio, directorio)
+    if anio == ANIO_RAIZ and not os.path.isdir(carpeta):
+        return directorio
+    return carpeta
+
+
+def obtener(nombre, anio=None):
+    """
+    Devuelve una vista de solo lectura del dataset `nombre`
+    (p. ej. 'MuertesPorMes') del año `anio` (el más reciente por
+    defecto; se ignora en los GLOBALES). Cada partición se lee la primera
+    vez que se pide y queda compartida por todas las páginas del proceso
+    (en la versión de los datos de la petición).
+    """
+    if nombre in GLOBALES:
+        clave, directorio = nombre, None
+    else:
+        anio = int(anio) if anio is not None else anios()[-1]
+        clave, directorio = f'{PREFIJO_PARTICION}{anio}/{nombre}', directorio_anio(anio)
+    datos = version()
+    df = datos.datasets.get(clave)
+    if df is None:
+        with datos.lock:
+            df = datos.datasets.get(clave)
+            if df is None:
+                with metricas.fase('carga'):
+                    df = _leer(nombre, directorio, clave)
+                datos.datasets[clave] = df
+    # Copia superficial: con copy-on-write no duplica memoria
+    return df.copy(deep=False)
+
+
+def confiable(nombre, anios_sel=None):
+    """
+    False si el dataset `nombre` de alguno de los años de `anios_sel`
+    (valor del selector) viene de un ETL anterior a la corrección de los
+    cruces (_NO_CONFIABLE): las páginas muestran un aviso en vez de sus
+    totales. Lee los años que todavía no estén cargados.
+    """
+    if nombre not in _NO_CONFIABLE:
+        return True
+    for anio in seleccion_anios(anios_sel):
+        obtener(nombre, anio)
+        if f'{PREFIJO_PARTICION}{anio}/{nombre}' in version().no_confiables:
+            return False
+    return True
+
+
+def concatenar(partes):
+    """
+    Une tablas con las mismas columnas (p. ej. un año cada una). Las
+    categóricas con categorías distintas se llevan a la unión, para que
+    el resultado siga siendo categórico.
+    """
+    partes = list(partes)
+    if len(partes) == 1:
+        return partes[0]
+    for columna in partes[0].columns:
+        tipos = [p[columna].dtype for p in partes]
+        if (all(isinstance(t, pd.CategoricalDtype) for t in tipos)
+                and any(t != tipos[0] for t in tipos) and not tipos[0].ordered):
+            categorias = pd.Index(sorted(set().union(*(t.categories for t in tipos)), key=str))
+            partes = [p.assign(**{columna: p[columna].cat.set_categories(categorias)}) for p in partes]
+    return pd.concat(partes, ignore_index=True)
+
+
+def precargar(nombres=None, anios_sel=None):
+    """
+    Carga por adelantado los datasets indicados (todos por defecto) de
+    los años `anios_sel` (por defecto, la selección inicial).
+    """
+    for anio in anios_sel or anios_defecto():
+        for nombre in nombres or ESQUEMAS:
+            obtener(nombre, anio)
+
+
+def memoria_bytes():
+    """
+    Bytes ocupados por los datasets cargados, por nombre (con su año).
+    """
+    return {n: int(df.memory_usage(deep=True).sum()) for n, df in list(version().datasets.items())}
+
+
+def formatos_cargados():
+    """
+    Formato del que se leyó cada dataset cargado ('feather', 'parquet' o 'csv'),
+    por nombre (con su año).
+    """
+    return dict(version().origen)
+
+
+def escribir(df, nombre, directorio=None, formatos=('csv',)):
+    """
+    Escribe `df` como `nombre` en cada uno de `formatos`. En los binarios
+    se aplica el esquema de ESQUEMAS (o categorías para las cadenas si el
+    dataset no tiene esquema), así las cadenas quedan con diccionario.
+    La escritura es atómica: un proceso que tenga mapeado el archivo
+    anterior lo sigue leyendo sin cambios.
+    """
+    directorio = directorio or DIR_DATOS
+    os.makedirs(directorio, exist_ok=True)
+    for formato in formatos:
+        if formato != 'csv' and pa is None:
+            raise RuntimeError(f'El formato {formato} requiere pyarrow')
+        fd, tmp = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+        os.close(fd)
+        if formato == 'csv':
+            df.to_csv(tmp, sep=';', index=False)
+        else:
+            esquema = _esquema(nombre, df) or {c: _CAT for c in df.columns if df[c].dtype == object}
+            tabla = pa.Table.from_pandas(df.astype(esquema), preserve_index=False)
+            if formato == 'feather':
+                feather.write_feather(tabla, tmp, compression='uncompressed')
+            else:
+                import pyarrow.parquet as pq
+                pq.write_table(tabla, tmp)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, _ruta(nombre, formato, directorio))
+
+
+def convertir(nombres=None, formatos=('feather',), directorio=None):
+    """
+    Genera los binarios de `formatos` a partir de los CSV procesados, en
+    la raíz y en la carpeta de cada año.
+    """
+    directorio = directorio or DIR_DATOS
+    carpetas = [directorio] + [directorio_anio(a, directorio) for a in anios(directorio)]
+    for carpeta in dict.fromkeys(carpetas):
+        for nombre in nombres or ESQUEMAS:
+            if os.path.exists(_ruta(nombre, 'csv', carpeta)):
+                escribir(_leer_csv(nombre, carpeta), nombre, carpeta, formatos)
+                print(f'{os.path.relpath(os.path.join(carpeta, nombre), directorio)}: {", ".join(formatos)}')
+
+
+if __name__ == '__main__':
+    convertir()
@@ -0,0 +1,147 @@
+# ------------------------------------------------------------------
+# Archivo: datos/busqueda.py
+# Descripción: Búsqueda aproximada para los dropdowns con opciones
+#              dinámicas (search_value). Los textos se normalizan (sin
+#              tildes, minúsculas: "MEDELLÍN" -> "medellin") y se indexan
+#              una sola vez por trigramas y por prefijo de palabra; cada
+#              búsqueda sólo recorre las listas de los trigramas del texto
+#              escrito, no todas las opciones.
+# ------------------------------------------------------------------
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+from datos import metricas
+
+# Opciones que se devuelven por búsqueda
+LIMITE = 20
+# Similitud mínima (Jaccard de trigramas) entre una palabra escrita y una
+# del índice para aceptarla como aproximada ("medelin" ~ "medellin")
+SIMILITUD_MINIMA = 0.45
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """
+    Minúsculas, sin tildes y con un solo espacio entre palabras.
+    """
+    sin_tildes = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(_NO_ALFANUMERICO.sub(' ', sin_tildes.lower()).split())
+
+
+def _trigramas(palabra):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+class IndiceTexto:
+    """
+    Índice de búsqueda sobre `etiquetas` (lo que se muestra) con su
+    `valores` (lo que se selecciona) y, opcionalmente, `pesos` para
+    ordenar los empates (p. ej. número de muertes). Se indexa el
+    vocabulario: trigrama -> palabras y palabra -> entradas.
+    """
+
+    def __init__(self, etiquetas, valores, pesos=None):
+        self.etiquetas = list(etiquetas)
+        self.valores = list(valores)
+        self.textos = [normalizar(e) for e in self.etiquetas]
+        pesos = np.zeros(len(self.textos)) if pesos is None else np.asarray(pesos, dtype='float64')
+        # Orden por defecto (búsqueda vacía y desempates): más peso primero
+        self.por_peso = np.lexsort((np.arange(len(pesos)), -pesos))
+        self.rango_peso = np.empty(len(pesos), dtype='int64')
+        self.rango_peso[self.por_peso] = np.arange(len(pesos))
+
+        entradas = {}
+        for i, texto in enumerate(self.textos):
+            for palabra in set(texto.split()):
+                entradas.setdefault(palabra, []).append(i)
+        # Vocabulario ordenado: los prefijos son rangos contiguos
+        self.palabras = sorted(entradas)
+        self.entradas = [np.array(entradas[p], dtype='int32') for p in self.palabras]
+        self.n_trigramas = np.array([len(_trigramas(p)) for p in self.palabras], dtype='int32')
+        listas = {}
+        for k, palabra in enumerate(self.palabras):
+            for trigrama in _trigramas(palabra):
+                listas.setdefault(trigrama, []).append(k)
+        self.trigramas = {t: np.array(ks, dtype='int32') for t, ks in listas.items()}
+
+    def __len__(self):
+        return len(self.textos)
+
+    def _palabras(self, escrita):
+        """
+        Palabras del vocabulario que contienen `escrita` y las parecidas
+        (sólo para palabras de 3 letras o más; las cortas, por prefijo).
+        """
+        trigramas = _trigramas(escrita)
+        if not trigramas:
+            inicio = bisect.bisect_left(self.palabras, escrita)
+            fin = bisect.bisect_left(self.palabras, escrita + '\x7f')
+            return list(range(inicio, fin)), []
+        listas = [self.trigramas[t] for t in trigramas if t in self.trigramas]
+        if not listas:
+            return [], []
+        ks, comunes = np.unique(np.concatenate(listas), return_counts=True)
+        completas = comunes == len(trigramas)
+        contienen = [int(k) for k in ks[completas] if escrita in self.palabras[k]]
+        similitud = comunes / (len(trigramas) + self.n_trigramas[ks] - comunes)
+        parecidas = [int(k) for k in ks[(similitud >= SIMILITUD_MINIMA) & ~completas]]
+        return contienen, parecidas
+
+    def _entradas(self, ks):
+        if not ks:
+            return np.empty(0, dtype='int32')
+        return np.unique(np.concatenate([self.entradas[k] for k in ks]))
+
+    @metricas.fase('busqueda')
+    def buscar(self, consulta, limite=LIMITE):
+        """
+        Posiciones de las entradas que mejor coinciden con `consulta`:
+        primero las que contienen todas las palabras escritas (las que
+        empiezan igual antes), luego las que las contienen o tienen una
+        parecida (errores de tipeo). Sin texto, las de más peso.
+        """
+        consulta = normalizar(consulta or '')
+        if not consulta:
+            return self.por_peso[:limite].tolist()
+
+        exactas = aproximadas = None
+        for escrita in consulta.split():
+            contienen, parecidas = self._palabras(escrita)
+            con = self._entradas(contienen)
+            todas = np.union1d(con, self._entradas(parecidas))
+            exactas = con if exactas is None else np.intersect1d(exactas, con, assume_unique=True)
+            aproximadas = todas if aproximadas is None else np.intersect1d(aproximadas, todas, assume_unique=True)
+
+        exactas = sorted(exactas.tolist(),
+                         key=lambda i: (not self.textos[i].startswith(consulta), self.rango_peso[i]))
+        resultados = exactas[:limite]
+        if len(resultados) < limite:
+            resto = np.setdiff1d(aproximadas, exactas, assume_unique=True)
+            resultados += resto[np.argsort(self.rango_peso[resto])][:limite - len(resultados)].tolist()
+        return resultados
+
+    def opciones(self, consulta, seleccion=None, limite=LIMITE):
+        """
+        Opciones de dcc.Dropdown para `consulta`, con la opción ya
+        seleccionada siempre presente. El campo `search` incluye el texto
+        escrito para que el filtro del navegador no oculte los resultados
+        aproximados ni los que difieren sólo en tildes.
+        """
+        extra = f' {consulta}' if consulta else ''
+        opciones = [
+            {'label': self.etiquetas[i], 'value': self.valores[i], 'search': self.textos[i] + extra}
+            for i in self.buscar(consulta, limite)
+        ]
+        seleccionados = [] if seleccion in (None, '', []) else (
+            seleccion if isinstance(seleccion, list) else [seleccion])
+        presentes = {o['value'] for o in opciones}
+        for valor in seleccionados:
+            if valor not in presentes and valor in self.valores:
+                i = self.valores.index(valor)
+                opciones.insert(0, {'label': self.etiquetas[i], 'value': valor,
+                                    'search': self.textos[i] + extra})
+        return opciones
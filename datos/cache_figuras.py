@@ -0,0 +1,298 @@
+# ------------------------------------------------------------------
+# Archivo: datos/cache_figuras.py
+# Descripción: Caché de figuras ya construidas, con clave (versión de
+#              los datos, id del callback, valores de los filtros): tras
+#              recargar los datos no se sirve una figura de la versión
+#              anterior.
+#              LRU en memoria de figuras ya decodificadas (un acierto es
+#              sólo una búsqueda), con presupuesto en bytes de su JSON y,
+#              opcionalmente, un directorio compartido entre workers
+#              (disco o /dev/shm) con el JSON.
+# ------------------------------------------------------------------
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from datos import almacen, metricas
+
+# Presupuestos (MB) y directorio compartido opcional
+MAX_BYTES_MEMORIA = int(os.environ.get('CACHE_FIGURAS_MB', '128')) * 2**20
+MAX_BYTES_DISCO = int(os.environ.get('CACHE_FIGURAS_DISCO_MB', '512')) * 2**20
+DIR_COMPARTIDO = os.environ.get('CACHE_FIGURAS_DIR')
+
+
+class _Contadores:
+    """
+    Aciertos, fallos y desalojos, en total y por callback.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.por_callback = {}
+
+    def sumar(self, id_callback, evento, n=1):
+        with self._lock:
+            c = self.por_callback.setdefault(
+                id_callback, {'aciertos': 0, 'fallos': 0, 'desalojos': 0})
+            c[evento] += n
+
+    def resumen(self):
+        with self._lock:
+            total = {'aciertos': 0, 'fallos': 0, 'desalojos': 0}
+            for c in self.por_callback.values():
+                for k, v in c.items():
+                    total[k] += v
+            return {'total': total, 'por_callback': {k: dict(v) for k, v in self.por_callback.items()}}
+
+
+class CacheLRU:
+    """
+    LRU en memoria de figuras (dict), limitado por el tamaño total en
+    bytes de su JSON.
+    """
+
+    def __init__(self, max_bytes, contadores):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self._contadores = contadores
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is not None:
+                self._datos.move_to_end(clave)
+                return entrada[2]
+        return None
+
+    def guardar(self, clave, id_callback, figura, tam):
+        if tam > self.max_bytes:
+            return
+        with self._lock:
+            anterior = self._datos.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= anterior[1]
+            self._datos[clave] = (id_callback, tam, figura)
+            self.bytes += tam
+            while self.bytes > self.max_bytes:
+                _, (id_desalojado, tam_viejo, _) = self._datos.popitem(last=False)
+                self.bytes -= tam_viejo
+                self._contadores.sumar(id_desalojado, 'desalojos')
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+            self.bytes = 0
+
+    def descartar(self, prefijo):
+        """
+        Quita las entradas cuya clave empieza por `prefijo`.
+        """
+        with self._lock:
+            for clave in [c for c in self._datos if c.startswith(prefijo)]:
+                self.bytes -= self._datos.pop(clave)[1]
+
+
+class CacheDisco:
+    """
+    Caché compartida entre procesos: un archivo por entrada en `directorio`.
+    La escritura es atómica (archivo temporal + rename) y el orden LRU se
+    aproxima con la fecha de modificación, que se renueva en cada acierto.
+    """
+
+    def __init__(self, directorio, max_bytes, contadores):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        os.makedirs(directorio, exist_ok=True)
+        self._contadores = contadores
+        self._lock = threading.Lock()
+        self._escritos = 0
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, hashlib.sha1(clave.encode('utf-8')).hexdigest() + '.json')
+
+    def obtener(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                payload = f.read()
+            os.utime(ruta)
+            return payload
+        except OSError:
+            return None
+
+    def guardar(self, clave, id_callback, payload):
+        fd, tmp = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp, self._ruta(clave))
+        with self._lock:
+            self._escritos += len(payload)
+            revisar = self._escritos > self.max_bytes // 10
+            if revisar:
+                self._escritos = 0
+        if revisar:
+            self._desalojar()
+
+    def _desalojar(self):
+        # Elimina los archivos menos usados hasta quedar bajo el 90 % del presupuesto
+        entradas = []
+        for nombre in os.listdir(self.directorio):
+            if not nombre.endswith('.json'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.directorio, nombre))
+            except OSError:
+                continue
+            entradas.append((st.st_mtime, st.st_size, nombre))
+        total = sum(e[1] for e in entradas)
+        for _, tam, nombre in sorted(entradas):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(os.path.join(self.directorio, nombre))
+                total -= tam
+                self._contadores.sumar('disco', 'desalojos')
+            except OSError:
+                pass
+
+    def limpiar(self):
+        for nombre in os.listdir(self.directorio):
+            if nombre.endswith('.json'):
+                try:
+                    os.remove(os.path.join(self.directorio, nombre))
+                except OSError:
+                    pass
+
+
+contadores = _Contadores()
+memoria = CacheLRU(MAX_BYTES_MEMORIA, contadores)
+disco = CacheDisco(DIR_COMPARTIDO, MAX_BYTES_DISCO, contadores) if DIR_COMPARTIDO else None
+
+
+def _clave(id_callback, valores, version=None):
+    # El último valor es siempre la selección de años: se normaliza para
+    # que [2019, 2018], [2018, 2019], [] y None no sean entradas distintas
+    # de la misma figura
+    version = version or almacen.version().id
+    *filtros, anios_sel = valores
+    anios_sel = sorted(almacen.seleccion_anios(anios_sel))
+    return json.dumps([version, id_callback, *filtros, anios_sel], default=str, ensure_ascii=False)
+
+
+@almacen.al_liberar
+def _descartar_version(liberada):
+    # Ninguna petición usa ya la versión: sus figuras no se vuelven a pedir
+    # ni a guardar y se libera su memoria (al reemplazarla, las peticiones
+    # que la tenían fijada todavía guardaban figuras con su id). Las de la
+    # caché compartida salen por antigüedad
+    memoria.descartar(json.dumps([liberada.id])[:-1])
+
+
+def _buscar(clave, id_callback):
+    # Memoria y, si no está, la caché compartida (se decodifica una sola
+    # vez y se copia a memoria)
+    figura = memoria.obtener(clave)
+    if figura is None and disco is not None:
+        payload = disco.obtener(clave)
+        if payload is not None:
+            with metricas.fase('serializacion'):
+                figura = json.loads(payload)
+            memoria.guardar(clave, id_callback, figura, len(payload))
+    return figura
+
+
+def _guardar(clave, id_callback, figura):
+    # Se guarda el dict que sale del JSON (sólo tipos de JSON, como lo que
+    # llega de la caché compartida), no el objeto Figure
+    with metricas.fase('serializacion'):
+        payload = pio.to_json(figura, validate=False)
+        figura = json.loads(payload)
+    memoria.guardar(clave, id_callback, figura, len(payload))
+    if disco is not None:
+        disco.guardar(clave, id_callback, payload)
+    return figura
+
+
+def obtener_o_construir(id_callback, valores, construir):
+    """
+    Devuelve la figura (dict) para `valores`. Si no está en caché llama a
+    `construir()`, serializa el resultado y lo guarda. El último de
+    `valores` es la selección de años. El dict se comparte entre
+    peticiones: no se debe modificar.
+    """
+    clave = _clave(id_callback, valores)
+    figura = _buscar(clave, id_callback)
+    if figura is None:
+        contadores.sumar(id_callback, 'fallos')
+        metricas.resultado_cache('fallo')
+        with metricas.fase('figura'):
+            construida = construir()
+        figura = _guardar(clave, id_callback, construida)
+    else:
+        contadores.sumar(id_callback, 'aciertos')
+        metricas.resultado_cache('acierto')
+    return figura
+
+
+def obtener_o_construir_varias(ids_callback, valores, construir):
+    """
+    Como obtener_o_construir, para figuras que salen de un mismo cálculo:
+    devuelve la lista de figuras de `ids_callback` para `valores`. Si falta
+    alguna, `construir()` devuelve todas (en ese orden) y se guardan todas.
+    """
+    claves = [_clave(i, valores) for i in ids_callback]
+    figuras = [_buscar(c, i) for c, i in zip(claves, ids_callback)]
+    if any(f is None for f in figuras):
+        for i in ids_callback:
+            contadores.sumar(i, 'fallos')
+        metricas.resultado_cache('fallo')
+        with metricas.fase('figura'):
+            construidas = construir()
+        figuras = [_guardar(c, i, f) for c, i, f in zip(claves, ids_callback, construidas)]
+    else:
+        for i in ids_callback:
+            contadores.sumar(i, 'aciertos')
+        metricas.resultado_cache('acierto')
+    return figuras
+
+
+def memoizar(id_callback):
+    """
+    Decorador para callbacks que devuelven una figura: los argumentos
+    (valores de los filtros, con la selección de años al final) forman la
+    clave de la caché.
+    """
+    def decorador(func):
+        @functools.wraps(func)
+        def envoltura(*valores):
+            return obtener_o_construir(id_callback, valores, lambda: func(*valores))
+        return envoltura
+    return decorador
+
+
+def limpiar():
+    """
+    Vacía la caché en memoria y, si existe, la compartida.
+    """
+    memoria.limpiar()
+    if disco is not None:
+        disco.limpiar()
+
+
+def estadisticas():
+    """
+    Contadores de aciertos/fallos/desalojos y ocupación de la caché.
+    """
+    resumen = contadores.resumen()
+    resumen['bytes_memoria'] = memoria.bytes
+    resumen['entradas_memoria'] = len(memoria._datos)
+    resumen['compartida'] = DIR_COMPARTIDO
+    return resumen
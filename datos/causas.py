@@ -0,0 +1,364 @@
+# ------------------------------------------------------------------
+# Archivo: datos/causas.py
+# Descripción: Índice de las causas de muerte CIE-10 para la tabla con
+#              paginado, orden y filtro en el servidor. El catálogo se
+#              ordena una sola vez al construir el índice; para cada
+#              combinación de filtros se guardan las muertes por causa y,
+#              para cada orden y consulta, las posiciones ya ordenadas,
+#              de modo que cambiar de página sólo copia las filas pedidas.
+#              También el árbol capítulo -> tres -> cuatro caracteres del
+#              explorador, indexado por código padre. Todo se calcula
+#              para una selección de años y sólo lee esas particiones.
+# ------------------------------------------------------------------
+import re
+
+import numpy as np
+import pandas as pd
+
+from datos import almacen, busqueda, metricas
+
+COLUMNAS = ('COD_MUERTE', 'Descripcion', 'Muertes')
+# Orden inicial de la tabla: más muertes primero (la primera página es el top)
+ORDEN_DEFECTO = (('Muertes', 'desc'),)
+
+_COD4 = 'Código de la CIE-10 cuatro caracteres'
+_DESC4 = 'Descripcion  de códigos mortalidad a cuatro caracteres'
+_COD3 = 'Código de la CIE-10 tres caracteres'
+_DESC3 = 'Descripción  de códigos mortalidad a tres caracteres'
+
+# Una condición de filter_query de DataTable: {columna} operador valor
+_CONDICION = re.compile(
+    r'^\{(?P<columna>[^}]+)\}\s+'
+    r'(?P<operador>[is]?(?:contains|datestartswith|eq|ne|ge|gt|le|lt|<=|>=|!=|<|>|=))\s+'
+    r'(?P<valor>.+)$'
+)
+_RELACIONALES = {
+    'eq': '=', 'ne': '!=', 'ge': '>=', 'gt': '>', 'le': '<=', 'lt': '<',
+}
+
+
+def _rango(valores):
+    # Posición de cada fila en el orden ascendente de `valores`
+    orden = np.argsort(valores, kind='stable')
+    rango = np.empty(len(valores), dtype='int32')
+    rango[orden] = np.arange(len(valores), dtype='int32')
+    return rango
+
+
+def _categorias(anio):
+    # Códigos de causa presentes en la tabla del año (sin espacios)
+    tabla = almacen.obtener('MuertesPorMunicipioTabla', anio)
+    return pd.Index(tabla['COD_MUERTE'].cat.categories.astype(str).str.strip())
+
+
+class _Indice:
+    """
+    Una fila por código CIE-10: los del catálogo más los que aparecen en
+    los datos de `anios` sin subdivisión de cuatro caracteres (p. ej. I99),
+    que toman la descripción de tres caracteres.
+    """
+
+    def __init__(self, anios):
+        catalogo = almacen.obtener('CatalogoCIE10')
+        en_datos = {anio: _categorias(anio) for anio in anios}
+
+        todos = pd.Index(np.concatenate([c.to_numpy(object) for c in en_datos.values()]))
+        faltantes = todos[~todos.isin(catalogo[_COD4])].unique()
+        tres = catalogo.drop_duplicates(_COD3).set_index(_COD3)[_DESC3].astype(str)
+
+        self.codigos = np.concatenate([catalogo[_COD4].to_numpy(object), faltantes.to_numpy(object)])
+        self.descripciones = np.concatenate([
+            catalogo[_DESC4].to_numpy(object),
+            tres.reindex(faltantes).fillna('').to_numpy(object),
+        ])
+        # Para las condiciones sin distinción de mayúsculas (ni de tildes)
+        self.normalizados = {
+            'COD_MUERTE': np.array([busqueda.normalizar(c) for c in self.codigos], dtype=object),
+            'Descripcion': np.array([busqueda.normalizar(d) for d in self.descripciones], dtype=object),
+        }
+        # Por año: código de categoría de COD_MUERTE en su tabla -> fila del índice
+        self.posicion = {anio: pd.Index(self.codigos).get_indexer(c) for anio, c in en_datos.items()}
+        # Orden precalculado de las columnas de texto
+        self.rangos = {
+            'COD_MUERTE': _rango(self.codigos),
+            'Descripcion': _rango(self.descripciones),
+        }
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def texto(self, columna):
+        return self.codigos if columna == 'COD_MUERTE' else self.descripciones
+
+
+@almacen.por_version(maxsize=8)
+def _indice(anios):
+    return _Indice(anios)
+
+
+@almacen.por_version(maxsize=256)
+def _muertes(anios, mes, sexo, municipio):
+    """
+    Muertes por fila del índice para una combinación de filtros
+    (la suma de los años de `anios`).
+    """
+    indice = _indice(anios)
+    total = np.zeros(len(indice), dtype='int64')
+    for anio in anios:
+        df = almacen.obtener('MuertesPorMunicipioTabla', anio)
+        codigos = df['COD_MUERTE'].cat.codes.to_numpy()
+        mascara = codigos >= 0
+        for columna, valor in (('mes_nombre', mes), ('SEXO', sexo)):
+            if valor is not None:
+                mascara &= (df[columna] == valor).to_numpy()
+        if municipio is not None:
+            # Valor del dropdown: departamento + municipio (almacen.valor_municipio)
+            # (sin esas columnas el archivo no es confiable: almacen.confiable)
+            clave = almacen.clave_municipio(municipio)
+            if clave is None or any(c not in df.columns for c in almacen.CLAVE_MUNICIPIO):
+                mascara[:] = False
+            else:
+                for columna, codigo in zip(almacen.CLAVE_MUNICIPIO, clave):
+                    mascara &= df[columna].to_numpy() == codigo
+        filas = indice.posicion[anio][codigos[mascara]]
+        pesos = df['Muertes'].to_numpy()[mascara]
+        total += np.bincount(filas, weights=pesos, minlength=len(indice)).astype('int64')
+    return total
+
+
+def _valor(texto):
+    texto = texto.strip()
+    if len(texto) >= 2 and texto[0] == texto[-1] and texto[0] in '"\'`':
+        return texto[1:-1]
+    return texto
+
+
+def _condiciones(consulta):
+    """
+    Separa un filter_query de DataTable en (columna, operador, valor,
+    sensible a mayúsculas). Las condiciones que no se entienden se ignoran.
+    """
+    condiciones = []
+    for parte in consulta.split(' && '):
+        coincidencia = _CONDICION.match(parte.strip())
+        if not coincidencia or coincidencia['columna'] not in COLUMNAS:
+            continue
+        operador = coincidencia['operador']
+        # Prefijo i/s: sin o con distinción de mayúsculas
+        sensible = operador[0] != 'i'
+        if operador[0] in 'is':
+            operador = operador[1:]
+        operador = _RELACIONALES.get(operador, operador)
+        condiciones.append((coincidencia['columna'], operador, _valor(coincidencia['valor']), sensible))
+    return condiciones
+
+
+def _comparar(valores, operador, valor):
+    if operador == 'contains':
+        return np.fromiter((valor in v for v in valores), dtype=bool, count=len(valores))
+    if operador == 'datestartswith':
+        return np.fromiter((v.startswith(valor) for v in valores), dtype=bool, count=len(valores))
+    return {
+        '=': valores == valor, '!=': valores != valor,
+        '<': valores < valor, '<=': valores <= valor,
+        '>': valores > valor, '>=': valores >= valor,
+    }[operador]
+
+
+@almacen.por_version(maxsize=256)
+def _mascara_texto(anios, columna, operador, valor, sensible):
+    indice = _indice(anios)
+    if sensible:
+        return _comparar(indice.texto(columna), operador, valor)
+    return _comparar(indice.normalizados[columna], operador, busqueda.normalizar(valor))
+
+
+def _mascara(filtros, consulta):
+    """
+    Filas del índice que cumplen `consulta`, o None si no filtra nada.
+    """
+    mascara = None
+    for columna, operador, valor, sensible in _condiciones(consulta):
+        if columna == 'Muertes':
+            try:
+                numero = float(valor)
+            except ValueError:
+                continue
+            if operador in ('contains', 'datestartswith'):
+                operador = '='
+            parcial = _comparar(_muertes(*filtros), operador, numero)
+        else:
+            parcial = _mascara_texto(filtros[0], columna, operador, valor, sensible)
+        mascara = parcial if mascara is None else mascara & parcial
+    return mascara
+
+
+@almacen.por_version(maxsize=256)
+def _orden(filtros, orden, consulta):
+    """
+    Posiciones del índice ordenadas según `orden` (columna, dirección) y
+    filtradas por `consulta`. Es lo único que cuesta O(n log n) y se hace
+    una vez por combinación; el empate se rompe por código.
+    """
+    indice = _indice(filtros[0])
+    claves = []
+    for columna, direccion in orden or ORDEN_DEFECTO:
+        valores = _muertes(*filtros) if columna == 'Muertes' else indice.rangos[columna]
+        claves.append(-valores if direccion == 'desc' else valores)
+    claves.append(indice.rangos['COD_MUERTE'])
+    # np.lexsort ordena por la última clave primero
+    posiciones = np.lexsort(claves[::-1])
+    mascara = _mascara(filtros, consulta)
+    if mascara is not None:
+        posiciones = posiciones[mascara[posiciones]]
+    return posiciones
+
+
+def _filtro(valor):
+    return valor if valor not in (None, '') else None
+
+
+@metricas.fase('filtrado')
+def pagina(mes=None, sexo=None, municipio=None, numero=0, tamano=10, orden=None, consulta='', anios=None):
+    """
+    Registros de la página `numero` (desde 0) y número total de páginas,
+    para los filtros, el `sort_by` y el `filter_query` de la tabla y los
+    años `anios` (valor del selector; vacío = todos).
+    """
+    filtros = (almacen.seleccion_anios(anios), _filtro(mes), _filtro(sexo), _filtro(municipio))
+    orden = tuple((o['column_id'], o['direction']) for o in orden or ()
+                  if o.get('column_id') in COLUMNAS)
+    posiciones = _orden(filtros, orden, (consulta or '').strip())
+    paginas = max(1, -(-len(posiciones) // tamano))
+    numero = min(max(numero or 0, 0), paginas - 1)
+
+    indice = _indice(filtros[0])
+    filas = posiciones[numero * tamano:(numero + 1) * tamano]
+    muertes = _muertes(*filtros)[filas]
+    registros = [
+        {'COD_MUERTE': c, 'Descripcion': d, 'Muertes': int(m)}
+        for c, d, m in zip(indice.codigos[filas], indice.descripciones[filas], muertes)
+    ]
+    return registros, paginas, numero
+
+
+_NODO = ['NIVEL', 'CODIGO', 'PADRE', 'DESCRIPCION']
+
+
+class _Jerarquia:
+    """
+    JerarquiaCIE10 (calculada en el ETL) de los años `anios` con los hijos
+    de cada nodo en un rango contiguo de filas: bajar un nivel es
+    O(hijos), sin group-by. Con varios años se suman sus nodos.
+    """
+
+    def __init__(self, anios):
+        partes = [almacen.obtener('JerarquiaCIE10', anio) for anio in anios]
+        df = partes[0]
+        if len(partes) > 1:
+            df = almacen.concatenar(partes)
+            df['DESCRIPCION'] = df['DESCRIPCION'].fillna('')
+            df = df.groupby(_NODO, as_index=False, observed=True)['Muertes'].sum()
+        # El ETL ya la escribe ordenada; se reordena por si el archivo no lo está
+        df = df.sort_values(['PADRE', 'Muertes', 'CODIGO'], ascending=[True, False, True], kind='stable')
+        self.codigos = df['CODIGO'].to_numpy(object)
+        self.descripciones = df['DESCRIPCION'].fillna('').to_numpy(object)
+        self.niveles = df['NIVEL'].astype(str).to_numpy(object)
+        self.muertes = df['Muertes'].to_numpy('int64')
+        padres = df['PADRE'].to_numpy(object)
+
+        cortes = np.flatnonzero(padres[1:] != padres[:-1]) + 1
+        inicios = np.concatenate([[0], cortes])
+        fines = np.concatenate([cortes, [len(padres)]])
+        self.hijos = {padres[i]: (int(i), int(f)) for i, f in zip(inicios, fines)}
+        self.fila = {codigo: i for i, codigo in enumerate(self.codigos)}
+        self.padre = dict(zip(self.codigos, padres))
+        self.total = int(sum(self.muertes[slice(*self.hijos.get(almacen.RAIZ_CIE10, (0, 0)))]))
+
+
+@almacen.por_version(maxsize=8)
+def _jerarquia_anios(anios):
+    return _Jerarquia(anios)
+
+
+def _jerarquia(anios=None):
+    return _jerarquia_anios(almacen.seleccion_anios(anios))
+
+
+@metricas.fase('filtrado')
+def hijos(codigo=almacen.RAIZ_CIE10, anios=None):
+    """
+    Registros de los hijos de `codigo` (los capítulos para la raíz), de
+    más a menos muertes en `anios`, con su porcentaje sobre el padre.
+    """
+    jerarquia = _jerarquia(anios)
+    inicio, fin = jerarquia.hijos.get(codigo, (0, 0))
+    fila = jerarquia.fila.get(codigo)
+    total = jerarquia.total if fila is None else int(jerarquia.muertes[fila])
+    return [
+        {
+            'id': jerarquia.codigos[i], 'CODIGO': jerarquia.codigos[i],
+            'DESCRIPCION': jerarquia.descripciones[i], 'Muertes': int(jerarquia.muertes[i]),
+            'Porcentaje': round(100 * int(jerarquia.muertes[i]) / total, 2) if total else 0.0,
+        }
+        for i in range(inicio, fin)
+    ]
+
+
+def tiene_hijos(codigo, anios=None):
+    return codigo in _jerarquia(anios).hijos
+
+
+def padre(codigo, anios=None):
+    """
+    Padre de `codigo` (la raíz para los capítulos y para la raíz misma).
+    """
+    return _jerarquia(anios).padre.get(codigo, almacen.RAIZ_CIE10)
+
+
+def ruta(codigo, anios=None):
+    """
+    Ancestros de `codigo` desde el capítulo, como (nivel, código, descripción).
+    """
+    jerarquia = _jerarquia(anios)
+    nodos = []
+    while codigo in jerarquia.fila:
+        i = jerarquia.fila[codigo]
+        nodos.append((jerarquia.niveles[i], codigo, jerarquia.descripciones[i]))
+        codigo = jerarquia.padre[codigo]
+    return nodos[::-1]
+
+
+def indice_busqueda(anios=None):
+    """
+    Índice de búsqueda de los nodos del árbol (capítulos y códigos) con
+    muertes en `anios`, por código y descripción; los empates van por
+    número de muertes.
+    """
+    return _indice_busqueda(almacen.seleccion_anios(anios))
+
+
+@almacen.por_version(maxsize=8)
+def _indice_busqueda(anios):
+    jerarquia = _jerarquia_anios(anios)
+    etiquetas = [
+        f'Capítulo {c}: {d}' if n == 'capitulo' else f'{c} {d}'
+        for n, c, d in zip(jerarquia.niveles, jerarquia.codigos, jerarquia.descripciones)
+    ]
+    return busqueda.IndiceTexto(etiquetas, list(jerarquia.codigos), jerarquia.muertes)
+
+
+def precargar():
+    """
+    Construye el índice y el orden inicial sin filtros de la selección
+    inicial de años.
+    """
+    pagina(anios=almacen.anios_defecto())
+
+
+def precargar_jerarquia():
+    """
+    Construye el índice por padre del árbol de causas y su búsqueda
+    para la selección inicial de años.
+    """
+    indice_busqueda(almacen.anios_defecto())
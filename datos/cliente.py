@@ -0,0 +1,48 @@
+# ------------------------------------------------------------------
+# Archivo: datos/cliente.py
+# Descripción: Codificación compacta de tablas pequeñas para filtrarlas y
+#              agregarlas en el navegador (assets/filtros_cliente.js), sin
+#              ida y vuelta al servidor en cada cambio de filtro.
+# ------------------------------------------------------------------
+import os
+
+import pandas as pd
+
+# Tablas con más filas que este umbral se filtran en el servidor
+UMBRAL_FILAS_CLIENTE = int(os.environ.get('UMBRAL_FILAS_CLIENTE', '10000'))
+
+
+def usar_cliente(df):
+    """
+    True si la tabla es lo bastante pequeña para enviarla al navegador.
+    """
+    return len(df) <= UMBRAL_FILAS_CLIENTE
+
+
+def _escalares(valores):
+    return [v.item() if hasattr(v, 'item') else v for v in valores]
+
+
+def codificar(df, filtros, grupo, orden_grupo, figura, medida=None, completar=False):
+    """
+    Empaqueta `df` por columnas: cada filtro y el grupo como categorías +
+    códigos enteros (-1 = sin valor) y la medida como lista de números
+    (None = contar filas). `figura` es la figura base (dict) cuyo primer
+    trazo recibe x (grupos) e y (totales) en el navegador: sólo los grupos
+    con datos o, con `completar`, todos los de `orden_grupo` (0 si faltan).
+    """
+    columnas = []
+    for columna in filtros:
+        cat = pd.Categorical(df[columna])
+        columnas.append({
+            'categorias': _escalares(cat.categories),
+            'codigos': cat.codes.tolist(),
+        })
+    cat_grupo = pd.Categorical(df[grupo], categories=orden_grupo)
+    return {
+        'filtros': columnas,
+        'grupo': {'categorias': list(orden_grupo), 'codigos': cat_grupo.codes.tolist()},
+        'medida': df[medida].tolist() if medida else None,
+        'completar': completar,
+        'figura': figura,
+    }
@@ -0,0 +1,232 @@
+# ------------------------------------------------------------------
+# Archivo: datos/cubos.py
+# Descripción: Cubos de agregación. Para cada combinación de filtros
+#              (incluido "todos") se precalcula el group-by que usa una
+#              página, de modo que el callback sólo hace una búsqueda en
+#              un diccionario. Cada año tiene sus propias celdas, que se
+#              construyen la primera vez que se consulta ese año; con
+#              varios años se suman las celdas de los seleccionados.
+#              Las celdas pertenecen a una versión de los datos y se
+#              descartan con ella (datos/almacen.py); al recargar, la
+#              versión nueva reutiliza las de los años que no cambiaron.
+# ------------------------------------------------------------------
+import itertools
+import os
+import threading
+
+from datos import almacen, metricas
+
+# Presupuesto de memoria compartido por todos los cubos (MB)
+PRESUPUESTO_BYTES = int(os.environ.get('PRESUPUESTO_CUBOS_MB', '64')) * 2**20
+
+_cubos = {}
+_lock = threading.Lock()
+
+
+def _escalar(valor):
+    # Claves del diccionario como escalares de Python (no numpy)
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def _uso():
+    # Bytes de celdas materializadas en la versión de los datos del hilo
+    return almacen.version().local('cubos-bytes', lambda: {'bytes': 0})
+
+
+def _clave(valores):
+    # Dropdown vacío (None o '') equivale a "todos"
+    return tuple(_escalar(v) if v not in (None, '') else None for v in valores)
+
+
+class _Particion:
+    """
+    Resultado de `groupby(grupo)[medida].sum()` sobre el dataset de un año
+    para cada combinación de valores de filtros, indexado por la tupla de
+    filtros (None = sin filtro).
+    """
+
+    def __init__(self, cubo, anio):
+        self.cubo = cubo
+        self.anio = anio
+        self.celdas = None
+        self.bytes = 0
+        self.construido = False
+        # False si no cupo en el presupuesto: se calcula con pandas
+        self.materializado = False
+        self._vacio = None
+
+    def calcular(self, *valores):
+        """
+        Ruta directa con pandas: filtra y agrupa el dataset del año.
+        Es la referencia del cubo y el respaldo si no cabe en memoria.
+        """
+        cubo = self.cubo
+        dff = almacen.obtener(cubo.dataset, self.anio)
+        for columna, valor in zip(cubo.filtros, _clave(valores)):
+            if valor is not None:
+                dff = dff[dff[columna] == valor]
+        return dff.groupby(cubo.grupo, as_index=False, observed=True).agg({cubo.medida: 'sum'})
+
+    def construir(self):
+        """
+        Materializa todas las combinaciones de filtros. Parte de la
+        agregación más fina y reagrupa para cada subconjunto de filtros
+        activos. Si se supera el presupuesto, se descarta lo construido.
+        """
+        cubo = self.cubo
+        uso = _uso()
+        self.construido = True
+        df = almacen.obtener(cubo.dataset, self.anio)
+        base = df.groupby(cubo.filtros + cubo.grupo, as_index=False, observed=True).agg({cubo.medida: 'sum'})
+        vacio = base.iloc[0:0][cubo.grupo + [cubo.medida]].reset_index(drop=True)
+
+        celdas, usados = {}, 0
+        disponible = PRESUPUESTO_BYTES - uso['bytes']
+        for activos in itertools.product((True, False), repeat=len(cubo.filtros)):
+            claves = [f for f, a in zip(cubo.filtros, activos) if a]
+            agregado = base.groupby(claves + cubo.grupo, as_index=False, observed=True).agg({cubo.medida: 'sum'})
+            partes = agregado.groupby(claves, observed=True, sort=False) if claves else [((), agregado)]
+            for valores, parte in partes:
+                resultado = parte[cubo.grupo + [cubo.medida]].reset_index(drop=True)
+                valores = iter(valores)
+                clave = _clave(next(valores) if a else None for a in activos)
+                celdas[clave] = resultado
+                usados += int(resultado.memory_usage(index=True).sum())
+                if usados > disponible:
+                    self.materializado = False
+                    return False
+
+        self.celdas, self.bytes, self.materializado = celdas, usados, True
+        self._vacio = vacio
+        uso['bytes'] += usados
+        return True
+
+    def asegurar(self):
+        """
+        Construye la partición si nadie lo ha hecho aún (seguro entre hilos).
+        """
+        if not self.construido:
+            with _lock:
+                if not self.construido:
+                    self.construir()
+
+    def consultar(self, *valores):
+        self.asegurar()
+        if not self.materializado:
+            return self.calcular(*valores)
+        return self.celdas.get(_clave(valores), self._vacio).copy(deep=False)
+
+
+class Cubo:
+    """
+    Cubo de `dataset` con `filtros` y `grupo`, con una partición por año
+    en cada versión de los datos. Sólo se leen y agregan los años que se
+    consultan.
+    """
+
+    def __init__(self, nombre, dataset, filtros, grupo, medida='Muertes'):
+        self.nombre = nombre
+        self.dataset = dataset
+        self.filtros = list(filtros)
+        self.grupo = list(grupo)
+        self.medida = medida
+
+    @property
+    def particiones(self):
+        return almacen.version().local(('cubo', self.nombre), dict)
+
+    def particion(self, anio):
+        particiones = self.particiones
+        particion = particiones.get(anio)
+        if particion is None:
+            with _lock:
+                particion = particiones.setdefault(anio, _Particion(self, anio))
+        return particion
+
+    def _sumar(self, partes):
+        # Un año: la celda tal cual; varios: suma por grupo de sus celdas
+        if len(partes) == 1:
+            return partes[0]
+        return (almacen.concatenar(partes)
+                .groupby(self.grupo, as_index=False, observed=True).agg({self.medida: 'sum'}))
+
+    def calcular(self, anios, *valores):
+        """
+        Ruta directa con pandas para los años `anios` (valor del selector).
+        """
+        with metricas.fase('agregacion'):
+            return self._sumar([self.particion(a).calcular(*valores) for a in almacen.seleccion_anios(anios)])
+
+    def asegurar(self, anios=None):
+        """
+        Construye las particiones de `anios` (por defecto, la selección inicial).
+        """
+        for anio in almacen.seleccion_anios(anios or almacen.anios_defecto()):
+            self.particion(anio).asegurar()
+
+    def consultar(self, anios, *valores):
+        """
+        Devuelve el group-by para los años `anios` (valor del selector) y
+        los valores de filtro dados (una vista; no debe modificarse en su lugar).
+        """
+        with metricas.fase('agregacion'):
+            return self._sumar([self.particion(a).consultar(*valores) for a in almacen.seleccion_anios(anios)])
+
+
+def definir(nombre, dataset, filtros, grupo, medida='Muertes'):
+    """
+    Registra (una sola vez) el cubo `nombre`. Varias páginas pueden
+    compartir el mismo cubo usando el mismo nombre.
+    """
+    with _lock:
+        cubo = _cubos.get(nombre)
+        if cubo is None:
+            cubo = _cubos[nombre] = Cubo(nombre, dataset, filtros, grupo, medida)
+    return cubo
+
+
+def construir_todos(anios=None):
+    """
+    Construye las particiones de `anios` (por defecto, la selección
+    inicial) de los cubos registrados que aún no estén materializadas.
+    Omite los cubos cuyo dataset no es confiable (almacen.confiable).
+    """
+    for cubo in list(_cubos.values()):
+        if almacen.confiable(cubo.dataset, anios if anios is not None else almacen.anios_defecto()):
+            cubo.asegurar(anios)
+
+
+@almacen.al_recargar
+def _reconstruir(anterior):
+    # En la versión nueva (fijada en el hilo), los años que la anterior ya
+    # tenía construidos: los que no cambiaron se reutilizan tal cual
+    disponibles = almacen.anios()
+    uso = _uso()
+    for cubo in list(_cubos.values()):
+        construidos = anterior.local(('cubo', cubo.nombre), dict)
+        particiones = cubo.particiones
+        for anio, previa in sorted(construidos.items()):
+            if not previa.construido or anio not in disponibles:
+                continue
+            if almacen.conservada(anterior, anio):
+                particiones[anio] = previa
+                uso['bytes'] += previa.bytes
+            else:
+                cubo.particion(anio).asegurar()
+
+
+def estado():
+    """
+    Resumen por cubo: años construidos, número de celdas, bytes y si
+    todas sus particiones están materializadas.
+    """
+    resumen = {}
+    for nombre, c in _cubos.items():
+        particiones = [p for p in list(c.particiones.values()) if p.construido]
+        resumen[nombre] = {
+            'anios': sorted(p.anio for p in particiones),
+            'celdas': sum(len(p.celdas or ()) for p in particiones),
+            'bytes': sum(p.bytes for p in particiones),
+            'materializado': all(p.materializado for p in particiones),
+        }
+    return resumen
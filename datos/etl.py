@@ -0,0 +1,601 @@
+# ------------------------------------------------------------------
+# Archivo: datos/etl.py
+# Descripción: Generación de ArchivosProcesados/ a partir de los archivos
+#              originales, en una sola pasada por bloques sobre el archivo
+#              de mortalidad (memoria acotada, sin importar su tamaño).
+#
+# Uso (desde la raíz del proyecto):
+#     python -m datos.etl --mortalidad "ArchivosOriginales/Datos de Mortalidad.csv"
+#
+# Entradas (CSV separados por ';', con o sin BOM):
+#   --mortalidad  microdatos de defunciones del DANE; se usan las columnas
+#                 COD_DEPARTAMENTO, COD_MUNICIPIO, MES, HORA, SEXO (1/2/3),
+#                 GRUPO_EDAD1, MANERA_MUERTE y COD_MUERTE
+#   --codigos     catálogo CIE-10 (Codigos de Muerte.csv)
+#   --divipola    división político-administrativa (Divipola.csv)
+# Salidas (en --salida, separados por ';'):
+#   MuertesPorDepartamento.csv, MuertesPorMes.csv, MuertesPorCodigo.csv,
+#   MuertesPorMunicipioTabla.csv, MuertesPorEdad.csv, MuertesPorMunicipio.csv,
+#   el catálogo depurado CatalogoCIE10.csv, los totales por capítulo,
+#   código de tres y de cuatro caracteres JerarquiaCIE10.csv y, con
+#   --formatos, las mismas tablas en .arrow (Feather sin compresión,
+#   mapeable en memoria) y/o .parquet, con el esquema de datos/almacen.py
+#
+# Cada archivo de mortalidad del DANE es un año. Con --anio AAAA las
+# tablas del año se escriben en la partición --salida/anio=AAAA/ (el
+# catálogo, común a todos los años, en --salida); sin --anio, sueltas en
+# --salida como un único año (ANIO_DATOS, 2019 por defecto):
+#     python -m datos.etl --mortalidad defunciones2018.csv --anio 2018
+#
+# El ETL es incremental: guarda en --salida/manifiesto.json la huella
+# (SHA-256) de cada archivo de entrada y de los catálogos por partición,
+# y sólo reprocesa las particiones cuyas entradas cambiaron. Un año puede
+# venir en varios archivos (p. ej. uno por mes; el año se toma de --anio
+# o del nombre del archivo): los conteos de cada archivo se guardan en
+# --salida/_conteos/ y, como son sumas, se combinan sin releer los
+# archivos que no cambiaron:
+#     python -m datos.etl --mortalidad mortalidad/defunciones_2019_*.csv
+# --forzar ignora el manifiesto y reprocesa todo.
+#
+# Los municipios se identifican por departamento + municipio (el código
+# de municipio sólo es único dentro de su departamento). Cada cruce con
+# un catálogo exige claves únicas en el catálogo y, al final, se verifica
+# que filas y totales nacionales cuadren; si no, el ETL falla.
+#
+# Verificación de archivos ya procesados:
+#     python -m datos.etl --verificar ArchivosProcesados
+# ------------------------------------------------------------------
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from datos import almacen
+
+COLUMNAS_MORTALIDAD = [
+    'COD_DEPARTAMENTO', 'COD_MUNICIPIO', 'MES', 'HORA', 'SEXO',
+    'GRUPO_EDAD1', 'MANERA_MUERTE', 'COD_MUERTE'
+]
+TIPOS_MORTALIDAD = {
+    'COD_DEPARTAMENTO': 'int16', 'COD_MUNICIPIO': 'int16', 'MES': 'int8',
+    'HORA': 'int16', 'SEXO': 'int8', 'GRUPO_EDAD1': 'int8',
+    'MANERA_MUERTE': 'str', 'COD_MUERTE': 'str'
+}
+# Valor de MANERA_MUERTE y COD_MUERTE cuando vienen vacíos: groupby
+# descarta las claves nulas y esas muertes faltarían en todos los totales
+SIN_INFORMACION = 'Sin información'
+_COLUMNAS_TEXTO = ['MANERA_MUERTE', 'COD_MUERTE']
+
+SEXOS = {1: 'Masculino', 2: 'Femenino', 3: 'No Definido'}
+COD_CIE10 = 'Código de la CIE-10 cuatro caracteres'
+DESC_CIE10 = 'Descripcion  de códigos mortalidad a cuatro caracteres'
+COD_CIE10_TRES = 'Código de la CIE-10 tres caracteres'
+DESC_CIE10_TRES = 'Descripción  de códigos mortalidad a tres caracteres'
+CATALOGO_CIE10 = 'CatalogoCIE10'
+JERARQUIA_CIE10 = 'JerarquiaCIE10'
+
+# Manifiesto de entradas y particiones, y caché de conteos por archivo (en --salida)
+MANIFIESTO = almacen.MANIFIESTO
+DIR_CONTEOS = '_conteos'
+VERSION_MANIFIESTO = 1
+# Cambia cuando cambia cómo se cuentan las filas (2: claves vacías como
+# SIN_INFORMACION); los conteos en caché de otra versión se recalculan
+VERSION_CONTEOS = 2
+# Año en el nombre de un archivo de mortalidad (defunciones_2019_03.csv -> 2019)
+_ANIO_EN_NOMBRE = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')
+
+# Agregados que se calculan en la pasada: nombre -> (claves, filtro de filas)
+AGREGADOS = {
+    'MuertesPorDepartamento': (['COD_DEPARTAMENTO', 'SEXO', 'MANERA_MUERTE'], None),
+    'MuertesPorMes': (['MES', 'SEXO', 'HORA', 'MANERA_MUERTE'], None),
+    'MuertesPorCodigo': (['COD_MUERTE', 'SEXO', 'MES'], None),
+    'MuertesPorMunicipioTabla': (['COD_DEPARTAMENTO', 'COD_MUNICIPIO', 'MES', 'SEXO', 'COD_MUERTE'], None),
+    'MuertesPorEdad': (['SEXO', 'GRUPO_EDAD1', 'MES'], None),
+    'MuertesPorMunicipio': (['COD_DEPARTAMENTO', 'COD_MUNICIPIO', 'MES', 'SEXO'], ('MANERA_MUERTE', 'Homicidio')),
+}
+
+
+class ErrorIntegridad(ValueError):
+    """
+    Los datos no cuadran: claves repetidas en un catálogo, filas
+    multiplicadas por un cruce o totales distintos entre archivos.
+    """
+
+
+class _Acumulador:
+    """
+    Suma incremental de conteos parciales por bloque. Los parciales se
+    combinan cada `max_parciales` bloques para acotar la memoria.
+    """
+
+    def __init__(self, claves, max_parciales=8):
+        self.claves = claves
+        self.max_parciales = max_parciales
+        self._parciales = []
+
+    def agregar(self, bloque):
+        self._parciales.append(bloque.groupby(self.claves).size())
+        if len(self._parciales) >= self.max_parciales:
+            self._parciales = [self._combinar()]
+
+    def _combinar(self):
+        if not self._parciales:
+            return pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays([[]] * len(self.claves), names=self.claves))
+        return pd.concat(self._parciales).groupby(level=list(range(len(self.claves)))).sum()
+
+    def resultado(self):
+        return self._combinar().reset_index(name='Muertes')
+
+
+def _completar(bloque):
+    # Claves de texto vacías (nulas o '') -> SIN_INFORMACION
+    for columna in _COLUMNAS_TEXTO:
+        valores = bloque[columna]
+        bloque[columna] = valores.mask(valores.isna() | (valores == ''), SIN_INFORMACION)
+    return bloque
+
+
+def _bloques(ruta, tamano_bloque, motor):
+    """
+    Itera el archivo de mortalidad en DataFrames de `tamano_bloque` filas,
+    leyendo sólo las columnas necesarias con el motor C de pandas o con el
+    lector por lotes de pyarrow. MANERA_MUERTE y COD_MUERTE vacíos quedan
+    como SIN_INFORMACION.
+    """
+    if motor == 'pyarrow':
+        from pyarrow import csv as pa_csv
+
+        lector = pa_csv.open_csv(
+            ruta,
+            read_options=pa_csv.ReadOptions(block_size=64 * 2**20),
+            parse_options=pa_csv.ParseOptions(delimiter=';'),
+            convert_options=pa_csv.ConvertOptions(include_columns=COLUMNAS_MORTALIDAD),
+        )
+        for lote in lector:
+            yield _completar(lote.to_pandas()).astype(TIPOS_MORTALIDAD)
+        return
+
+    for bloque in pd.read_csv(
+        ruta, sep=';', encoding='utf-8-sig', engine='c',
+        usecols=COLUMNAS_MORTALIDAD, dtype=TIPOS_MORTALIDAD, chunksize=tamano_bloque
+    ):
+        yield _completar(bloque)
+
+
+def _leer_catalogo(ruta):
+    return pd.read_csv(ruta, sep=';', encoding='utf-8-sig', engine='c')
+
+
+def catalogo_cie10(codigos):
+    """
+    Catálogo CIE-10 depurado: códigos sin espacios (el original trae p. ej.
+    'K582 ') y un solo registro por código de cuatro caracteres.
+    """
+    codigos = codigos.copy()
+    for columna in (COD_CIE10, COD_CIE10_TRES):
+        codigos[columna] = codigos[columna].str.strip()
+    repetidos = codigos[COD_CIE10][codigos[COD_CIE10].duplicated()]
+    if len(repetidos):
+        raise ErrorIntegridad(f'Códigos CIE-10 repetidos: {repetidos.head().tolist()}')
+    return codigos
+
+
+def jerarquia_cie10(por_codigo, codigos):
+    """
+    Totales de muertes por capítulo, código de tres y de cuatro caracteres:
+    una fila por nodo con muertes (NIVEL, CODIGO, PADRE, DESCRIPCION,
+    Muertes). Se ordena por padre y muertes, así los hijos de cada nodo
+    quedan contiguos. Los códigos de los datos sin subdivisión (p. ej. I99)
+    sólo aparecen en el nivel de tres caracteres. Las muertes sin causa
+    (SIN_INFORMACION) no tienen lugar en el árbol.
+    """
+    muertes = por_codigo.groupby('COD_MUERTE', as_index=False)['Muertes'].sum()
+    muertes = muertes[muertes['COD_MUERTE'] != SIN_INFORMACION]
+    cuatro = codigos.set_index(COD_CIE10)
+    tres = codigos.drop_duplicates(COD_CIE10_TRES).set_index(COD_CIE10_TRES)
+    capitulos = codigos.drop_duplicates('Capítulo').set_index('Capítulo')['Nombre capítulo']
+
+    es_cuatro = muertes['COD_MUERTE'].isin(cuatro.index)
+    muertes['TRES'] = muertes['COD_MUERTE'].where(
+        ~es_cuatro, muertes['COD_MUERTE'].map(cuatro[COD_CIE10_TRES]))
+    sin_capitulo = muertes.loc[~muertes['TRES'].isin(tres.index), 'COD_MUERTE']
+    if len(sin_capitulo):
+        raise ErrorIntegridad(f'Códigos sin capítulo CIE-10: {sin_capitulo.head().tolist()}')
+    muertes['CAPITULO'] = muertes['TRES'].map(tres['Capítulo'])
+
+    por_capitulo = muertes.groupby('CAPITULO', as_index=False)['Muertes'].sum()
+    por_tres = muertes.groupby(['CAPITULO', 'TRES'], as_index=False)['Muertes'].sum()
+    por_cuatro = muertes[es_cuatro]
+    niveles = [
+        pd.DataFrame({
+            'NIVEL': 'capitulo', 'CODIGO': por_capitulo['CAPITULO'].astype(str),
+            'PADRE': almacen.RAIZ_CIE10,
+            'DESCRIPCION': por_capitulo['CAPITULO'].map(capitulos), 'Muertes': por_capitulo['Muertes'],
+        }),
+        pd.DataFrame({
+            'NIVEL': 'tres', 'CODIGO': por_tres['TRES'], 'PADRE': por_tres['CAPITULO'].astype(str),
+            'DESCRIPCION': por_tres['TRES'].map(tres[DESC_CIE10_TRES]), 'Muertes': por_tres['Muertes'],
+        }),
+        pd.DataFrame({
+            'NIVEL': 'cuatro', 'CODIGO': por_cuatro['COD_MUERTE'], 'PADRE': por_cuatro['TRES'],
+            'DESCRIPCION': por_cuatro['COD_MUERTE'].map(cuatro[DESC_CIE10]), 'Muertes': por_cuatro['Muertes'],
+        }),
+    ]
+    jerarquia = pd.concat(niveles, ignore_index=True)
+    return (jerarquia.sort_values(['PADRE', 'Muertes', 'CODIGO'], ascending=[True, False, True])
+            .reset_index(drop=True))
+
+
+def acumular(ruta_mortalidad, tamano_bloque=500_000, motor='c'):
+    """
+    Una sola pasada sobre el archivo de mortalidad: devuelve los conteos
+    de cada agregado de AGREGADOS y el número de filas leídas.
+    """
+    acumuladores = {nombre: _Acumulador(claves) for nombre, (claves, _) in AGREGADOS.items()}
+    filas = 0
+    for bloque in _bloques(ruta_mortalidad, tamano_bloque, motor):
+        filas += len(bloque)
+        for nombre, (_, filtro) in AGREGADOS.items():
+            parte = bloque
+            if filtro is not None:
+                columna, valor = filtro
+                parte = bloque[bloque[columna] == valor]
+            acumuladores[nombre].agregar(parte)
+    return {nombre: acc.resultado() for nombre, acc in acumuladores.items()}, filas
+
+
+def _unir(df, catalogo, izquierda, derecha=None):
+    """
+    Cruce por la izquierda de `df` con `catalogo`. Falla si las claves del
+    catálogo se repiten (el cruce multiplicaría filas) y avisa de las
+    claves de `df` que no aparecen en el catálogo.
+    """
+    derecha = derecha or izquierda
+    repetidas = catalogo[catalogo.duplicated(derecha, keep=False)]
+    if not repetidas.empty:
+        ejemplos = repetidas[derecha].drop_duplicates().head(5).to_dict('records')
+        raise ErrorIntegridad(f'Claves repetidas en el catálogo {derecha}: {ejemplos}')
+    unido = pd.merge(df, catalogo, left_on=izquierda, right_on=derecha,
+                     how='left', validate='many_to_one', indicator=True)
+    sin_cruce = unido['_merge'] == 'left_only'
+    if sin_cruce.any():
+        ejemplos = unido.loc[sin_cruce, izquierda].drop_duplicates().head(5).to_dict('records')
+        print(f'Aviso: {int(sin_cruce.sum())} filas sin cruce en {derecha}, p. ej. {ejemplos}')
+    return unido.drop(columns='_merge')
+
+
+def _departamentos(divipola):
+    # Divipola repite el código de departamento con otros nombres en los
+    # distritos (p. ej. 8 -> BARRANQUILLA D.E.); se usa el nombre más frecuente
+    return (divipola.groupby('COD_DEPARTAMENTO')['DEPARTAMENTO']
+            .agg(lambda s: s.value_counts().index[0]).reset_index())
+
+
+def enriquecer(conteos, codigos, divipola):
+    """
+    Une los conteos con los catálogos (nombres de departamento, municipio
+    y causa) y traduce SEXO y MES a etiquetas, como esperan las páginas.
+    """
+    cie10 = codigos[[COD_CIE10, DESC_CIE10]]
+    departamentos = _departamentos(divipola)
+    # Con el nombre del departamento: las páginas rotulan 'MUNICIPIO (DEPARTAMENTO)'
+    municipios = divipola[['COD_DEPARTAMENTO', 'COD_MUNICIPIO', 'MUNICIPIO']].merge(
+        departamentos, on='COD_DEPARTAMENTO', how='left')
+    salida = {}
+
+    df = conteos['MuertesPorDepartamento']
+    salida['MuertesPorDepartamento'] = _unir(df, departamentos, ['COD_DEPARTAMENTO'])
+
+    df = conteos['MuertesPorMes']
+    df['MES'] = df['MES'].map(almacen.MESES)
+    salida['MuertesPorMes'] = df
+
+    df = conteos['MuertesPorCodigo']
+    salida['MuertesPorCodigo'] = _unir(df, cie10, ['COD_MUERTE'], [COD_CIE10])
+
+    df = conteos['MuertesPorMunicipioTabla']
+    df = _unir(df, municipios, ['COD_DEPARTAMENTO', 'COD_MUNICIPIO'])
+    salida['MuertesPorMunicipioTabla'] = _unir(df, cie10, ['COD_MUERTE'], [COD_CIE10])
+
+    salida['MuertesPorEdad'] = conteos['MuertesPorEdad']
+
+    df = conteos['MuertesPorMunicipio']
+    salida['MuertesPorMunicipio'] = _unir(df, municipios, ['COD_DEPARTAMENTO', 'COD_MUNICIPIO'])
+
+    for df in salida.values():
+        df['SEXO'] = df['SEXO'].map(SEXOS)
+    return salida
+
+
+def _claves_salida(nombre, df):
+    # Claves del agregado, presentes en el archivo (los archivos anteriores
+    # a la corrección no traen COD_DEPARTAMENTO en las tablas municipales)
+    return [c for c in AGREGADOS[nombre][0] if c in df.columns]
+
+
+def verificar(salida, total=None, homicidios=None):
+    """
+    Lista de problemas de integridad de los datasets procesados: claves
+    vacías, claves repetidas y totales nacionales distintos entre archivos. `total` y
+    `homicidios` son los esperados; por defecto, los de MuertesPorMes.
+    """
+    mes = salida['MuertesPorMes']
+    if total is None:
+        total = int(mes['Muertes'].sum())
+    if homicidios is None:
+        homicidios = int(mes.loc[mes['MANERA_MUERTE'] == 'Homicidio', 'Muertes'].sum())
+
+    problemas = []
+    for nombre, df in salida.items():
+        claves = _claves_salida(nombre, df)
+        vacias = df[claves].isna().any(axis=1)
+        if vacias.any():
+            problemas.append(f'{nombre}: {int(vacias.sum())} filas ({int(df.loc[vacias, "Muertes"].sum())} muertes) '
+                             f'con la clave {claves} vacía')
+        repetidas = int(df.duplicated(claves).sum())
+        if repetidas:
+            problemas.append(f'{nombre}: {repetidas} filas repiten la clave {claves}')
+        esperado = homicidios if nombre == 'MuertesPorMunicipio' else total
+        obtenido = int(df['Muertes'].sum())
+        if obtenido != esperado:
+            problemas.append(f'{nombre}: total {obtenido}, se esperaba {esperado}')
+    return problemas
+
+
+def verificar_directorio(directorio):
+    """
+    Verifica los CSV procesados de `directorio`; devuelve los problemas.
+    """
+    salida = {nombre: pd.read_csv(os.path.join(directorio, f'{nombre}.csv'),
+                                  sep=';', encoding='utf-8-sig', engine='c')
+              for nombre in AGREGADOS}
+    for nombre, df in salida.items():
+        print(f'{nombre}: {len(df)} filas, {int(df["Muertes"].sum())} muertes')
+    return verificar(salida)
+
+
+def _procesar(conteos, filas, codigos, divipola):
+    """
+    Enriquece los conteos de un año con los catálogos, calcula la
+    jerarquía CIE-10 y verifica filas y totales; falla si algo no cuadra.
+    """
+    homicidios = int(conteos['MuertesPorMunicipio']['Muertes'].sum())
+    filas_conteos = {nombre: len(df) for nombre, df in conteos.items()}
+    salida = enriquecer(conteos, codigos, divipola)
+
+    # Regresión: los cruces no cambian filas y todos los totales cuadran
+    problemas = [f'{nombre}: {len(df)} filas tras los cruces, {filas_conteos[nombre]} antes'
+                 for nombre, df in salida.items() if len(df) != filas_conteos[nombre]]
+    problemas += verificar(salida, filas, homicidios)
+    jerarquia = jerarquia_cie10(salida['MuertesPorCodigo'], codigos)
+    por_codigo = salida['MuertesPorCodigo']
+    con_causa = filas - int(por_codigo.loc[por_codigo['COD_MUERTE'] == SIN_INFORMACION, 'Muertes'].sum())
+    for nivel, df in jerarquia.groupby('NIVEL'):
+        if nivel != 'cuatro' and int(df['Muertes'].sum()) != con_causa:
+            problemas.append(f'{JERARQUIA_CIE10}: total del nivel {nivel} {int(df["Muertes"].sum())}, '
+                             f'se esperaba {con_causa}')
+    if problemas:
+        raise ErrorIntegridad('\n'.join(problemas))
+    return salida, jerarquia
+
+
+def _escribir_anio(salida, jerarquia, directorio, formatos):
+    for nombre, df in salida.items():
+        almacen.escribir(df, nombre, directorio, formatos)
+        print(f'{nombre}: {len(df)} filas')
+    almacen.escribir(jerarquia, JERARQUIA_CIE10, directorio, formatos)
+    print(f'{JERARQUIA_CIE10}: {len(jerarquia)} nodos')
+
+
+def huella(ruta, anterior=None):
+    """
+    SHA-256, tamaño y fecha de modificación de `ruta`. Si tamaño y fecha
+    coinciden con `anterior` (su entrada del manifiesto), no se relee.
+    """
+    st = os.stat(ruta)
+    if anterior and anterior.get('tamano') == st.st_size and anterior.get('mtime_ns') == st.st_mtime_ns:
+        return dict(anterior)
+    sha = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(2**20), b''):
+            sha.update(bloque)
+    return {'sha256': sha.hexdigest(), 'tamano': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def anio_de(ruta):
+    """
+    Año en el nombre del archivo de mortalidad, o None si no lo tiene.
+    """
+    encontrado = _ANIO_EN_NOMBRE.search(os.path.basename(ruta))
+    return int(encontrado.group()) if encontrado else None
+
+
+def leer_manifiesto(dir_salida):
+    ruta = os.path.join(dir_salida, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {'version': VERSION_MANIFIESTO, 'catalogos': {}, 'particiones': {}}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _escribir_manifiesto(manifiesto, dir_salida):
+    # Atómico: quien vigila el manifiesto nunca lee uno a medio escribir
+    fd, tmp = tempfile.mkstemp(dir=dir_salida, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, os.path.join(dir_salida, MANIFIESTO))
+
+
+def sumar_conteos(partes):
+    """
+    Suma los conteos de varios archivos del mismo año (p. ej. uno por
+    mes): los conteos son sumas, así que se combinan por sus claves.
+    """
+    if len(partes) == 1:
+        return partes[0]
+    return {
+        nombre: (pd.concat([p[nombre] for p in partes], ignore_index=True)
+                 .groupby(claves, as_index=False)['Muertes'].sum())
+        for nombre, (claves, _) in AGREGADOS.items()
+    }
+
+
+def _conteos_archivo(ruta, sha, dir_salida, tamano_bloque, motor):
+    """
+    Conteos y filas de un archivo de mortalidad: de la caché si ya se
+    procesó un archivo con el mismo contenido, si no en una pasada.
+    """
+    carpeta = os.path.join(dir_salida, DIR_CONTEOS, sha[:20])
+    resumen = os.path.join(carpeta, 'filas.json')
+    guardado = {}
+    if os.path.exists(resumen):
+        with open(resumen, encoding='utf-8') as f:
+            guardado = json.load(f)
+    if guardado.get('version') == VERSION_CONTEOS:
+        filas = guardado['filas']
+        conteos = {}
+        for nombre, (claves, _) in AGREGADOS.items():
+            tipos = {c: TIPOS_MORTALIDAD[c] for c in claves}
+            conteos[nombre] = pd.read_csv(os.path.join(carpeta, f'{nombre}.csv'), sep=';', dtype=tipos)
+        print(f'{ruta}: conteos en caché')
+        return conteos, filas
+
+    conteos, filas = acumular(ruta, tamano_bloque, motor)
+    os.makedirs(carpeta, exist_ok=True)
+    for nombre, df in conteos.items():
+        df.to_csv(os.path.join(carpeta, f'{nombre}.csv'), sep=';', index=False)
+    with open(resumen, 'w', encoding='utf-8') as f:
+        json.dump({'filas': filas, 'archivo': os.path.basename(ruta), 'version': VERSION_CONTEOS}, f)
+    print(f'{ruta}: {filas} registros')
+    return conteos, filas
+
+
+def _salidas_completas(directorio, formatos):
+    nombres = [*AGREGADOS, JERARQUIA_CIE10]
+    return all(os.path.exists(os.path.join(directorio, nombre + almacen.FORMATOS[formato]))
+               for nombre in nombres for formato in formatos)
+
+
+def _version(entradas, catalogos, formatos):
+    # Huella de todo lo que determina el contenido de una partición
+    partes = [e['sha256'] for _, e in sorted(entradas.items())]
+    partes += [catalogos[n]['sha256'] for n in sorted(catalogos)] + list(formatos)
+    return hashlib.sha256('\n'.join(partes).encode('utf-8')).hexdigest()[:16]
+
+
+def actualizar(rutas_mortalidad, ruta_codigos, ruta_divipola, dir_salida,
+               tamano_bloque=500_000, motor='c', formatos=('csv',), anio=None, forzar=False):
+    """
+    ETL incremental: agrupa los archivos de mortalidad por año (`anio` o
+    el del nombre; sin año, la raíz de `dir_salida`) y reprocesa sólo las
+    particiones cuyas entradas, catálogos o formatos cambiaron desde el
+    último manifiesto. Devuelve las particiones reescritas.
+    """
+    inicio = time.perf_counter()
+    manifiesto = leer_manifiesto(dir_salida)
+    anteriores = manifiesto.get('particiones', {})
+    previos_cat = manifiesto.get('catalogos', {})
+    catalogos = {'codigos': huella(ruta_codigos, previos_cat.get('codigos')),
+                 'divipola': huella(ruta_divipola, previos_cat.get('divipola'))}
+
+    por_particion = {}
+    for ruta in rutas_mortalidad:
+        anio_ruta = anio if anio is not None else anio_de(ruta)
+        carpeta = dir_salida if anio_ruta is None else almacen.particion(anio_ruta, dir_salida)
+        por_particion.setdefault(os.path.relpath(carpeta, dir_salida), []).append(os.path.normpath(ruta))
+
+    codigos = divipola = None
+    reescritas = []
+    for clave, rutas in sorted(por_particion.items()):
+        anterior = anteriores.get(clave, {})
+        entradas = {r: huella(r, anterior.get('entradas', {}).get(r)) for r in rutas}
+        version = _version(entradas, catalogos, formatos)
+        carpeta = os.path.normpath(os.path.join(dir_salida, clave))
+        if not forzar and anterior.get('version') == version and _salidas_completas(carpeta, formatos):
+            print(f'{clave}: sin cambios')
+            continue
+
+        if codigos is None:
+            codigos = catalogo_cie10(_leer_catalogo(ruta_codigos))
+            divipola = _leer_catalogo(ruta_divipola)
+        print(f'-- {clave}')
+        partes, filas = [], 0
+        for ruta, entrada in entradas.items():
+            conteos, n = _conteos_archivo(ruta, entrada['sha256'], dir_salida, tamano_bloque, motor)
+            partes.append(conteos)
+            filas += n
+        salida, jerarquia = _procesar(sumar_conteos(partes), filas, codigos, divipola)
+        _escribir_anio(salida, jerarquia, carpeta, formatos)
+        anteriores[clave] = {'entradas': entradas, 'formatos': list(formatos), 'filas': filas,
+                             'version': version}
+        reescritas.append(clave)
+
+    # El catálogo CIE-10 es común: se reescribe si cambió o falta
+    catalogo_al_dia = all(os.path.exists(os.path.join(dir_salida, CATALOGO_CIE10 + almacen.FORMATOS[f]))
+                          for f in formatos)
+    if forzar or not catalogo_al_dia or previos_cat.get('codigos', {}).get('sha256') != catalogos['codigos']['sha256']:
+        codigos = catalogo_cie10(_leer_catalogo(ruta_codigos)) if codigos is None else codigos
+        almacen.escribir(codigos, CATALOGO_CIE10, dir_salida, formatos)
+        print(f'{CATALOGO_CIE10}: {len(codigos)} códigos')
+
+    _escribir_manifiesto({'version': VERSION_MANIFIESTO, 'catalogos': catalogos, 'particiones': anteriores},
+                         dir_salida)
+    _podar_conteos(anteriores, dir_salida)
+    print(f'{len(reescritas)} de {len(por_particion)} particiones reprocesadas '
+          f'en {time.perf_counter() - inicio:.1f} s')
+    return reescritas
+
+
+def _podar_conteos(particiones, dir_salida):
+    # Borra los conteos en caché de archivos que ya no están en el manifiesto
+    vigentes = {e['sha256'][:20] for p in particiones.values() for e in p['entradas'].values()}
+    carpeta = os.path.join(dir_salida, DIR_CONTEOS)
+    if os.path.isdir(carpeta):
+        for nombre in os.listdir(carpeta):
+            if nombre not in vigentes:
+                shutil.rmtree(os.path.join(carpeta, nombre), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera los archivos procesados del tablero')
+    parser.add_argument('--mortalidad', nargs='+', default=['ArchivosOriginales/Datos de Mortalidad.csv'],
+                        help='uno o más archivos de mortalidad (p. ej. uno por mes)')
+    parser.add_argument('--codigos', default='ArchivosOriginales/Codigos de Muerte.csv')
+    parser.add_argument('--divipola', default='ArchivosOriginales/Divipola.csv')
+    parser.add_argument('--salida', default=almacen.DIR_DATOS)
+    parser.add_argument('--anio', type=int,
+                        help='año de los archivos de mortalidad: escribe sus tablas en --salida/anio=AAAA/ '
+                             '(por defecto, el año del nombre de cada archivo, si lo tiene)')
+    parser.add_argument('--tamano-bloque', type=int, default=500_000,
+                        help='filas por bloque de lectura (motor c)')
+    parser.add_argument('--motor', choices=('c', 'pyarrow'), default='c',
+                        help='lector del archivo de mortalidad (pyarrow es opcional)')
+    parser.add_argument('--formatos', default='csv,feather' if almacen.pa else 'csv',
+                        help='formatos de salida separados por coma: csv, feather, parquet')
+    parser.add_argument('--forzar', action='store_true',
+                        help='reprocesa todas las particiones aunque el manifiesto diga que no cambiaron')
+    parser.add_argument('--verificar', metavar='DIR',
+                        help='sólo verifica los CSV procesados de DIR y termina')
+    args = parser.parse_args()
+    if args.verificar:
+        problemas = verificar_directorio(args.verificar)
+        for problema in problemas:
+            print(f'ERROR {problema}')
+        raise SystemExit(1 if problemas else 0)
+    formatos = tuple(f.strip() for f in args.formatos.split(',') if f.strip())
+    desconocidos = set(formatos) - set(almacen.FORMATOS)
+    if desconocidos:
+        parser.error(f'formatos desconocidos: {", ".join(sorted(desconocidos))}')
+    actualizar(args.mortalidad, args.codigos, args.divipola, args.salida,
+               args.tamano_bloque, args.motor, formatos, args.anio, args.forzar)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+# ------------------------------------------------------------------
+# Archivo: datos/geometria.py
+# Descripción: Preprocesamiento del GeoJSON de departamentos para el mapa:
+#              coordenadas redondeadas a precisión fija y versiones
+#              simplificadas que conservan la topología (los bordes
+#              compartidos entre departamentos se simplifican una sola vez,
+#              así que no aparecen huecos ni solapes).
+#
+# Uso (desde la raíz del proyecto):
+#     python -m datos.geometria      # genera Colombia.<nivel>.geo.json
+# ------------------------------------------------------------------
+import functools
+import json
+import os
+
+import numpy as np
+
+from datos import almacen
+
+GEOJSON_ORIGINAL = 'Colombia.geo.json'
+
+# Decimales de las coordenadas (4 decimales ~ 11 m)
+DECIMALES = 4
+
+# Tolerancia de Douglas-Peucker (grados) de cada nivel, de más a menos detalle
+NIVELES = {
+    'alta': 0.002,
+    'media': 0.01,
+    'baja': 0.03,
+}
+
+# Propiedades que necesita el mapa; el resto se descarta
+PROPIEDADES = ('DPTO', 'NOMBRE_DPT')
+
+
+def _ruta(nivel=None):
+    nombre = GEOJSON_ORIGINAL if nivel is None else f'Colombia.{nivel}.geo.json'
+    return os.path.join(almacen.DIR_DATOS, nombre)
+
+
+def _douglas_peucker(puntos, tolerancia):
+    """
+    Índices de los puntos que se conservan de la polilínea `puntos`
+    (array n x 2); los extremos siempre se conservan.
+    """
+    n = len(puntos)
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+    pila = [(0, n - 1)]
+    while pila:
+        ini, fin = pila.pop()
+        if fin - ini < 2:
+            continue
+        a, b = puntos[ini], puntos[fin]
+        tramo = puntos[ini + 1:fin]
+        ab = b - a
+        largo = np.hypot(*ab)
+        if largo == 0:
+            dist = np.hypot(*(tramo - a).T)
+        else:
+            dist = np.abs(ab[0] * (tramo[:, 1] - a[1]) - ab[1] * (tramo[:, 0] - a[0])) / largo
+        i = int(np.argmax(dist))
+        if dist[i] > tolerancia:
+            medio = ini + 1 + i
+            conservar[medio] = True
+            pila.append((ini, medio))
+            pila.append((medio, fin))
+    return np.flatnonzero(conservar)
+
+
+def _anillos(geometria):
+    # Lista de polígonos (cada uno lista de anillos) para Polygon y MultiPolygon
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    return geometria['coordinates']
+
+
+def _cuantizar(anillo, decimales):
+    puntos = [(round(x, decimales), round(y, decimales)) for x, y, *_ in anillo]
+    # Quitar puntos consecutivos repetidos tras el redondeo
+    limpio = [puntos[0]]
+    for p in puntos[1:]:
+        if p != limpio[-1]:
+            limpio.append(p)
+    if limpio[0] != limpio[-1]:
+        limpio.append(limpio[0])
+    return limpio
+
+
+def simplificar(geojson, tolerancia, decimales=DECIMALES):
+    """
+    Devuelve una copia de `geojson` con coordenadas redondeadas y anillos
+    simplificados con tolerancia `tolerancia` (grados), preservando los
+    bordes compartidos entre features.
+    """
+    # 1. Cuantizar todos los anillos
+    features = []
+    for feat in geojson['features']:
+        poligonos = [[_cuantizar(a, decimales) for a in pol] for pol in _anillos(feat['geometry'])]
+        features.append((feat, poligonos))
+
+    # 2. Dueños de cada vértice: anillos en los que aparece
+    duenos = {}
+    id_anillo = 0
+    for _, poligonos in features:
+        for pol in poligonos:
+            for anillo in pol:
+                for p in anillo[:-1]:
+                    duenos.setdefault(p, set()).add(id_anillo)
+                id_anillo += 1
+    duenos = {p: frozenset(s) for p, s in duenos.items()}
+
+    # 3. Partir cada anillo en arcos donde cambia el conjunto de dueños y
+    #    simplificar cada arco en una dirección canónica, una sola vez
+    arcos = {}
+
+    def simplificar_arco(arco):
+        invertido = arco[0] > arco[-1] or (arco[0] == arco[-1] and arco[1] > arco[-2])
+        canonico = tuple(reversed(arco)) if invertido else tuple(arco)
+        resultado = arcos.get(canonico)
+        if resultado is None:
+            puntos = np.asarray(canonico)
+            resultado = [canonico[i] for i in _douglas_peucker(puntos, tolerancia)]
+            arcos[canonico] = resultado
+        return resultado[::-1] if invertido else resultado
+
+    def simplificar_anillo(anillo):
+        vertices = anillo[:-1]
+        n = len(vertices)
+        fijos = [
+            i for i in range(n)
+            if duenos[vertices[i]] != duenos[vertices[i - 1]]
+            or duenos[vertices[i]] != duenos[vertices[(i + 1) % n]]
+        ]
+        if not fijos:
+            # Anillo sin vecinos distintos: se fijan el menor vértice y el más lejano a él
+            inicio = min(range(n), key=lambda i: vertices[i])
+            a = np.asarray(vertices[inicio])
+            lejano = max(range(n), key=lambda i: (np.hypot(*(np.asarray(vertices[i]) - a)), vertices[i]))
+            fijos = sorted({inicio, lejano})
+        resultado = []
+        for k, ini in enumerate(fijos):
+            fin = fijos[(k + 1) % len(fijos)]
+            if fin > ini:
+                arco = vertices[ini:fin + 1]
+            else:
+                arco = vertices[ini:] + vertices[:fin + 1]
+            resultado.extend(simplificar_arco(arco)[:-1])
+        resultado.append(resultado[0])
+        return resultado
+
+    salida = []
+    for feat, poligonos in features:
+        nuevos = []
+        for j, pol in enumerate(poligonos):
+            anillos = [simplificar_anillo(a) for a in pol]
+            exterior, huecos = anillos[0], [h for h in anillos[1:] if len(h) >= 4]
+            if len(exterior) < 4:
+                # Islas que colapsan se descartan, salvo el polígono principal
+                if j > 0 or nuevos:
+                    continue
+                exterior = pol[0]
+            nuevos.append([exterior] + huecos)
+        if len(nuevos) == 1:
+            geometria = {'type': 'Polygon', 'coordinates': nuevos[0]}
+        else:
+            geometria = {'type': 'MultiPolygon', 'coordinates': nuevos}
+        salida.append({
+            'type': 'Feature',
+            'properties': {k: feat['properties'][k] for k in PROPIEDADES},
+            'geometry': geometria,
+        })
+    return {'type': 'FeatureCollection', 'features': salida}
+
+
+def elegir_nivel(grados_por_pixel):
+    """
+    Nivel más simplificado cuya tolerancia no supera medio pixel
+    en pantalla; None si ninguno alcanza (usar la geometría original).
+    """
+    candidatos = [(tol, nivel) for nivel, tol in NIVELES.items() if tol <= grados_por_pixel / 2]
+    return max(candidatos)[1] if candidatos else None
+
+
+@functools.lru_cache(maxsize=None)
+def cargar(nivel=None):
+    """
+    GeoJSON del nivel pedido (None = original). Si el archivo
+    simplificado no existe se usa el original.
+    """
+    ruta = _ruta(nivel)
+    if not os.path.exists(ruta):
+        ruta = _ruta()
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def generar():
+    """
+    Escribe un GeoJSON simplificado por cada nivel de NIVELES.
+    """
+    original = cargar()
+    for nivel, tolerancia in NIVELES.items():
+        geo = simplificar(original, tolerancia)
+        with open(_ruta(nivel), 'w', encoding='utf-8') as f:
+            json.dump(geo, f, ensure_ascii=False, separators=(',', ':'))
+        print(f'{nivel}: tolerancia {tolerancia}, {os.path.getsize(_ruta(nivel)) / 1024:.0f} KB')
+
+
+if __name__ == '__main__':
+    generar()
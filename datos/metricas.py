@@ -0,0 +1,282 @@
+# ------------------------------------------------------------------
+# Archivo: datos/metricas.py
+# Descripción: Latencia de los callbacks de Dash. Cada callback del
+#              servidor se envuelve (instrumentar) y registra su duración,
+#              el tiempo de cada fase (carga, agregación, filtrado,
+#              búsqueda, figura, serialización; el resto queda en
+#              'otros'), los bytes de la respuesta y si la figura salió
+#              de la caché. Los histogramas se publican en formato de
+#              texto de Prometheus (ruta /metrics de app.py); son de cada
+#              proceso.
+#              Con PERFILAR_LENTOS_MS, un muestreador revisa la pila de
+#              los callbacks en curso y, si uno tarda más que ese umbral,
+#              guarda sus pilas en formato "folded" (flamegraph.pl,
+#              speedscope) en PERFILES_DIR.
+# ------------------------------------------------------------------
+import collections
+import contextlib
+import functools
+import os
+import sys
+import threading
+import time
+
+# Límites superiores de los buckets de los histogramas
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Perfilado de callbacks lentos (0 = desactivado) y cada cuánto se toma una muestra
+UMBRAL_PERFIL_S = float(os.environ.get('PERFILAR_LENTOS_MS', '0')) / 1000
+INTERVALO_MUESTRA_S = float(os.environ.get('PERFIL_INTERVALO_MS', '5')) / 1000
+DIR_PERFILES = os.environ.get('PERFILES_DIR', 'perfiles')
+
+
+class Histograma:
+    """
+    Histograma acumulado por combinación de etiquetas, como los de
+    Prometheus: cuenta por bucket, suma y total de observaciones.
+    """
+
+    def __init__(self, nombre, ayuda, etiquetas, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *etiquetas):
+        with self._lock:
+            serie = self._series.get(etiquetas)
+            if serie is None:
+                serie = self._series[etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie[0][i] += 1
+                    break
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        with self._lock:
+            series = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for etiquetas, (cuentas, suma, total) in series:
+            base = _etiquetas(zip(self.etiquetas, etiquetas))
+            acumulado = 0
+            for limite, cuenta in zip(self.buckets, cuentas):
+                acumulado += cuenta
+                lineas.append(f'{self.nombre}_bucket{{{base}le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{{base}le="+Inf"}} {total}')
+            lineas.append(f'{self.nombre}_sum{{{base.rstrip(",")}}} {suma}')
+            lineas.append(f'{self.nombre}_count{{{base.rstrip(",")}}} {total}')
+        return lineas
+
+
+class Contador:
+    """
+    Contador acumulado por combinación de etiquetas.
+    """
+
+    def __init__(self, nombre, ayuda, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = collections.Counter()
+        self._lock = threading.Lock()
+
+    def sumar(self, *etiquetas, n=1):
+        with self._lock:
+            self._series[etiquetas] += n
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        with self._lock:
+            series = sorted(self._series.items())
+        for etiquetas, valor in series:
+            lineas.append(f'{self.nombre}{{{_etiquetas(zip(self.etiquetas, etiquetas)).rstrip(",")}}} {valor}')
+        return lineas
+
+
+def _etiquetas(pares):
+    # 'k1="v1",k2="v2",' con las comillas y barras escapadas
+    return ''.join('{}="{}",'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                   for k, v in pares)
+
+
+duracion = Histograma('dash_callback_duracion_segundos', 'Duración total de cada callback.',
+                      ('callback', 'cache'), BUCKETS_SEGUNDOS)
+fases = Histograma('dash_callback_fase_segundos', 'Tiempo propio de cada fase dentro del callback.',
+                   ('callback', 'fase'), BUCKETS_SEGUNDOS)
+respuesta = Histograma('dash_callback_respuesta_bytes', 'Bytes de la respuesta JSON del callback.',
+                       ('callback',), BUCKETS_BYTES)
+excepciones = Contador('dash_callback_excepciones_total',
+                       'Callbacks que terminaron con una excepción (incluye PreventUpdate).',
+                       ('callback', 'tipo'))
+perfiles = Contador('dash_callback_perfiles_total', 'Perfiles guardados de callbacks lentos.', ('callback',))
+_METRICAS = (duracion, fases, respuesta, excepciones, perfiles)
+
+_hilo = threading.local()
+
+
+class _Medicion:
+    """
+    Lo que acumula un callback en curso: tiempo propio por fase y
+    resultado de la caché de figuras.
+    """
+
+    def __init__(self):
+        self.fases = collections.defaultdict(float)
+        self.pila = []
+        self.cache = 'sin_cache'
+
+
+@contextlib.contextmanager
+def fase(nombre):
+    """
+    Mide el bloque como la fase `nombre` del callback en curso. Las fases
+    anidadas se descuentan de la que las contiene. Fuera de un callback
+    no hace nada.
+    """
+    medicion = getattr(_hilo, 'medicion', None)
+    if medicion is None:
+        yield
+        return
+    entrada = [time.perf_counter(), 0.0]
+    medicion.pila.append(entrada)
+    try:
+        yield
+    finally:
+        medicion.pila.pop()
+        transcurrido = time.perf_counter() - entrada[0]
+        medicion.fases[nombre] += transcurrido - entrada[1]
+        if medicion.pila:
+            medicion.pila[-1][1] += transcurrido
+
+
+def resultado_cache(resultado):
+    """
+    Anota en el callback en curso si la figura fue un 'acierto' o un 'fallo'
+    de la caché (uno solo cuenta como fallo si hubo varios).
+    """
+    medicion = getattr(_hilo, 'medicion', None)
+    if medicion is not None and medicion.cache != 'fallo':
+        medicion.cache = resultado
+
+
+class _Muestreador:
+    """
+    Hilo que cada INTERVALO_MUESTRA_S toma la pila de los hilos que están
+    en un callback y la acumula como línea "folded" (marcos separados por ';').
+    """
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self._pilas = {}
+        self._lock = threading.Lock()
+        self._trabajador = None
+
+    def registrar(self, id_hilo):
+        with self._lock:
+            self._pilas[id_hilo] = collections.Counter()
+            if self._trabajador is None or not self._trabajador.is_alive():
+                # Por proceso: tras el fork de gunicorn el hilo del maestro no existe
+                self._trabajador = threading.Thread(target=self._muestrear, name='perfil-callbacks', daemon=True)
+                self._trabajador.start()
+
+    def soltar(self, id_hilo):
+        with self._lock:
+            return self._pilas.pop(id_hilo, collections.Counter())
+
+    def _muestrear(self):
+        while True:
+            time.sleep(self.intervalo)
+            marcos = sys._current_frames()
+            with self._lock:
+                for id_hilo, pilas in self._pilas.items():
+                    marco = marcos.get(id_hilo)
+                    if marco is not None:
+                        pilas[_plegar(marco)] += 1
+
+
+def _plegar(marco):
+    pila = []
+    while marco is not None:
+        codigo = marco.f_code
+        pila.append(f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{marco.f_lineno})')
+        marco = marco.f_back
+    return ';'.join(reversed(pila))
+
+
+_muestreador = _Muestreador(INTERVALO_MUESTRA_S) if UMBRAL_PERFIL_S > 0 else None
+
+
+def _guardar_perfil(nombre, segundos, pilas):
+    os.makedirs(DIR_PERFILES, exist_ok=True)
+    ruta = os.path.join(DIR_PERFILES, f'{nombre}-{time.strftime("%Y%m%d-%H%M%S")}-'
+                                      f'{os.getpid()}-{int(segundos * 1000)}ms.folded')
+    with open(ruta, 'w', encoding='utf-8') as f:
+        for pila, muestras in pilas.most_common():
+            f.write(f'{pila} {muestras}\n')
+    perfiles.sumar(nombre)
+
+
+def medir(nombre, func):
+    """
+    Envuelve `func` (la función que Dash llama para un callback y que
+    devuelve la respuesta JSON) para medir su duración, fases y bytes.
+    """
+    @functools.wraps(func)
+    def envoltura(*args, **kwargs):
+        medicion = _hilo.medicion = _Medicion()
+        id_hilo = threading.get_ident()
+        if _muestreador is not None:
+            _muestreador.registrar(id_hilo)
+        inicio = time.perf_counter()
+        try:
+            salida = func(*args, **kwargs)
+        except Exception as error:
+            excepciones.sumar(nombre, type(error).__name__)
+            raise
+        finally:
+            total = time.perf_counter() - inicio
+            _hilo.medicion = None
+            pilas = _muestreador.soltar(id_hilo) if _muestreador is not None else None
+            duracion.observar(total, nombre, medicion.cache)
+            for nombre_fase, segundos in medicion.fases.items():
+                fases.observar(segundos, nombre, nombre_fase)
+            fases.observar(max(total - sum(medicion.fases.values()), 0.0), nombre, 'otros')
+            if pilas and total >= UMBRAL_PERFIL_S:
+                _guardar_perfil(nombre, total, pilas)
+        if isinstance(salida, str):
+            # Bytes que viajan (UTF-8), no caracteres: los nombres llevan tildes
+            respuesta.observar(len(salida.encode('utf-8')), nombre)
+        elif isinstance(salida, bytes):
+            respuesta.observar(len(salida), nombre)
+        return salida
+    return envoltura
+
+
+def instrumentar(app):
+    """
+    Envuelve todos los callbacks del servidor ya registrados en `app`
+    (los clientside no pasan por el servidor). Se llama una vez, después
+    de registrar los callbacks.
+    """
+    for datos in app.callback_map.values():
+        func = datos.get('callback')
+        if func is None or getattr(func, '_medido', False):
+            continue
+        nombre = getattr(func, '__name__', 'callback')
+        datos['callback'] = medir(nombre, func)
+        datos['callback']._medido = True
+
+
+def exponer():
+    """
+    Todas las métricas del proceso en el formato de texto de Prometheus.
+    """
+    lineas = []
+    for metrica in _METRICAS:
+        lineas.extend(metrica.exponer())
+    return '\n'.join(lineas) + '\n'
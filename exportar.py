@@ -0,0 +1,373 @@
+# ------------------------------------------------------------------
+# Archivo: exportar.py
+# Descripción: Exporta el tablero como sitio estático (python -m exportar).
+#              Recorre todas las rutas de paginas/registro.py y, en cada
+#              una, todas las combinaciones de sus filtros globales (cada
+#              opción de sus dropdowns más "Todos") y de la selección de
+#              años. Lo que muestra la página en cada combinación sale de
+#              la función `exportar(filtros, anios_sel)` de su módulo y se
+#              guarda como JSON; con --imagenes (requiere kaleido) también
+#              cada figura como imagen. El layout de cada página se
+#              convierte a HTML y un script pequeño cambia las figuras al
+#              mover los filtros, sin ejecutar Python: el sitio se sirve
+#              con cualquier servidor de archivos o CDN. La app de Dash
+#              sigue siendo la versión interactiva completa (búsqueda de
+#              municipios, paginado de la tabla, árbol de causas).
+# ------------------------------------------------------------------
+import argparse
+import html
+import itertools
+import json
+import os
+import re
+import shutil
+import time
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.utils import PlotlyJSONEncoder
+
+from datos import almacen
+from paginas import registro
+
+try:
+    import kaleido  # noqa: F401
+except ImportError:  # kaleido es opcional: sin él sólo se exportan los JSON
+    kaleido = None
+
+# Archivo que marca una carpeta como exportación (se puede reemplazar)
+MANIFIESTO = 'exportacion.json'
+
+# Propiedades de estilo numéricas que React no convierte a píxeles
+_SIN_UNIDAD = {'fontWeight', 'opacity', 'zIndex', 'flex', 'flexGrow', 'flexShrink', 'lineHeight', 'order'}
+
+# Cambia las figuras y tablas de la página según los filtros. La clave de
+# cada combinación es el JSON compacto de [años, filtro1, filtro2, ...],
+# igual en Python (json.dumps) y en el navegador (JSON.stringify). Los
+# filtros se recuerdan entre páginas en sessionStorage, como en la app.
+_SCRIPT = r"""(function () {
+  var cfg = window.EXPORTACION;
+  var ids = ['filtro-anios'].concat(cfg.filtros.map(function (f) { return f[1]; }));
+
+  function valor(id) {
+    var el = document.getElementById(id);
+    return el ? JSON.parse(el.value) : null;
+  }
+
+  function texto(v) {
+    var div = document.createElement('div');
+    div.textContent = v === null || v === undefined ? '' : String(v);
+    return div.innerHTML;
+  }
+
+  function tabla(el, filas) {
+    var columnas = JSON.parse(el.dataset.columnas);
+    el.innerHTML = '<thead><tr>' + columnas.map(function (c) {
+      return '<th>' + texto(c.name) + '</th>';
+    }).join('') + '</tr></thead><tbody>' + filas.map(function (fila) {
+      return '<tr>' + columnas.map(function (c) { return '<td>' + texto(fila[c.id]) + '</td>'; }).join('') + '</tr>';
+    }).join('') + '</tbody>';
+  }
+
+  function mostrar() {
+    var n = cfg.combinaciones[JSON.stringify(ids.map(valor))];
+    if (n === undefined) return;
+    fetch(n + '.json').then(function (r) { return r.json(); }).then(function (salidas) {
+      Object.keys(salidas).forEach(function (id) {
+        var el = document.getElementById(id);
+        var salida = salidas[id];
+        if (!el) return;
+        if (el.tagName === 'TABLE') tabla(el, salida);
+        else if (typeof salida === 'string') el.textContent = salida;
+        else Plotly.react(el, salida.data, salida.layout, {responsive: true});
+      });
+    });
+  }
+
+  function guardar() {
+    var filtros = JSON.parse(sessionStorage.getItem('filtros-globales') || '{}');
+    cfg.filtros.forEach(function (f) { filtros[f[0]] = valor(f[1]); });
+    filtros.anios = document.getElementById('filtro-anios').value;
+    sessionStorage.setItem('filtros-globales', JSON.stringify(filtros));
+  }
+
+  var guardados = JSON.parse(sessionStorage.getItem('filtros-globales') || '{}');
+  cfg.filtros.forEach(function (f) {
+    var el = document.getElementById(f[1]);
+    if (el && f[0] in guardados) el.value = JSON.stringify(guardados[f[0]]);
+  });
+  var anios = document.getElementById('filtro-anios');
+  if (anios && guardados.anios) anios.value = guardados.anios;
+  // Un valor guardado que no es opción de la página deja el select vacío
+  ids.forEach(function (id) {
+    var el = document.getElementById(id);
+    if (el && el.selectedIndex < 0) el.selectedIndex = 0;
+    if (el) el.addEventListener('change', function () { guardar(); mostrar(); });
+  });
+  mostrar();
+})();
+"""
+
+_CSS = """body { margin: 0; background: black; font-family: sans-serif; }
+select { padding: 6px; background: fuchsia; color: black; font-weight: bold; border: none; border-radius: 4px; }
+table { width: 100%; border-collapse: collapse; }
+th { background: fuchsia; color: white; text-align: left; padding: 6px; }
+td { color: white; padding: 6px; border-bottom: 1px solid #333; }
+.aviso { color: #aaa; text-align: center; padding: 10px; margin: 0; }
+.aviso a { color: fuchsia; }
+"""
+
+
+def _nativo(valor):
+    # Los valores de las opciones pueden ser escalares de numpy
+    return valor.item() if hasattr(valor, 'item') else valor
+
+
+def _clave(valores):
+    return json.dumps(valores, ensure_ascii=False, separators=(',', ':'))
+
+
+def selecciones_anios(cada_anio=False):
+    """
+    Selecciones del selector de años que se exportan: la inicial y, con
+    `cada_anio`, cada año por separado y todos juntos.
+    """
+    selecciones = [list(almacen.anios_defecto())]
+    if cada_anio:
+        disponibles = list(almacen.anios())
+        selecciones += [[a] for a in disponibles] + [disponibles]
+    unicas = []
+    for seleccion in selecciones:
+        if seleccion not in unicas:
+            unicas.append(seleccion)
+    return unicas
+
+
+def dominios(pagina):
+    """
+    Valores de cada filtro global de la página (en el orden de
+    `pagina.filtros`): None ("Todos") y cada opción de su dropdown.
+    """
+    por_id = {c.id: c for c in registro._con_id(pagina.obtener_layout())}
+    resultado = []
+    for id_dropdown in pagina.filtros.values():
+        opciones = getattr(por_id[id_dropdown], 'options', None) or []
+        valores = [_nativo(o['value'] if isinstance(o, dict) else o) for o in opciones]
+        resultado.append([None] + valores)
+    return resultado
+
+
+def _enlace(href, prefijo):
+    # '/mapa' -> '../mapa/index.html' (relativo, para servir desde cualquier carpeta)
+    if not href.startswith('/'):
+        return href
+    ruta = href.strip('/')
+    return prefijo + (ruta + '/' if ruta else '') + 'index.html'
+
+
+def _estilo(estilo, prefijo):
+    partes = []
+    for propiedad, valor in (estilo or {}).items():
+        if isinstance(valor, (int, float)) and propiedad not in _SIN_UNIDAD:
+            valor = f'{valor}px'
+        valor = re.sub(r"url\('/?assets/", f"url('{prefijo}assets/", str(valor))
+        propiedad = re.sub('([A-Z])', r'-\1', propiedad).lower()
+        partes.append(f'{propiedad}:{valor}')
+    return html.escape(';'.join(partes))
+
+
+def _atributos(componente, prefijo, estilo=None):
+    atributos = ''
+    if getattr(componente, 'id', None) is not None:
+        atributos += f' id="{html.escape(str(componente.id))}"'
+    if getattr(componente, 'className', None):
+        atributos += f' class="{html.escape(componente.className)}"'
+    estilo = estilo if estilo is not None else getattr(componente, 'style', None)
+    if estilo:
+        atributos += f' style="{_estilo(estilo, prefijo)}"'
+    return atributos
+
+
+def _opcion(valor, etiqueta, seleccionada=False):
+    marca = ' selected' if seleccionada else ''
+    return f'<option value="{html.escape(_clave(valor))}"{marca}>{html.escape(str(etiqueta))}</option>'
+
+
+def a_html(componente, prefijo, interactivos):
+    """
+    HTML de un árbol de componentes de Dash: los de html.* tal cual, los
+    dcc.Link como enlaces, los dropdowns de `interactivos` como <select>
+    (el resto, deshabilitados), los gráficos como <div> y las DataTable
+    como <table> con sus filas iniciales.
+    """
+    if componente is None:
+        return ''
+    if isinstance(componente, (list, tuple)):
+        return ''.join(a_html(hijo, prefijo, interactivos) for hijo in componente)
+    if not hasattr(componente, 'to_plotly_json'):
+        return html.escape(str(componente))
+    tipo = type(componente).__name__
+    hijos = a_html(getattr(componente, 'children', None), prefijo, interactivos)
+
+    if componente._namespace == 'dash_html_components':
+        etiqueta = tipo.lower()
+        atributos = _atributos(componente, prefijo)
+        if etiqueta == 'img':
+            atributos += f' src="{html.escape(re.sub("^/?assets/", prefijo + "assets/", componente.src))}"'
+            return f'<img{atributos}>'
+        if etiqueta == 'a' and getattr(componente, 'href', None):
+            atributos += f' href="{html.escape(_enlace(componente.href, prefijo))}"'
+        if etiqueta == 'button' and getattr(componente, 'disabled', False):
+            atributos += ' disabled'
+        return f'<{etiqueta}{atributos}>{hijos}</{etiqueta}>'
+    if tipo == 'Link':
+        return f'<a href="{html.escape(_enlace(componente.href, prefijo))}">{hijos}</a>'
+    if tipo == 'Dropdown':
+        valor = getattr(componente, 'value', None)
+        opciones = [_opcion(None, getattr(componente, 'placeholder', None) or 'Todos', valor is None)]
+        if componente.id in interactivos:
+            for o in getattr(componente, 'options', None) or []:
+                v, etiqueta = (o['value'], o['label']) if isinstance(o, dict) else (o, o)
+                opciones.append(_opcion(_nativo(v), etiqueta, _nativo(v) == valor))
+        deshabilitado = '' if componente.id in interactivos else ' disabled'
+        estilo = {k: v for k, v in (getattr(componente, 'style', None) or {}).items() if k == 'width'}
+        return f'<select{_atributos(componente, prefijo, estilo)}{deshabilitado}>{"".join(opciones)}</select>'
+    if tipo == 'Graph':
+        return f'<div{_atributos(componente, prefijo)}></div>'
+    if tipo == 'DataTable':
+        columnas = [{'id': c['id'], 'name': c['name']} for c in componente.columns]
+        filas = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(f.get(c["id"], "")))}</td>' for c in columnas)
+                        + '</tr>' for f in getattr(componente, 'data', None) or [])
+        cabecera = ''.join(f'<th>{html.escape(c["name"])}</th>' for c in columnas)
+        return (f'<table id="{html.escape(componente.id)}" data-columnas="{html.escape(_clave(columnas))}">'
+                f'<thead><tr>{cabecera}</tr></thead><tbody>{filas}</tbody></table>')
+    if tipo in ('Store', 'Location', 'Interval'):
+        return ''
+    return hijos
+
+
+def _selector_anios(selecciones):
+    # El mismo selector de app.py, con las selecciones exportadas
+    opciones = ''.join(_opcion(s, almacen.texto_anios(s), i == 0) for i, s in enumerate(selecciones))
+    return ('<div style="display:flex;align-items:center;padding:10px 20px;background-color:black">'
+            '<label style="color:white;margin-right:8px">Años:</label>'
+            f'<select id="filtro-anios">{opciones}</select></div>')
+
+
+def _documento(contenido, prefijo, config, url_app, ruta):
+    titulo = f'Análisis de Mortalidad en Colombia {almacen.texto_anios()}'
+    aviso = ''
+    if url_app:
+        enlace = html.escape(url_app.rstrip('/') + ruta)
+        aviso = f'<p class="aviso">Versión estática. <a href="{enlace}">Abrir la versión interactiva</a></p>'
+    scripts = ''
+    if config is not None:
+        # '</' escapado: el JSON va dentro de un <script>
+        datos = json.dumps(config, ensure_ascii=False).replace('</', '<\\/')
+        scripts = (f'<script src="{prefijo}plotly.min.js"></script>'
+                   f'<script>window.EXPORTACION = {datos};</script>'
+                   f'<script src="{prefijo}estatico.js"></script>')
+    return (f'<!DOCTYPE html><html lang="es"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>{html.escape(titulo)}</title><link rel="stylesheet" href="{prefijo}estatico.css">'
+            f'</head><body>{contenido}{aviso}{scripts}</body></html>')
+
+
+def exportar_pagina(pagina, carpeta, selecciones, imagenes=None, url_app=None):
+    """
+    Escribe index.html y un JSON por combinación de filtros de `pagina`
+    en `carpeta`. Devuelve el número de combinaciones.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    prefijo = '../' * (pagina.ruta.strip('/').count('/') + 1) if pagina.ruta != '/' else ''
+    modulo = pagina.importar()
+    exportar = getattr(modulo, 'exportar', None)
+    layout = pagina.obtener_layout()
+    contenido = a_html(layout, prefijo, set(pagina.filtros.values()))
+    if exportar is None:
+        documento = _documento(contenido, prefijo, None, url_app, pagina.ruta)
+        with open(os.path.join(carpeta, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(documento)
+        return 0
+
+    combinaciones = {}
+    nombres = list(pagina.filtros)
+    for anios_sel in selecciones:
+        for valores in itertools.product(*dominios(pagina)):
+            n = len(combinaciones)
+            combinaciones[_clave([anios_sel, *valores])] = n
+            salidas = exportar(dict(zip(nombres, valores)), anios_sel)
+            with open(os.path.join(carpeta, f'{n}.json'), 'w', encoding='utf-8') as f:
+                json.dump(salidas, f, cls=PlotlyJSONEncoder, ensure_ascii=False, separators=(',', ':'))
+            if imagenes:
+                for id_salida, salida in salidas.items():
+                    if isinstance(salida, dict) or hasattr(salida, 'to_plotly_json'):
+                        pio.write_image(salida, os.path.join(carpeta, f'{n}-{id_salida}.{imagenes}'))
+
+    config = {'filtros': [[k, v] for k, v in pagina.filtros.items()], 'combinaciones': combinaciones}
+    documento = _documento(_selector_anios(selecciones) + contenido, prefijo, config, url_app, pagina.ruta)
+    with open(os.path.join(carpeta, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(documento)
+    return len(combinaciones)
+
+
+def exportar_sitio(salida, cada_anio=False, imagenes=None, url_app=None):
+    """
+    Exporta todas las páginas a `salida`. Se escribe en una carpeta
+    temporal que después reemplaza a `salida`: quien la esté sirviendo
+    nunca ve una exportación a medias.
+    """
+    salida = os.path.abspath(salida)
+    if os.path.isdir(salida) and os.listdir(salida) and not os.path.exists(os.path.join(salida, MANIFIESTO)):
+        raise SystemExit(f'{salida} no está vacía y no es una exportación anterior: no se reemplaza')
+    temporal = salida + '.tmp'
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+
+    inicio = time.perf_counter()
+    with almacen.usar() as version_datos:
+        selecciones = selecciones_anios(cada_anio)
+        paginas = {}
+        for pagina in registro.PAGINAS:
+            t = time.perf_counter()
+            carpeta = os.path.join(temporal, *[p for p in pagina.ruta.split('/') if p])
+            paginas[pagina.ruta] = exportar_pagina(pagina, carpeta, selecciones, imagenes, url_app)
+            print(f'{pagina.ruta:28s} {paginas[pagina.ruta]:6d} combinaciones  {time.perf_counter() - t:7.1f} s')
+
+        with open(os.path.join(temporal, 'plotly.min.js'), 'w', encoding='utf-8') as f:
+            f.write(get_plotlyjs())
+        with open(os.path.join(temporal, 'estatico.js'), 'w', encoding='utf-8') as f:
+            f.write(_SCRIPT)
+        with open(os.path.join(temporal, 'estatico.css'), 'w', encoding='utf-8') as f:
+            f.write(_CSS)
+        shutil.copytree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets'),
+                        os.path.join(temporal, 'assets'))
+        with open(os.path.join(temporal, MANIFIESTO), 'w', encoding='utf-8') as f:
+            json.dump({'version_datos': version_datos.id, 'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                       'anios': selecciones, 'paginas': paginas}, f, ensure_ascii=False, indent=1)
+
+    anterior = salida + '.anterior'
+    shutil.rmtree(anterior, ignore_errors=True)
+    if os.path.exists(salida):
+        os.rename(salida, anterior)
+    os.rename(temporal, salida)
+    shutil.rmtree(anterior, ignore_errors=True)
+    print(f'{sum(paginas.values())} combinaciones en {time.perf_counter() - inicio:.1f} s -> {salida}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Exporta el tablero como sitio estático')
+    parser.add_argument('--salida', default='estatico', help='carpeta del sitio (se reemplaza completa)')
+    parser.add_argument('--cada-anio', action='store_true',
+                        help='además de la selección inicial, exporta cada año y todos los años juntos')
+    parser.add_argument('--imagenes', choices=('png', 'svg', 'webp'),
+                        help='guarda también cada figura como imagen (requiere kaleido)')
+    parser.add_argument('--url-app', help='URL de la app de Dash: cada página enlaza a su versión interactiva')
+    args = parser.parse_args()
+    if args.imagenes and kaleido is None:
+        parser.error('--imagenes requiere kaleido (pip install kaleido)')
+    exportar_sitio(args.salida, args.cada_anio, args.imagenes, args.url_app)
+
+
+if __name__ == '__main__':
+    main()
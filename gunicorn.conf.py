@@ -0,0 +1,35 @@
+# ------------------------------------------------------------------
+# Archivo: gunicorn.conf.py
+# Descripción: Configuración de producción. gunicorn la lee sola desde la
+#              raíz del proyecto:
+#                  gunicorn            (o gunicorn -c gunicorn.conf.py)
+#
+# Variables de entorno:
+#   PORT              puerto (lo define Render; 8050 por defecto)
+#   WEB_CONCURRENCY   workers (por defecto uno por CPU, máximo 8)
+#   GUNICORN_THREADS  hilos por worker (4 por defecto; 1 = worker síncrono)
+#   GUNICORN_TIMEOUT  segundos antes de reiniciar un worker colgado (60)
+#   GUNICORN_MAX_REQUESTS  reciclar cada worker tras N peticiones (0 = nunca)
+# ------------------------------------------------------------------
+import multiprocessing
+import os
+
+wsgi_app = 'wsgi:server'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+
+# Los callbacks usan CPU (pandas, serialización) y casi todos aciertan en
+# cubos o en la caché de figuras: un proceso por CPU con varios hilos rinde
+# más que muchos procesos síncronos compitiendo por los mismos núcleos
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 8)))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Cargar la app (y todos los datos) en el maestro antes del fork
+preload_app = True
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+errorlog = '-'
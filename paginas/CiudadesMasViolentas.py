@@ -4,31 +4,27 @@
 #              con mayor número de muertes, con filtros de Mes y Sexo,
 #              y navegación.
 # ------------------------------------------------------------------
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
 from dash.dependencies import Input, Output
 
-# Ruta al CSV procesado
-# CSV con columnas: COD_MUNICIPIO;MES;SEXO;Muertes;MUNICIPIO
-DATA_CSV = 'ArchivosProcesados/MuertesPorMunicipio.csv'
+from datos import almacen, cache_figuras, cubos
+from paginas import registro
 
-df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
+# Datos compartidos con IndiceMortalidad (se leen al visitar la página)
+# Columnas: COD_DEPARTAMENTO;COD_MUNICIPIO;MES;SEXO;Muertes;MUNICIPIO;DEPARTAMENTO
+# (+ mes_nombre, ETIQUETA_MUNICIPIO)
+def _df():
+    return almacen.obtener('MuertesPorMunicipio')
 
-# Convertir tipos
-df['MES'] = df['MES'].astype(int)
-df['Muertes'] = df['Muertes'].astype(int)
 
-# Mapear MES numérico a nombre
-mes_map = {
-    1:'Enero',2:'Febrero',3:'Marzo',4:'Abril',5:'Mayo',6:'Junio',
-    7:'Julio',8:'Agosto',9:'Septiembre',10:'Octubre',11:'Noviembre',12:'Diciembre'
-}
-df['mes_nombre'] = df['MES'].map(mes_map)
+# Muertes por municipio (departamento + municipio) para cada Mes y Sexo
+# (cubo compartido con IndiceMortalidad)
+_cubo = cubos.definir('municipio', 'MuertesPorMunicipio', ['mes_nombre', 'SEXO'],
+                      almacen.CLAVE_MUNICIPIO + ['ETIQUETA_MUNICIPIO'])
 
-# Opciones de Mes y Sexo
-o_months = list(mes_map.values())
-sexos = sorted(df['SEXO'].unique())
+# Opciones de Mes
+o_months = almacen.O_MONTHS
 
 
 def layout_ciudades_mas_violentas():
@@ -41,7 +37,7 @@ def layout_ciudades_mas_violentas():
         html.Div([
             html.Label('Mes:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
-                id='filtro-mes',
+                id='filtro-mes-ciudades',
                 options=[{'label': m, 'value': m} for m in o_months],
                 placeholder='Todos', clearable=True,
                 style={'width':'160px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
@@ -51,8 +47,8 @@ def layout_ciudades_mas_violentas():
         html.Div([
             html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
-                id='filtro-sexo',
-                options=[{'label': s, 'value': s} for s in sexos],
+                id='filtro-sexo-ciudades',
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos', clearable=True,
                 style={'width':'140px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -89,42 +85,74 @@ def layout_ciudades_mas_violentas():
     return html.Div([controls, title, graph], style={'backgroundColor':'black','minHeight':'100vh'})
 
 
+def figura_ciudades(mes_sel, sexo_sel, anios_sel=None):
+    """
+    Barras de los 5 municipios con más muertes para los filtros dados,
+    o un aviso si los datos por municipio no son confiables.
+    """
+    if not almacen.confiable(_cubo.dataset, anios_sel):
+        return registro.figura_aviso()
+    # Muertes por municipio y top 5
+    df_grp = _cubo.consultar(anios_sel, mes_sel, sexo_sel)
+    df_top = df_grp.nlargest(5, 'Muertes')
+
+    # Gráfico de barras verticales con escala rojo→amarillo→verde
+    fig = px.bar(
+        df_top,
+        x='ETIQUETA_MUNICIPIO', y='Muertes',
+        labels={'ETIQUETA_MUNICIPIO':'Ciudad', 'Muertes':'# Muertes por Homicidio en colombia'},
+        color='Muertes',
+        color_continuous_scale=['red','yellow','green'],
+        range_color=(df_top['Muertes'].min(), df_top['Muertes'].max())
+    )
+    fig.update_layout(
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        title=f'Top 5 Ciudades Con mas Muertes por Homicidio ({almacen.texto_anios(anios_sel)})',
+        title_font_color='fuchsia', title_font_size=28,
+        margin={'r':0,'t':50,'l':0,'b':0},
+        xaxis_tickangle=-45
+    )
+    fig.update_traces(marker_line_color='white', marker_line_width=1)
+    return fig
+
+
+def precargar():
+    """
+    Carga los datos y el cubo de la página (primera visita o calentamiento).
+    """
+    if almacen.confiable(_cubo.dataset, almacen.anios_defecto()):
+        _cubo.asegurar()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché la figura del estado global de los filtros (antes de
+    que el usuario llegue a la página).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    cache_figuras.obtener_o_construir('grafico-ciudades', valores, lambda: figura_ciudades(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura de la página para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    return {'grafico-ciudades': cache_figuras.obtener_o_construir(
+        'grafico-ciudades', valores, lambda: figura_ciudades(*valores)
+    )}
+
+
 def register_callbacks_ciudades_mas_violentas(app):
     """
     Registra callback para graficar top 5 municipios.
     """
     @app.callback(
         Output('grafico-ciudades','figure'),
-        Input('filtro-mes','value'),
-        Input('filtro-sexo','value')
+        Input('filtro-mes-ciudades','value'),
+        Input('filtro-sexo-ciudades','value'),
+        Input('filtro-anios','value')
     )
-    def update_ciudades(mes_sel, sexo_sel):
-        # Filtrar datos
-        df_f = df.copy()
-        if mes_sel:
-            df_f = df_f[df_f['mes_nombre']==mes_sel]
-        if sexo_sel:
-            df_f = df_f[df_f['SEXO']==sexo_sel]
-
-        # Agrupar y seleccionar top 5
-        df_grp = df_f.groupby('MUNICIPIO', as_index=False).agg({'Muertes':'sum'})
-        df_top = df_grp.nlargest(5, 'Muertes')
-
-        # Gráfico de barras verticales con escala rojo→amarillo→verde
-        fig = px.bar(
-            df_top,
-            x='MUNICIPIO', y='Muertes',
-            labels={'CIUDAD':'Ciudad', 'Muertes':'# Muertes por Homicidio en colombia'},
-            color='Muertes',
-            color_continuous_scale=['red','yellow','green'],
-            range_color=(df_top['Muertes'].min(), df_top['Muertes'].max())
-        )
-        fig.update_layout(
-            paper_bgcolor='black', plot_bgcolor='black', font_color='white',
-            title='Top 5 Ciudades Con mas Muertes por Homicidio',
-            title_font_color='fuchsia', title_font_size=28,
-            margin={'r':0,'t':50,'l':0,'b':0},
-            xaxis_tickangle=-45
-        )
-        fig.update_traces(marker_line_color='white', marker_line_width=1)
-        return fig
+    @cache_figuras.memoizar('grafico-ciudades')
+    def update_ciudades(mes_sel, sexo_sel, anios_sel):
+        return figura_ciudades(mes_sel, sexo_sel, anios_sel)
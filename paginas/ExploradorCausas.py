@@ -0,0 +1,155 @@
+# ------------------------------------------------------------------
+# Archivo: paginas/ExploradorCausas.py
+# Descripción: Layout y callbacks del explorador de causas de muerte:
+#              parte de los capítulos CIE-10 y, al hacer clic en una
+#              fila, baja a los códigos de tres y de cuatro caracteres.
+#              Cada paso lee los hijos del nodo en JerarquiaCIE10
+#              (calculada en el ETL), sin volver a agrupar los datos. El
+#              buscador salta a cualquier código por código o descripción.
+# ------------------------------------------------------------------
+from dash import html, dcc, ctx, no_update
+from dash.dependencies import Input, Output, State
+from dash_table import DataTable
+
+from datos import almacen, causas
+
+_BOTON = {
+    'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
+    'border':'none','borderRadius':'5px','fontSize':'14px','cursor':'pointer'
+}
+
+
+def _ruta_texto(codigo, anios_sel=None):
+    # Migas de pan: CIE-10 › Capítulo 9 › I21 Infarto agudo del miocardio
+    partes = ['CIE-10']
+    for nivel, cod, descripcion in causas.ruta(codigo, anios_sel):
+        partes.append(f'Capítulo {cod}' if nivel == 'capitulo' else f'{cod} {descripcion}')
+    return ' › '.join(partes)
+
+
+def layout_explorador_causas():
+    """
+    Layout del explorador de causas: migas de pan, botón para subir un
+    nivel y tabla con los hijos del nodo actual.
+    """
+    controls = html.Div([
+        html.Button('Subir un nivel', id='explorador-subir', n_clicks=0, disabled=True,
+                    style=_BOTON),
+        html.Div(id='explorador-ruta', children=_ruta_texto(almacen.RAIZ_CIE10, almacen.anios_defecto()),
+                 style={'color':'white','marginLeft':'20px','marginRight':'20px','fontSize':'16px'}),
+        dcc.Dropdown(
+            id='explorador-buscar', options=[],
+            placeholder='Buscar causa o código...', clearable=True,
+            style={'width':'360px','backgroundColor':'fuchsia','color':'black','marginRight':'auto'}
+        ),
+        html.Div(dcc.Link(html.Button('Volver', style=_BOTON), href='/tabla-causas-muertes'),
+                 style={'marginRight':'10px','alignSelf':'center'}),
+        html.Div(dcc.Link(html.Button('Siguiente', style=_BOTON), href='/histograma-mortalidad'),
+                 style={'alignSelf':'center'})
+    ], style={'display':'flex','alignItems':'center','padding':'20px','backgroundColor':'black'})
+
+    title = html.H2(
+        'Explorador de Causas de Muerte (CIE-10)',
+        style={'textAlign':'center','color':'fuchsia','fontSize':'32px','margin':'20px 0'}
+    )
+
+    # Nodo actual del árbol (la raíz: los capítulos)
+    nodo = dcc.Store(id='explorador-nodo', data=almacen.RAIZ_CIE10)
+
+    table = DataTable(
+        id='explorador-tabla',
+        columns=[
+            {'name':'Código', 'id':'CODIGO'},
+            {'name':'Causa', 'id':'DESCRIPCION'},
+            {'name':'Casos', 'id':'Muertes', 'type':'numeric'},
+            {'name':'% del nivel', 'id':'Porcentaje', 'type':'numeric'}
+        ],
+        data=causas.hijos(anios=almacen.anios_defecto()),
+        sort_action='native',
+        style_table={'overflowX': 'auto','backgroundColor':'black'},
+        style_header={'backgroundColor':'fuchsia','color':'white','fontWeight':'bold'},
+        style_cell={'backgroundColor':'black','color':'white','textAlign':'left','cursor':'pointer'}
+    )
+
+    help_text = html.P(
+        'Haga clic en una fila para ver sus subcategorías.',
+        style={'color':'white','textAlign':'center','padding':'10px'}
+    )
+
+    return html.Div([controls, title, nodo, table, help_text],
+                    style={'backgroundColor':'black','minHeight':'100vh'})
+
+
+def precargar():
+    """
+    Construye el índice del árbol de causas (primera visita o calentamiento).
+    """
+    causas.precargar_jerarquia()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja construido el árbol de causas de los años `anios_sel` (la página
+    no tiene otros filtros).
+    """
+    causas.hijos(anios=anios_sel)
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Capítulos de la CIE-10 de los años `anios_sel` (sitio estático: sólo
+    el primer nivel del árbol).
+    """
+    return {'explorador-tabla': causas.hijos(anios=anios_sel),
+            'explorador-ruta': _ruta_texto(almacen.RAIZ_CIE10, anios_sel)}
+
+
+def register_callbacks_explorador_causas(app):
+    """
+    Registra los callbacks para bajar y subir por el árbol de causas.
+    """
+    @app.callback(
+        Output('explorador-nodo','data'),
+        Output('explorador-tabla','active_cell'),
+        Input('explorador-tabla','active_cell'),
+        Input('explorador-subir','n_clicks'),
+        Input('explorador-buscar','value'),
+        State('explorador-nodo','data'),
+        State('filtro-anios','value')
+    )
+    def navegar(celda, _, buscado, nodo, anios_sel):
+        if ctx.triggered_id == 'explorador-subir':
+            return causas.padre(nodo, anios_sel), None
+        if ctx.triggered_id == 'explorador-buscar':
+            if not buscado:
+                return no_update, None
+            # Un código sin hijos se muestra junto a sus hermanos
+            if causas.tiene_hijos(buscado, anios_sel):
+                return buscado, None
+            return causas.padre(buscado, anios_sel), None
+        # El id de la fila es su código, así que el orden de la tabla no importa
+        codigo = (celda or {}).get('row_id')
+        if codigo is None or not causas.tiene_hijos(codigo, anios_sel):
+            return no_update, None
+        return codigo, None
+
+    @app.callback(
+        Output('explorador-tabla','data'),
+        Output('explorador-ruta','children'),
+        Output('explorador-subir','disabled'),
+        Input('explorador-nodo','data'),
+        Input('filtro-anios','value')
+    )
+    def mostrar_nodo(nodo, anios_sel):
+        # Con otros años el nodo puede no tener muertes: la tabla queda vacía
+        return (causas.hijos(nodo, anios_sel), _ruta_texto(nodo, anios_sel),
+                nodo == almacen.RAIZ_CIE10)
+
+    @app.callback(
+        Output('explorador-buscar','options'),
+        Input('explorador-buscar','search_value'),
+        State('explorador-buscar','value'),
+        State('filtro-anios','value')
+    )
+    def buscar_causa(texto, seleccion, anios_sel):
+        return causas.indice_busqueda(anios_sel).opciones(texto, seleccion)
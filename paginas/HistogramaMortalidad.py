@@ -2,38 +2,28 @@
 # Archivo: paginas/HistogramaMortalidad.py
 # Descripción: Distribución de muertes por rangos de edad quinquenales.
 # ------------------------------------------------------------------
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
-# Ruta al CSV de edades
-# Debe contener columnas: GRUPO_EDAD1 (numérico), SEXO, MES
-DATA_CSV = 'ArchivosProcesados/MuertesPorEdad.csv'
+from datos import almacen, cache_figuras, cliente, cubos
 
-df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-# Tipos
-df['GRUPO_EDAD1'] = pd.to_numeric(df['GRUPO_EDAD1'], errors='coerce').fillna(0).astype(int)
-df['MES'] = pd.to_numeric(df['MES'], errors='coerce').fillna(0).astype(int)
+# Datos de edades
+# Columnas: GRUPO_EDAD1 (numérico), SEXO, MES, Muertes (+ mes_nombre, edad_rango)
+def _df():
+    return almacen.obtener('MuertesPorEdad')
 
-# Mapear MES numérico a nombre
-dict_mes = {
-    1:'Enero',2:'Febrero',3:'Marzo',4:'Abril',5:'Mayo',6:'Junio',
-    7:'Julio',8:'Agosto',9:'Septiembre',10:'Octubre',11:'Noviembre',12:'Diciembre'
-}
-df['mes_nombre'] = df['MES'].map(dict_mes)
 
-# Mapear grupo edad a rango quinquenal
-grupo_map = {i: f"{(i-5)*5}-{(i-5)*5+4}" for i in range(5,22)}
-grupo_map[22] = '85+'
-df['edad_rango'] = df['GRUPO_EDAD1'].map(grupo_map)
+dict_mes = almacen.MESES
+
+# Muertes (suma de la columna Muertes) por rango de edad para cada Mes y Sexo
+_cubo = cubos.definir('edad', 'MuertesPorEdad', ['mes_nombre', 'SEXO'], ['edad_rango'])
 
 # Filtros
 o_months = list(dict_mes.values())
-sexos = sorted(df['SEXO'].unique())
 
-# Orden de categorías de rango de edad
-e_order = list(grupo_map.values())
+# Orden de categorías de rango de edad (18 rangos quinquenales)
+e_order = almacen.RANGOS_EDAD
 
 
 def layout_histograma_mortalidad():
@@ -56,7 +46,7 @@ def layout_histograma_mortalidad():
             html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-sexo-histo',
-                options=[{'label': s, 'value': s} for s in sexos],
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos', clearable=True,
                 style={'width':'140px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -68,7 +58,7 @@ def layout_histograma_mortalidad():
                 html.Button('Volver', style={
                     'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
                     'border':'none','borderRadius':'5px','fontSize':'14px','cursor':'pointer'
-                }), href='/tabla-causas-muertes'
+                }), href='/explorador-causas'
             ),
             style={'marginRight':'10px','alignSelf':'center'}
         ),
@@ -91,41 +81,126 @@ def layout_histograma_mortalidad():
 
     graph = dcc.Graph(id='grafico-histo', style={'backgroundColor':'black','height':'70vh'})
 
-    return html.Div([controls, title, graph], style={'backgroundColor':'black','minHeight':'100vh'})
+    # Filtros que se calculan en el servidor (cuando la tabla no va al navegador)
+    consulta = dcc.Store(id='consulta-histo')
+
+    # Tabla que se filtra en el navegador: viaja sólo con esta página
+    # (sin datos si en esta versión supera el umbral)
+    return html.Div([controls, title, graph, consulta, datos_cliente_histograma()], style={'backgroundColor':'black','minHeight':'100vh'})
+
+
+def figura_histograma(mes_sel, sexo_sel, anios_sel=None):
+    """
+    Histograma por rango de edad para los filtros dados: una barra por
+    rango (los 18, con 0 si no hay muertes) con la suma de Muertes.
+    """
+    df_agru = _cubo.consultar(anios_sel, mes_sel, sexo_sel)
+    muertes = df_agru.set_index('edad_rango')['Muertes'].reindex(e_order, fill_value=0)
+
+    # Barras contiguas por rango de edad
+    fig = px.bar(
+        x=e_order,
+        y=muertes.tolist(),
+        color_discrete_sequence=['#f8e2fc'],  # rosa menos intenso
+        labels={'x':'Rango de Edad','y':'# Muertes'},
+        title='Muertes por Rango de Edad (quinquenales)'
+    )
+    fig.update_layout(
+        bargap=0,
+        paper_bgcolor='black',
+        plot_bgcolor='black',
+        font_color='white',
+        title_font_color='fuchsia',
+        title_font_size=24,
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    return fig
+
+
+@almacen.por_version(maxsize=None)
+def datos_cliente_histograma():
+    """
+    Store con la tabla codificada para filtrar en el navegador, o con
+    None si la tabla supera el umbral y se filtra en el servidor. Se
+    decide en cada versión de los datos, la primera vez que se pide.
+    """
+    tabla = _tabla_cliente()
+    if not cliente.usar_cliente(tabla):
+        return dcc.Store(id='datos-cliente-histo', data=None)
+    anios_sel = list(almacen.anios_defecto())
+    figura = cache_figuras.obtener_o_construir(
+        'grafico-histo', (None, None, anios_sel), lambda: figura_histograma(None, None, anios_sel)
+    )
+    return dcc.Store(id='datos-cliente-histo', data=cliente.codificar(
+        tabla, ['mes_nombre', 'SEXO', 'ANIO'], 'edad_rango', e_order, figura,
+        medida='Muertes', completar=True
+    ))
+
+
+def _tabla_cliente():
+    # Agregación más fina (mes x sexo x rango): como mucho 12 x 3 x 18 filas por año
+    return almacen.concatenar(
+        almacen.obtener('MuertesPorEdad', a)
+        .groupby(['mes_nombre', 'SEXO', 'edad_rango'], as_index=False, observed=True)['Muertes'].sum()
+        .assign(ANIO=a)
+        for a in almacen.anios()
+    )
+
+
+def precargar():
+    """
+    Carga los datos, el cubo y la tabla para el navegador (primera visita o calentamiento).
+    """
+    _cubo.asegurar()
+    datos_cliente_histograma()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché la figura del estado global de los filtros (antes de
+    que el usuario llegue a la página). Si se filtra en el navegador no
+    hay nada que calcular.
+    """
+    if datos_cliente_histograma().data is not None:
+        return
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    cache_figuras.obtener_o_construir('grafico-histo', valores, lambda: figura_histograma(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura de la página para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    return {'grafico-histo': cache_figuras.obtener_o_construir(
+        'grafico-histo', valores, lambda: figura_histograma(*valores)
+    )}
 
 
 def register_callbacks_histograma_mortalidad(app):
     """
-    Registra callback para actualizar el histograma por rangos de edad.
+    Registra los callbacks del histograma por rangos de edad. Se registran
+    los dos caminos y cada carga de la app elige según los datos de su
+    versión: en el navegador si la tabla es pequeña, en el servidor si no.
     """
-    @app.callback(
+    app.clientside_callback(
+        ClientsideFunction(namespace='cliente', function_name='enrutar'),
         Output('grafico-histo', 'figure'),
+        Output('consulta-histo', 'data'),
         Input('filtro-mes-histo', 'value'),
-        Input('filtro-sexo-histo', 'value')
+        Input('filtro-sexo-histo', 'value'),
+        Input('filtro-anios', 'value'),
+        State('datos-cliente-histo', 'data')
     )
-    def update_histograma(mes_sel, sexo_sel):
-        dff = df.copy()
-        if mes_sel:
-            dff = dff[dff['mes_nombre'] == mes_sel]
-        if sexo_sel:
-            dff = dff[dff['SEXO'] == sexo_sel]
-
-        # Histograma por rango de edad
-        fig = px.histogram(
-            dff,
-            x='edad_rango',
-            category_orders={'edad_rango': e_order},
-            color_discrete_sequence=['#f8e2fc']  # rosa menos intenso
-,
-            labels={'edad_rango':'Rango de Edad','count':'# Muertes'},
-            title='Muertes por Rango de Edad (quinquenales)'
-        )
-        fig.update_layout(
-            paper_bgcolor='black',
-            plot_bgcolor='black',
-            font_color='white',
-            title_font_color='fuchsia',
-            title_font_size=24,
-            margin={'r':0,'t':50,'l':0,'b':0}
-        )
-        return fig
+
+    @cache_figuras.memoizar('grafico-histo')
+    def figura(mes_sel, sexo_sel, anios_sel):
+        return figura_histograma(mes_sel, sexo_sel, anios_sel)
+
+    @app.callback(
+        Output('grafico-histo', 'figure', allow_duplicate=True),
+        Input('consulta-histo', 'data'),
+        prevent_initial_call=True
+    )
+    def update_histograma(consulta):
+        return figura(*consulta)
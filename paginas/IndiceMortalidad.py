@@ -3,28 +3,27 @@
 # Descripción: Layout y callbacks para mostrar las 10 ciudades
 #              con menor número de muertes en un gráfico circular.
 # ------------------------------------------------------------------
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
 from dash.dependencies import Input, Output
 
-# Ruta al CSV procesado
-# Debe contener columnas: CIUDAD, SEXO, MES, Muertes
-DATA_CSV = 'ArchivosProcesados/MuertesPorMunicipio.csv'
+from datos import almacen, cache_figuras, cubos
+from paginas import registro
 
-# Carga de datos
-df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-# Asegurar tipos
-df['MES'] = df['MES'].astype(int)
-df['Muertes'] = df['Muertes'].astype(int)
-# Mapear MES numérico a nombre
-mes_map = {1:'Enero',2:'Febrero',3:'Marzo',4:'Abril',5:'Mayo',6:'Junio',
-           7:'Julio',8:'Agosto',9:'Septiembre',10:'Octubre',11:'Noviembre',12:'Diciembre'}
-df['mes_nombre'] = df['MES'].map(mes_map)
+# Datos compartidos con CiudadesMasViolentas (se leen al visitar la página)
+# Columnas: COD_DEPARTAMENTO, COD_MUNICIPIO, MUNICIPIO, DEPARTAMENTO, SEXO, MES, Muertes
+# (+ mes_nombre, ETIQUETA_MUNICIPIO)
+def _df():
+    return almacen.obtener('MuertesPorMunicipio')
+
+
+# Muertes por municipio (departamento + municipio) para cada Mes y Sexo
+# (cubo compartido con CiudadesMasViolentas)
+_cubo = cubos.definir('municipio', 'MuertesPorMunicipio', ['mes_nombre', 'SEXO'],
+                      almacen.CLAVE_MUNICIPIO + ['ETIQUETA_MUNICIPIO'])
 
 # Opciones de filtros
-o_months = list(mes_map.values())
-sexos = sorted(df['SEXO'].unique())
+o_months = almacen.O_MONTHS
 
 
 def layout_indice_mortalidad():
@@ -49,7 +48,7 @@ def layout_indice_mortalidad():
             html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-sexo-indice',
-                options=[{'label': s, 'value': s} for s in sexos],
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos', clearable=True,
                 style={'width':'140px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -86,36 +85,69 @@ def layout_indice_mortalidad():
     return html.Div([controls, title, graph], style={'backgroundColor':'black','minHeight':'100vh'})
 
 
+def figura_indice(mes_sel, sexo_sel, anios_sel=None):
+    """
+    Pie de las 10 ciudades con menos muertes para los filtros dados, o un
+    aviso si los datos por municipio no son confiables.
+    """
+    if not almacen.confiable(_cubo.dataset, anios_sel):
+        return registro.figura_aviso()
+    # Muertes por ciudad
+    df_grp = _cubo.consultar(anios_sel, mes_sel, sexo_sel)
+    # Tomar las 10 ciudades con menos muertes
+    df_bot = df_grp.nsmallest(10, 'Muertes')
+
+    # Gráfico circular
+    fig = px.pie(
+        df_bot,
+        values='Muertes', names='ETIQUETA_MUNICIPIO',
+        title=f'Ciudades con Menor Número de Muertes en {almacen.texto_anios(anios_sel)} para Colombia',
+        color_discrete_sequence=['green','yellow','red']
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label',
+                      marker=dict(line=dict(color='white', width=1)))
+    fig.update_layout(
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        title_font_color='fuchsia', title_font_size=28,
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    return fig
+
+
+def precargar():
+    """
+    Carga los datos y el cubo de la página (primera visita o calentamiento).
+    """
+    if almacen.confiable(_cubo.dataset, almacen.anios_defecto()):
+        _cubo.asegurar()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché la figura del estado global de los filtros (antes de
+    que el usuario llegue a la página).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    cache_figuras.obtener_o_construir('grafico-indice', valores, lambda: figura_indice(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura de la página para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), anios_sel)
+    return {'grafico-indice': cache_figuras.obtener_o_construir(
+        'grafico-indice', valores, lambda: figura_indice(*valores)
+    )}
+
+
 def register_callbacks_indice_mortalidad(app):
     @app.callback(
         Output('grafico-indice', 'figure'),
         Input('filtro-mes-indice', 'value'),
-        Input('filtro-sexo-indice', 'value')
+        Input('filtro-sexo-indice', 'value'),
+        Input('filtro-anios', 'value')
     )
-    def update_indice(mes_sel, sexo_sel):
-        df_f = df.copy()
-        if mes_sel:
-            df_f = df_f[df_f['mes_nombre'] == mes_sel]
-        if sexo_sel:
-            df_f = df_f[df_f['SEXO'] == sexo_sel]
-
-        # Agrupar por ciudad y sumar muertes
-        df_grp = df_f.groupby('MUNICIPIO', as_index=False).agg({'Muertes': 'sum'})
-        # Tomar las 10 ciudades con menos muertes
-        df_bot = df_grp.nsmallest(10, 'Muertes')
-
-                # Gráfico circular
-        fig = px.pie(
-            df_bot,
-            values='Muertes', names='MUNICIPIO',
-            title='Ciudades con Menor Número de Muertes en el año 2019 para Colombia',
-            color_discrete_sequence=['green','yellow','red']
-        )
-        fig.update_traces(textposition='inside', textinfo='percent+label',
-                          marker=dict(line=dict(color='white', width=1)))
-        fig.update_layout(
-            paper_bgcolor='black', plot_bgcolor='black', font_color='white',
-            title_font_color='fuchsia', title_font_size=28,
-            margin={'r':0,'t':50,'l':0,'b':0}
-        )
-        return fig
+    @cache_figuras.memoizar('grafico-indice')
+    def update_indice(mes_sel, sexo_sel, anios_sel):
+        return figura_indice(mes_sel, sexo_sel, anios_sel)
@@ -2,21 +2,21 @@
 # Archivo: paginas/MuertesPorSexo.py
 # Descripción: Gráfico de barras apiladas horizontal de muertes por departamento y sexo.
 # ------------------------------------------------------------------
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
 from dash.dependencies import Input, Output
 
-# Ruta al CSV procesado
-# Debe contener: DEPARTAMENTO, SEXO, MANERA_MUERTE, Muertes
-DATA_CSV = 'ArchivosProcesados/MuertesPorDepartamento.csv'
+from datos import almacen, cache_figuras, cubos
 
-df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-# Asegurar tipos
-df['Muertes'] = pd.to_numeric(df['Muertes'], errors='coerce').fillna(0).astype(int)
+# Datos compartidos con el mapa (se leen al visitar la página)
+# Contiene: DEPARTAMENTO, SEXO, MANERA_MUERTE, Muertes
+def _df():
+    return almacen.obtener('MuertesPorDepartamento')
 
-# Opciones de filtro
-maneras = sorted(df['MANERA_MUERTE'].unique())
+
+# Muertes por departamento y sexo para cada manera de muerte
+_cubo = cubos.definir('departamento_sexo', 'MuertesPorDepartamento',
+                      ['MANERA_MUERTE'], ['DEPARTAMENTO', 'SEXO'])
 
 
 def layout_muertes_por_sexo():
@@ -28,7 +28,7 @@ def layout_muertes_por_sexo():
             html.Label('Manera de muerte:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-manera-sexo',
-                options=[{'label': m, 'value': m} for m in maneras],
+                options=[{'label': m, 'value': m} for m in sorted(_df()['MANERA_MUERTE'].unique())],
                 placeholder='Todas', clearable=True,
                 style={'width':'250px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -43,12 +43,13 @@ def layout_muertes_por_sexo():
             ),
             style={'marginRight':'10px','alignSelf':'center'}
         ),
+        # Botón Siguiente
         html.Div(
             dcc.Link(
-                html.Button('Inicio', style={
+                html.Button('Siguiente', style={
                     'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
-                    'border':'none','borderRadius':'5px','cursor':'pointer'
-                }), href='/'
+                    'border':'none','borderRadius':'5px','fontSize':'14px','cursor':'pointer'
+                }), href='/resumen'
             ), style={'alignSelf':'center'}
         )
     ], style={'display':'flex','alignItems':'center','padding':'20px','backgroundColor':'black'})
@@ -63,42 +64,76 @@ def layout_muertes_por_sexo():
     return html.Div([controls, title, graph], style={'backgroundColor':'black','minHeight':'100vh'})
 
 
+def figura_sexo(manera_sel, anios_sel=None):
+    """
+    Barras apiladas de muertes por departamento y sexo para la manera dada.
+    """
+    # Muertes por departamento y sexo
+    df_grp = _cubo.consultar(anios_sel, manera_sel)
+    # plotly agrupa el color por todas las categorías: quitar las que no tienen filas
+    df_grp['SEXO'] = df_grp['SEXO'].cat.remove_unused_categories()
+    # Ordenar departamentos por total muertes descendente
+    total_dep = df_grp.groupby('DEPARTAMENTO', observed=True)['Muertes'].sum().sort_values(ascending=False)
+    departments_ordered = total_dep.index.tolist()
+
+    # Crear gráfico
+    fig = px.bar(
+        df_grp,
+        x='Muertes',
+        y='DEPARTAMENTO',
+        color='SEXO',
+        orientation='h',
+        category_orders={'DEPARTAMENTO': departments_ordered},
+        labels={'Muertes':'# Muertes','DEPARTAMENTO':'Departamento'},
+        title=f'Muertes por Departamento y Sexo ({almacen.texto_anios(anios_sel)})',
+        color_discrete_map={'Masculino':'#ff66b2','Femenino':'#66ccff'}
+    )
+    fig.update_layout(
+        barmode='stack',
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        title_font_color='fuchsia', title_font_size=28,
+        legend_title_text='Sexo',
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    fig.update_traces(marker_line_color='white', marker_line_width=0.5)
+    return fig
+
+
+def precargar():
+    """
+    Carga los datos y el cubo de la página (primera visita o calentamiento).
+    """
+    _cubo.asegurar()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché la figura del estado global de los filtros (antes de
+    que el usuario llegue a la página).
+    """
+    valores = (filtros.get('manera'), anios_sel)
+    cache_figuras.obtener_o_construir('grafico-sexo-dep', valores, lambda: figura_sexo(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura de la página para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('manera'), anios_sel)
+    return {'grafico-sexo-dep': cache_figuras.obtener_o_construir(
+        'grafico-sexo-dep', valores, lambda: figura_sexo(*valores)
+    )}
+
+
 def register_callbacks_muertes_por_sexo(app):
     """
     Registra callback para actualizar gráfico apilado.
     """
     @app.callback(
         Output('grafico-sexo-dep','figure'),
-        Input('filtro-manera-sexo','value')
+        Input('filtro-manera-sexo','value'),
+        Input('filtro-anios','value')
     )
-    def update_graph(manera_sel):
-        dff = df.copy()
-        if manera_sel:
-            dff = dff[dff['MANERA_MUERTE']==manera_sel]
-        # Agrupar por departamento y sexo
-        df_grp = dff.groupby(['DEPARTAMENTO','SEXO'], as_index=False).agg({'Muertes':'sum'})
-        # Ordenar departamentos por total muertes descendente
-        total_dep = df_grp.groupby('DEPARTAMENTO')['Muertes'].sum().sort_values(ascending=False)
-        departments_ordered = total_dep.index.tolist()
-
-        # Crear gráfico
-        fig = px.bar(
-            df_grp,
-            x='Muertes',
-            y='DEPARTAMENTO',
-            color='SEXO',
-            orientation='h',
-            category_orders={'DEPARTAMENTO': departments_ordered},
-            labels={'Muertes':'# Muertes','DEPARTAMENTO':'Departamento'},
-            title='Muertes por Departamento y Sexo',
-            color_discrete_map={'Masculino':'#ff66b2','Femenino':'#66ccff'}
-        )
-        fig.update_layout(
-            barmode='stack',
-            paper_bgcolor='black', plot_bgcolor='black', font_color='white',
-            title_font_color='fuchsia', title_font_size=28,
-            legend_title_text='Sexo',
-            margin={'r':0,'t':50,'l':0,'b':0}
-        )
-        fig.update_traces(marker_line_color='white', marker_line_width=0.5)
-        return fig
+    @cache_figuras.memoizar('grafico-sexo-dep')
+    def update_graph(manera_sel, anios_sel):
+        return figura_sexo(manera_sel, anios_sel)
@@ -0,0 +1,230 @@
+# ------------------------------------------------------------------
+# Archivo: paginas/Resumen.py
+# Descripción: Vista de resumen con cuatro paneles (departamentos, sexo,
+#              ciudades con más y con menos muertes). Un solo callback
+#              con varias salidas consulta cada dataset una vez: los
+#              paneles de departamentos salen de la misma consulta por
+#              manera de muerte y el top 5 y el bottom 10 de municipios
+#              de un único ordenamiento. El sexo acota los cuatro paneles;
+#              la manera, sólo los de departamentos (los municipios son
+#              sólo homicidios) y el mes, sólo los de municipios (los datos
+#              por departamento no tienen mes).
+# ------------------------------------------------------------------
+import numpy as np
+import plotly.express as px
+from dash import html, dcc
+from dash.dependencies import Input, Output
+
+from datos import almacen, cache_figuras, cubos
+from paginas import registro
+
+# Cubos compartidos con MuertesPorSexo y con las páginas de municipios
+_cubo_dep = cubos.definir('departamento_sexo', 'MuertesPorDepartamento',
+                          ['MANERA_MUERTE'], ['DEPARTAMENTO', 'SEXO'])
+_cubo_mun = cubos.definir('municipio', 'MuertesPorMunicipio', ['mes_nombre', 'SEXO'],
+                          almacen.CLAVE_MUNICIPIO + ['ETIQUETA_MUNICIPIO'])
+
+# Ids de los paneles, en el orden en que los devuelve figuras_resumen
+PANELES = ('resumen-departamentos', 'resumen-sexo', 'resumen-ciudades', 'resumen-indice')
+
+# Opciones de Mes
+o_months = almacen.O_MONTHS
+
+
+def _estilo(fig):
+    fig.update_layout(
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        title_font_color='fuchsia', title_font_size=20,
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    return fig
+
+
+def layout_resumen():
+    """
+    Layout del resumen: filtros de Mes, Sexo y Manera de muerte y una
+    cuadrícula de 2x2 gráficos.
+    """
+    df_dep = almacen.obtener('MuertesPorDepartamento')
+    controls = html.Div([
+        # Filtro Mes
+        html.Div([
+            html.Label('Mes:', style={'color':'white','marginRight':'8px'}),
+            dcc.Dropdown(
+                id='filtro-mes-resumen',
+                options=[{'label': m, 'value': m} for m in o_months],
+                placeholder='Todos', clearable=True,
+                style={'width':'160px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
+            )
+        ], style={'marginRight':'20px'}),
+        # Filtro Sexo
+        html.Div([
+            html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
+            dcc.Dropdown(
+                id='filtro-sexo-resumen',
+                options=[{'label': s, 'value': s} for s in sorted(df_dep['SEXO'].unique())],
+                placeholder='Todos', clearable=True,
+                style={'width':'140px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
+            )
+        ], style={'marginRight':'20px'}),
+        # Filtro Manera de muerte
+        html.Div([
+            html.Label('Manera de muerte:', style={'color':'white','marginRight':'8px'}),
+            dcc.Dropdown(
+                id='filtro-manera-resumen',
+                options=[{'label': m, 'value': m} for m in sorted(df_dep['MANERA_MUERTE'].unique())],
+                placeholder='Todas', clearable=True,
+                style={'width':'250px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
+            )
+        ], style={'marginRight':'auto'}),
+        # Botón Volver
+        html.Div(
+            dcc.Link(
+                html.Button('Volver', style={
+                    'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
+                    'border':'none','borderRadius':'5px','fontSize':'14px','cursor':'pointer'
+                }), href='/muertes-por-sexo'
+            ), style={'marginRight':'10px','alignSelf':'center'}
+        ),
+        # Botón Inicio
+        html.Div(
+            dcc.Link(
+                html.Button('Inicio', style={
+                    'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
+                    'border':'none','borderRadius':'5px','cursor':'pointer'
+                }), href='/'
+            ), style={'alignSelf':'center'}
+        )
+    ], style={'display':'flex','alignItems':'center','padding':'20px','backgroundColor':'black'})
+
+    title = html.H2(
+        'Resumen de Mortalidad en Colombia',
+        style={'textAlign':'center','color':'fuchsia','fontSize':'32px','margin':'20px 0'}
+    )
+
+    # Cada dataset sólo tiene algunos filtros: se indica cuál acota cada panel
+    alcance = html.P(
+        'Sexo: todos los paneles · Manera de muerte: paneles de departamentos · '
+        'Mes: paneles de ciudades (sólo homicidios)',
+        style={'color':'white','textAlign':'center','margin':'0 0 20px'}
+    )
+
+    grid = html.Div(
+        [dcc.Graph(id=id_panel, style={'backgroundColor':'black','height':'45vh'}) for id_panel in PANELES],
+        style={'display':'grid','gridTemplateColumns':'1fr 1fr','gap':'20px','padding':'0 20px 40px'}
+    )
+
+    return html.Div([controls, title, alcance, grid], style={'backgroundColor':'black','minHeight':'100vh'})
+
+
+def figuras_resumen(mes_sel, sexo_sel, manera_sel, anios_sel=None):
+    """
+    Las cuatro figuras del resumen (en el orden de PANELES) con una
+    consulta por dataset.
+    """
+    texto = almacen.texto_anios(anios_sel)
+
+    # Departamentos: una consulta por manera; el sexo se aplica sobre el resultado
+    df_dep = _cubo_dep.consultar(anios_sel, manera_sel)
+    if sexo_sel is not None:
+        df_dep = df_dep[df_dep['SEXO'] == sexo_sel]
+    # plotly agrupa el color por todas las categorías: quitar las que no tienen filas
+    df_dep['SEXO'] = df_dep['SEXO'].cat.remove_unused_categories()
+    total = df_dep.groupby('DEPARTAMENTO', observed=True)['Muertes'].sum().sort_values(ascending=False)
+    df_total = total.head(10).reset_index()
+    departments_ordered = total.index.tolist()
+
+    fig_dep = px.bar(
+        df_total, x='DEPARTAMENTO', y='Muertes',
+        labels={'DEPARTAMENTO':'Departamento', 'Muertes':'# Muertes'},
+        color='Muertes', color_continuous_scale=['white','yellow','red'],
+        title=f'Top 10 Departamentos con más Muertes ({texto})'
+    )
+    fig_dep.update_layout(xaxis_tickangle=-45)
+    fig_dep.update_traces(marker_line_color='white', marker_line_width=1)
+
+    fig_sexo = px.bar(
+        df_dep, x='Muertes', y='DEPARTAMENTO', color='SEXO', orientation='h',
+        category_orders={'DEPARTAMENTO': departments_ordered},
+        labels={'Muertes':'# Muertes','DEPARTAMENTO':'Departamento'},
+        title=f'Muertes por Departamento y Sexo ({texto})',
+        color_discrete_map={'Masculino':'#ff66b2','Femenino':'#66ccff'}
+    )
+    fig_sexo.update_layout(barmode='stack', legend_title_text='Sexo')
+    fig_sexo.update_traces(marker_line_color='white', marker_line_width=0.5)
+
+    # Municipios: una consulta y un solo ordenamiento (estable) para ambos
+    # extremos, o un aviso en los dos paneles si los datos no son confiables
+    if not almacen.confiable(_cubo_mun.dataset, anios_sel):
+        aviso = registro.figura_aviso()
+        return [_estilo(fig) for fig in (fig_dep, fig_sexo)] + [aviso, aviso]
+    df_mun = _cubo_mun.consultar(anios_sel, mes_sel, sexo_sel)
+    orden = np.argsort(df_mun['Muertes'].to_numpy(), kind='stable')
+    df_top = df_mun.iloc[orden[::-1][:5]]
+    df_bot = df_mun.iloc[orden[:10]]
+
+    fig_top = px.bar(
+        df_top, x='ETIQUETA_MUNICIPIO', y='Muertes',
+        labels={'ETIQUETA_MUNICIPIO':'Ciudad', 'Muertes':'# Muertes por Homicidio'},
+        color='Muertes', color_continuous_scale=['red','yellow','green'],
+        range_color=(df_top['Muertes'].min(), df_top['Muertes'].max()),
+        title=f'Top 5 Ciudades con más Muertes por Homicidio ({texto})'
+    )
+    fig_top.update_layout(xaxis_tickangle=-45)
+    fig_top.update_traces(marker_line_color='white', marker_line_width=1)
+
+    fig_bot = px.pie(
+        df_bot, values='Muertes', names='ETIQUETA_MUNICIPIO',
+        title=f'Ciudades con Menor Número de Muertes ({texto})',
+        color_discrete_sequence=['green','yellow','red']
+    )
+    fig_bot.update_traces(textposition='inside', textinfo='percent+label',
+                          marker=dict(line=dict(color='white', width=1)))
+
+    return [_estilo(fig) for fig in (fig_dep, fig_sexo, fig_top, fig_bot)]
+
+
+def precargar():
+    """
+    Carga los datos y los cubos de la página (primera visita o calentamiento).
+    """
+    _cubo_dep.asegurar()
+    if almacen.confiable(_cubo_mun.dataset, almacen.anios_defecto()):
+        _cubo_mun.asegurar()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché las figuras del estado global de los filtros (antes de
+    que el usuario llegue a la página).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), filtros.get('manera'), anios_sel)
+    cache_figuras.obtener_o_construir_varias(PANELES, valores, lambda: figuras_resumen(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Las cuatro figuras para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('mes'), filtros.get('sexo'), filtros.get('manera'), anios_sel)
+    return dict(zip(PANELES, cache_figuras.obtener_o_construir_varias(
+        PANELES, valores, lambda: figuras_resumen(*valores)
+    )))
+
+
+def register_callbacks_resumen(app):
+    """
+    Registra el callback único de los cuatro paneles.
+    """
+    @app.callback(
+        [Output(id_panel, 'figure') for id_panel in PANELES],
+        Input('filtro-mes-resumen', 'value'),
+        Input('filtro-sexo-resumen', 'value'),
+        Input('filtro-manera-resumen', 'value'),
+        Input('filtro-anios', 'value')
+    )
+    def update_resumen(mes_sel, sexo_sel, manera_sel, anios_sel):
+        valores = (mes_sel, sexo_sel, manera_sel, anios_sel)
+        return cache_figuras.obtener_o_construir_varias(
+            PANELES, valores, lambda: figuras_resumen(*valores)
+        )
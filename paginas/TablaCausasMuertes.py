@@ -1,33 +1,59 @@
 # ------------------------------------------------------------------
 # Archivo: paginas/TablaCausasMuertes.py
-# Descripción: Layout y callbacks para mostrar las 10 principales causas de muerte.
+# Descripción: Layout y callbacks de la tabla de causas de muerte: todos
+#              los códigos CIE-10, de 10 en 10, con paginado, orden y
+#              filtro resueltos en el servidor (datos/causas.py). La
+#              primera página, ordenada por casos, son las 10 principales.
+#              El dropdown de municipio busca en el servidor mientras se
+#              escribe (datos/busqueda.py) en vez de traer la lista entera.
 # ------------------------------------------------------------------
-import pandas as pd
-from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash import html, dcc, ctx
+from dash.dependencies import Input, Output, State
 from dash_table import DataTable
 
-# Ruta al CSV de causas
-# Estructura: COD_MUERTE;SEXO;MES;Muertes;MUNICIPIO;Descripcion de códigos mortalidad a cuatro caracteres
-DATA_CSV = 'ArchivosProcesados/MuertesPorMunicipioTabla.csv'
+from datos import almacen, busqueda, causas
+from paginas import registro
+
+# Datos de causas (se leen al visitar la página)
+# Estructura: COD_DEPARTAMENTO;COD_MUNICIPIO;MES;SEXO;COD_MUERTE;Muertes;MUNICIPIO;DEPARTAMENTO;
+#             Descripcion de códigos mortalidad a cuatro caracteres (+ ETIQUETA_MUNICIPIO)
+def _df():
+    return almacen.obtener('MuertesPorMunicipioTabla')
 
-df_c = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-# Mapear MES numérico a nombre
-mes_map = {1:'Enero',2:'Febrero',3:'Marzo',4:'Abril',5:'Mayo',6:'Junio',
-           7:'Julio',8:'Agosto',9:'Septiembre',10:'Octubre',11:'Noviembre',12:'Diciembre'}
-df_c['MES'] = df_c['MES'].astype(int).map(mes_map)
 
 # Opciones de filtros
-o_months = list(mes_map.values())
-sexos = sorted(df_c['SEXO'].unique())
-municipios = sorted(df_c['MUNICIPIO'].dropna().unique())
+o_months = almacen.O_MONTHS
+
+_FILTROS = ('filtro-mes-causas', 'filtro-sexo-causas', 'filtro-municipio-causas', 'filtro-anios')
+
+
+def _municipios(anios_sel=None):
+    return _indice_municipios(almacen.seleccion_anios(anios_sel))
+
+
+# Un municipio por departamento + municipio, rotulado 'MUNICIPIO (DEPARTAMENTO)'
+_MUNICIPIO = almacen.CLAVE_MUNICIPIO + ['ETIQUETA_MUNICIPIO']
 
 
+@almacen.por_version(maxsize=8)
+def _indice_municipios(anios):
+    # Índice de búsqueda de municipios; sin texto, primero los de más muertes en `anios`
+    # (vacío si los datos por municipio no son confiables)
+    if not almacen.confiable('MuertesPorMunicipioTabla', anios):
+        return busqueda.IndiceTexto([], [], [])
+    por_anio = (almacen.obtener('MuertesPorMunicipioTabla', a)
+                .groupby(_MUNICIPIO, as_index=False, observed=True)['Muertes'].sum() for a in anios)
+    muertes = almacen.concatenar(por_anio).groupby(_MUNICIPIO, as_index=False, observed=True)['Muertes'].sum()
+    valores = [almacen.valor_municipio(d, m)
+               for d, m in zip(muertes['COD_DEPARTAMENTO'], muertes['COD_MUNICIPIO'])]
+    return busqueda.IndiceTexto(muertes['ETIQUETA_MUNICIPIO'].astype(str), valores, muertes['Muertes'].to_numpy())
+
 
 def layout_tabla_causas():
     """
-    Layout para la tabla de las 10 principales causas de muerte en Colombia.
-    Permite filtrar por MES, SEXO y MUNICIPIO.
+    Layout para la tabla de causas de muerte en Colombia (las 10
+    principales en la primera página). Permite filtrar por MES, SEXO y
+    MUNICIPIO, y ordenar y buscar por columna.
     """
     controls = html.Div([
         html.Div([
@@ -44,7 +70,7 @@ def layout_tabla_causas():
             html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-sexo-causas',
-                options=[{'label': s, 'value': s} for s in sexos],
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos', clearable=True,
                 style={'width':'130px','backgroundColor':'fuchsia','color':'black'}
             )
@@ -54,15 +80,16 @@ def layout_tabla_causas():
             html.Label('Municipio:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-municipio-causas',
-                options=[{'label': m, 'value': m} for m in municipios],
-                placeholder='Todos', clearable=True,
-                style={'width':'180px','backgroundColor':'fuchsia','color':'black'}
+                # Las opciones llegan del servidor según lo que se escribe
+                options=[],
+                placeholder='Todos (escriba para buscar)', clearable=True,
+                style={'width':'340px','backgroundColor':'fuchsia','color':'black'}
             )
         ], style={'marginRight':'auto'})
     ], style={'display':'flex','padding':'20px','backgroundColor':'black'})
 
     title = html.H2(
-        '10 Principales Causas de Muerte en Colombia',
+        'Principales Causas de Muerte en Colombia',
         style={'textAlign':'center','color':'fuchsia','margin':'20px 0'}
     )
 
@@ -71,11 +98,17 @@ def layout_tabla_causas():
         columns=[
             {'name':'Código', 'id':'COD_MUERTE'},
             {'name':'Causa','id':'Descripcion'},
-            {'name':'Casos','id':'Muertes'}
+            {'name':'Casos','id':'Muertes','type':'numeric'}
         ],
+        # Sólo viaja la página visible; el servidor pagina, ordena y filtra
+        page_action='custom', page_current=0, page_size=10,
+        sort_action='custom', sort_mode='multi', sort_by=[],
+        filter_action='custom', filter_query='',
+        filter_options={'case': 'insensitive'},
         style_table={'overflowX': 'auto','backgroundColor':'black'},
         style_header={'backgroundColor':'fuchsia','color':'white','fontWeight':'bold'},
-        style_cell={'backgroundColor':'black','color':'white','textAlign':'left'}
+        style_cell={'backgroundColor':'black','color':'white','textAlign':'left'},
+        style_filter={'backgroundColor':'#222','color':'white'}
     )
 
     nav = html.Div([
@@ -87,10 +120,41 @@ def layout_tabla_causas():
         dcc.Link(html.Button('Siguiente', style={
             'padding':'10px 20px','backgroundColor':'fuchsia','color':'white',
             'border':'none','borderRadius':'5px','cursor':'pointer'
-        }), href='/histograma-mortalidad')
+        }), href='/explorador-causas')
     ], style={'textAlign':'center','padding':'20px','backgroundColor':'black'})
 
-    return html.Div([controls, title, table, nav], style={'backgroundColor':'black','minHeight':'100vh'})
+    # Aviso si los archivos por municipio son de un ETL anterior (totales inflados)
+    aviso = [] if almacen.confiable('MuertesPorMunicipioTabla', almacen.anios_defecto()) else [
+        html.P(registro.AVISO_NO_CONFIABLE, style={'textAlign':'center','color':'fuchsia','fontWeight':'bold'})
+    ]
+
+    return html.Div([controls, title, *aviso, table, nav], style={'backgroundColor':'black','minHeight':'100vh'})
+
+
+def precargar():
+    """
+    Carga los datos de la página y el índice de causas (primera visita o calentamiento).
+    """
+    _df()
+    _municipios(almacen.anios_defecto())
+    causas.precargar()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja calculadas las muertes por causa y el orden de la primera página
+    para el estado global de los filtros (antes de que el usuario llegue).
+    """
+    _municipios(anios_sel)
+    causas.pagina(filtros.get('mes'), filtros.get('sexo'), anios=anios_sel)
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Primera página de la tabla (las causas más frecuentes) para un estado
+    de los filtros (sitio estático; sin municipio, orden ni búsqueda).
+    """
+    return {'tabla-causas': causas.pagina(filtros.get('mes'), filtros.get('sexo'), anios=anios_sel)[0]}
 
 
 def register_callbacks_tabla_causas(app):
@@ -99,23 +163,28 @@ def register_callbacks_tabla_causas(app):
     """
     @app.callback(
         Output('tabla-causas','data'),
+        Output('tabla-causas','page_count'),
+        Output('tabla-causas','page_current'),
         Input('filtro-mes-causas','value'),
         Input('filtro-sexo-causas','value'),
-        Input('filtro-municipio-causas','value')
+        Input('filtro-municipio-causas','value'),
+        Input('tabla-causas','page_current'),
+        Input('tabla-causas','page_size'),
+        Input('tabla-causas','sort_by'),
+        Input('tabla-causas','filter_query'),
+        Input('filtro-anios','value')
+    )
+    def update_tabla(mes_sel, sexo_sel, muni_sel, pagina, tamano, orden, consulta, anios_sel):
+        # Al cambiar un filtro se vuelve a la primera página
+        if ctx.triggered_id in _FILTROS:
+            pagina = 0
+        return causas.pagina(mes_sel, sexo_sel, muni_sel, pagina, tamano or 10, orden, consulta, anios_sel)
+
+    @app.callback(
+        Output('filtro-municipio-causas','options'),
+        Input('filtro-municipio-causas','search_value'),
+        State('filtro-municipio-causas','value'),
+        State('filtro-anios','value')
     )
-    def update_tabla(mes_sel, sexo_sel, muni_sel):
-        dff = df_c.copy()
-        if mes_sel:
-            dff = dff[dff['MES']==mes_sel]
-        if sexo_sel:
-            dff = dff[dff['SEXO']==sexo_sel]
-        if muni_sel:
-            dff = dff[dff['MUNICIPIO']==muni_sel]
-
-        # Agrupar por causa
-        df_grp = dff.groupby(['COD_MUERTE','Descripcion  de códigos mortalidad a cuatro caracteres'], as_index=False).agg({'Muertes':'sum'})
-        df_top = df_grp.sort_values('Muertes', ascending=False).head(10)
-
-        # Renombrar columna Descripcion a Descripcion
-        df_top = df_top.rename(columns={'Descripcion  de códigos mortalidad a cuatro caracteres':'Descripcion'})
-        return df_top[['COD_MUERTE','Descripcion','Muertes']].to_dict('records')
+    def buscar_municipio(texto, seleccion, anios_sel):
+        return _municipios(anios_sel).opciones(texto, seleccion)
@@ -2,25 +2,43 @@
 # Archivo: paginas/mapa.py
 # Descripción: Layout y callbacks del mapa coroplético.
 # ------------------------------------------------------------------
+import functools
+
 import pandas as pd
-import json
 import plotly.express as px
-from dash import html, dcc
+from dash import html, dcc, Patch
 from dash.dependencies import Input, Output
 
-# Rutas a los datos
-DATA_CSV = 'ArchivosProcesados/MuertesPorDepartamento.csv'
-GEOJSON_FILE = 'ArchivosProcesados/Colombia.geo.json'
+from datos import almacen, cache_figuras, cubos, geometria
+
+# Escala del mapa en pantalla: ~17.6° de latitud en ~800 px de alto.
+# Con ella se elige la geometría más simplificada que no se nota.
+GRADOS_POR_PIXEL = 0.022
+
+# Datos compartidos con MuertesPorSexo (se leen al visitar la página)
+def _df():
+    return almacen.obtener('MuertesPorDepartamento')
+
+
+# Muertes por departamento precalculadas para cada combinación de filtros
+_cubo = cubos.definir('departamento', 'MuertesPorDepartamento',
+                      ['SEXO', 'MANERA_MUERTE'], ['COD_DEPARTAMENTO'])
 
-# Carga inicial de datos
-_df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-_df['departamento'] = _df['DEPARTAMENTO'].str.strip().str.upper()
-with open(GEOJSON_FILE, 'r', encoding='utf-8') as f:
-    _geojson = json.load(f)
 
-# DataFrame de todos los departamentos para rellenar
-_all_departamentos = [feat['properties']['NOMBRE_DPT'].upper() for feat in _geojson['features']]
-_df_todos = pd.DataFrame({'departamento': _all_departamentos})
+@functools.lru_cache(maxsize=None)
+def _geometria():
+    """
+    GeoJSON del mapa y DataFrame de todos sus departamentos para rellenar.
+    El cruce se hace por código DANE (DPTO): los nombres del GeoJSON no
+    llevan tildes y los del CSV sí.
+    """
+    geojson = geometria.cargar(geometria.elegir_nivel(GRADOS_POR_PIXEL))
+    df_todos = pd.DataFrame({
+        'DPTO': [feat['properties']['DPTO'] for feat in geojson['features']],
+        'departamento': [feat['properties']['NOMBRE_DPT'] for feat in geojson['features']],
+    })
+    df_todos['COD_DEPARTAMENTO'] = df_todos['DPTO'].astype(int)
+    return geojson, df_todos
 
 
 def layout_mapa():
@@ -35,7 +53,7 @@ def layout_mapa():
             html.Label('Sexo:', style={'color': 'white', 'marginRight': '30px'}),
             dcc.Dropdown(
                 id='filtro-sexo',
-                options=[{'label': s, 'value': s} for s in sorted(_df['SEXO'].unique())],
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos',
                 clearable=True,
                 style={'width': '300px', 'backgroundColor': 'fuchsia', 'color': 'black', 'fontWeight': 'bold'}
@@ -46,7 +64,7 @@ def layout_mapa():
             html.Label('Manera de muerte:', style={'color': 'white', 'marginRight': '30px'}),
             dcc.Dropdown(
                 id='filtro-manera',
-                options=[{'label': m, 'value': m} for m in sorted(_df['MANERA_MUERTE'].unique())],
+                options=[{'label': m, 'value': m} for m in sorted(_df()['MANERA_MUERTE'].unique())],
                 placeholder='Todas',
                 clearable=True,
                 style={'width': '300px', 'backgroundColor': 'fuchsia', 'color': 'black', 'fontWeight': 'bold'}
@@ -82,10 +100,12 @@ def layout_mapa():
         style={'textAlign': 'center', 'color': 'fuchsia', 'fontSize': '40px', 'margin': '20px 0'}
     )
 
-    # Gráfico
+    # Gráfico: la figura completa (con geometría) viaja una sola vez,
+    # al cargar la página; los filtros sólo actualizan los valores.
     graph = html.Div(
         dcc.Graph(
             id='mapa-departamentos',
+            figure=figura_base(almacen.anios_defecto()),
             style={'width': '90vw', 'height': '75vh', 'backgroundColor': 'black'}
         ),
         style={'textAlign': 'center', 'paddingBottom': '40px'}
@@ -101,47 +121,101 @@ def layout_mapa():
     })
 
 
+def valores_mapa(sexo_sel, manera_sel, anios_sel=None):
+    """
+    Muertes de cada departamento del GeoJSON (en su orden) para los filtros.
+    """
+    df_agru = _cubo.consultar(anios_sel, sexo_sel, manera_sel)
+    # Rellenar departamentos faltantes con 0
+    return _geometria()[1].merge(df_agru, on='COD_DEPARTAMENTO', how='left').fillna({'Muertes': 0})
+
+
+def figura_base(anios_sel=None):
+    """
+    Figura completa sin filtros (geometría incluida), desde la caché de figuras.
+    """
+    anios_sel = list(almacen.seleccion_anios(anios_sel))
+    return cache_figuras.obtener_o_construir(
+        'mapa-departamentos', (None, None, anios_sel),
+        lambda: figura_mapa(valores_mapa(None, None, anios_sel))
+    )
+
+
+def figura_mapa(df_full, geojson=None):
+    """
+    Coroplético de muertes por departamento con el estilo de la página.
+    """
+    fig = px.choropleth(
+        df_full,
+        geojson=geojson or _geometria()[0],
+        locations='DPTO',
+        featureidkey='properties.DPTO',
+        hover_name='departamento',
+        hover_data={'DPTO': False},
+        color='Muertes',
+        color_continuous_scale=['white', 'yellow', 'red'],
+        range_color=(0, df_full['Muertes'].max()),
+        labels={'Muertes': '# Muertes'}
+    )
+    fig.update_geos(fitbounds='locations', visible=False, bgcolor='black')
+    fig.update_traces(marker_line_width=0.5, marker_line_color='gray', selector=dict(type='choropleth'))
+    fig.update_layout(
+        paper_bgcolor='black',
+        plot_bgcolor='black',
+        font_color='white',
+        margin={'r':0, 't':50, 'l':0, 'b':0},
+        title_font_color='fuchsia',
+        title_font_size=40
+    )
+    return fig
+
+
+def precargar():
+    """
+    Carga geometría, datos, cubo y figura base (primera visita o calentamiento).
+    """
+    _cubo.asegurar()
+    figura_base(almacen.anios_defecto())
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Construye las particiones del cubo de los años `anios_sel` (antes de
+    que el usuario llegue a la página): el callback sólo envía valores, que
+    salen del cubo sin pasar por la caché de figuras.
+    """
+    valores_mapa(filtros.get('sexo'), filtros.get('manera'), anios_sel)
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura completa del mapa para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('sexo'), filtros.get('manera'), anios_sel)
+    return {'mapa-departamentos': cache_figuras.obtener_o_construir(
+        'mapa-departamentos', valores, lambda: figura_mapa(valores_mapa(*valores))
+    )}
+
+
 def register_callbacks_mapa(app):
     """
-    Registra el callback para filtrar y dibujar el mapa.
+    Registra el callback para filtrar el mapa. La figura base ya está en el
+    navegador, así que sólo se envían los valores (z) y el rango de color.
+    También corre al abrir la página: la figura base es la de la selección
+    inicial de años y puede haber otros seleccionados.
     """
     @app.callback(
         Output('mapa-departamentos', 'figure'),
         Input('filtro-sexo', 'value'),
-        Input('filtro-manera', 'value')
+        Input('filtro-manera', 'value'),
+        Input('filtro-anios', 'value')
     )
-    def update_map(sexo_sel, manera_sel):
-        # Filtrar
-        df_filtrado = _df.copy()
-        if sexo_sel:
-            df_filtrado = df_filtrado[df_filtrado['SEXO'] == sexo_sel]
-        if manera_sel:
-            df_filtrado = df_filtrado[df_filtrado['MANERA_MUERTE'] == manera_sel]
-
-        # Agregar muertes
-        df_agru = df_filtrado.groupby('departamento', as_index=False).agg({'Muertes': 'sum'})
-        # Rellenar departamentos faltantes con 0
-        df_full = _df_todos.merge(df_agru, on='departamento', how='left').fillna({'Muertes': 0})
-
-        # Coroplético
-        fig = px.choropleth(
-            df_full,
-            geojson=_geojson,
-            locations='departamento',
-            featureidkey='properties.NOMBRE_DPT',
-            color='Muertes',
-            color_continuous_scale=['white', 'yellow', 'red'],
-            range_color=(0, df_full['Muertes'].max()),
-            labels={'Muertes': '# Muertes'}
-        )
-        fig.update_geos(fitbounds='locations', visible=False, bgcolor='black')
-        fig.update_traces(marker_line_width=0.5, marker_line_color='gray', selector=dict(type='choropleth'))
-        fig.update_layout(
-            paper_bgcolor='black',
-            plot_bgcolor='black',
-            font_color='white',
-            margin={'r':0, 't':50, 'l':0, 'b':0},
-            title_font_color='fuchsia',
-            title_font_size=40
-        )
-        return fig
+    def update_map(sexo_sel, manera_sel, anios_sel):
+        # Muertes por departamento para los filtros elegidos
+        muertes = valores_mapa(sexo_sel, manera_sel, anios_sel)['Muertes']
+
+        # Actualización parcial de la figura
+        patch = Patch()
+        patch['data'][0]['z'] = muertes.tolist()
+        patch['layout']['coloraxis']['cmax'] = float(muertes.max())
+        return patch
@@ -5,29 +5,30 @@
 import pandas as pd
 import plotly.express as px
 from dash import html, dcc
-from dash.dependencies import Input, Output
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
-# Ruta al CSV procesado
-DATA_CSV = 'ArchivosProcesados/MuertesPorMes.csv'
+from datos import almacen, cache_figuras, cliente, cubos
 
-# Carga de datos
-# Se espera columnas: MES (numérico), SEXO, HORA, MANERA_MUERTE, Muertes
-df = pd.read_csv(DATA_CSV, sep=';', encoding='utf-8-sig')
-# Asegurar MES numérico
-try:
-    df['MES'] = df['MES'].astype(int)
-except Exception:
-    pass
+# Datos
+# Columnas: MES (nombre del mes), SEXO, HORA, MANERA_MUERTE, Muertes
+def _df():
+    return almacen.obtener('MuertesPorMes')
+
+
+def _tabla_cliente():
+    # Todos los años, con su columna ANIO: el navegador filtra también por año
+    return almacen.concatenar(almacen.obtener('MuertesPorMes', a).assign(ANIO=a) for a in almacen.anios())
+
+
+# Muertes por mes para cada combinación de Sexo, Hora y Manera
+_cubo = cubos.definir('mes', 'MuertesPorMes', ['SEXO', 'HORA', 'MANERA_MUERTE'], ['MES'])
 
 # Orden cronológico de los meses
-o_months = [
-    'Enero','Febrero','Marzo','Abril','Mayo','Junio',
-    'Julio','Agosto','Septiembre','Octubre','Noviembre','Diciembre'
-]
+o_months = almacen.O_MONTHS
 
 def layout_muerte_por_mes():
     """
-    Layout para muertes por mes (2019), con filtros y navegación.
+    Layout para muertes por mes de los años seleccionados, con filtros y navegación.
     """
     # Controles de filtros y botón siguiente
     controls = html.Div([
@@ -36,7 +37,7 @@ def layout_muerte_por_mes():
             html.Label('Sexo:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-sexo-mes',
-                options=[{'label': s, 'value': s} for s in sorted(df['SEXO'].unique())],
+                options=[{'label': s, 'value': s} for s in sorted(_df()['SEXO'].unique())],
                 placeholder='Todos', clearable=True,
                 style={'width':'150px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -46,7 +47,7 @@ def layout_muerte_por_mes():
             html.Label('Hora:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-hora-mes',
-                options=[{'label': h, 'value': h} for h in sorted(df['HORA'].unique())],
+                options=[{'label': h, 'value': h} for h in sorted(_df()['HORA'].unique())],
                 placeholder='Todas', clearable=True,
                 style={'width':'120px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -56,7 +57,7 @@ def layout_muerte_por_mes():
             html.Label('Manera:', style={'color':'white','marginRight':'8px'}),
             dcc.Dropdown(
                 id='filtro-manera-mes',
-                options=[{'label': m, 'value': m} for m in sorted(df['MANERA_MUERTE'].unique())],
+                options=[{'label': m, 'value': m} for m in sorted(_df()['MANERA_MUERTE'].unique())],
                 placeholder='Todas', clearable=True,
                 style={'width':'180px','backgroundColor':'fuchsia','color':'black','fontWeight':'bold'}
             )
@@ -75,9 +76,9 @@ def layout_muerte_por_mes():
         'display':'flex','alignItems':'center','padding':'15px','backgroundColor':'black'
     })
 
-    # Título fijo
+    # Título fijo (los años se eligen en el selector global)
     title = html.H2(
-        'Muertes por mes para el año 2019',
+        'Muertes por mes',
         style={'textAlign':'center','color':'fuchsia','fontSize':'32px','margin':'20px 0'}
     )
 
@@ -94,51 +95,120 @@ def layout_muerte_por_mes():
         )
     ], style={'textAlign':'center','padding':'20px','backgroundColor':'black'})
 
+    # Filtros que se calculan en el servidor (cuando la tabla no va al navegador)
+    consulta = dcc.Store(id='consulta-mes')
+
     return html.Div([
         controls,
         title,
         html.Div(graph),
-        back_button
+        back_button,
+        consulta,
+        # Tabla que se filtra en el navegador: viaja sólo con esta página
+        # (sin datos si en esta versión supera el umbral)
+        datos_cliente_mes()
     ], style={'backgroundColor':'black','minHeight':'100vh'})
 
 
+def figura_mes(sexo_sel, hora_sel, manera_sel, anios_sel=None):
+    """
+    Gráfico de líneas de muertes por mes para los filtros dados
+    (con varios años, la suma de cada mes).
+    """
+    # 'MES' en este CSV ya es nombre (Enero, Febrero, ...)
+    # Muertes por mes_nombre para los filtros elegidos
+    df_agg = _cubo.consultar(anios_sel, sexo_sel, hora_sel, manera_sel)
+    df_agg = df_agg.rename(columns={'MES':'mes_nombre'})
+    # Ordenar cronológicamente
+    df_agg['mes_nombre'] = pd.Categorical(df_agg['mes_nombre'], categories=o_months, ordered=True)
+    df_agg = df_agg.sort_values('mes_nombre')
+
+    # Gráfico de línea con tema oscuro
+    fig = px.line(
+        df_agg, x='mes_nombre', y='Muertes', markers=True,
+        labels={'mes_nombre':'Mes','Muertes':'# Muertes'}
+    )
+    fig.update_layout(
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        title_font_color='fuchsia', title_font_size=28,
+        xaxis_title=None, yaxis_title=None,
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    return fig
+
+
+@almacen.por_version(maxsize=None)
+def datos_cliente_mes():
+    """
+    Store con la tabla codificada para filtrar en el navegador, o con
+    None si la tabla supera el umbral y se filtra en el servidor. Se
+    decide en cada versión de los datos, la primera vez que se pide.
+    """
+    df = _tabla_cliente()
+    if not cliente.usar_cliente(df):
+        return dcc.Store(id='datos-cliente-mes', data=None)
+    anios_sel = list(almacen.anios_defecto())
+    figura = cache_figuras.obtener_o_construir(
+        'grafico-mes', (None, None, None, anios_sel), lambda: figura_mes(None, None, None, anios_sel)
+    )
+    return dcc.Store(id='datos-cliente-mes', data=cliente.codificar(
+        df, ['SEXO', 'HORA', 'MANERA_MUERTE', 'ANIO'], 'MES', o_months, figura, medida='Muertes'
+    ))
+
+
+def precargar():
+    """
+    Carga los datos, el cubo y la tabla para el navegador (primera visita o calentamiento).
+    """
+    _cubo.asegurar()
+    datos_cliente_mes()
+
+
+def precalcular(filtros, anios_sel=None):
+    """
+    Deja en la caché la figura del estado global de los filtros (antes de
+    que el usuario llegue a la página). Si se filtra en el navegador no
+    hay nada que calcular.
+    """
+    if datos_cliente_mes().data is not None:
+        return
+    valores = (filtros.get('sexo'), filtros.get('hora'), filtros.get('manera'), anios_sel)
+    cache_figuras.obtener_o_construir('grafico-mes', valores, lambda: figura_mes(*valores))
+
+
+def exportar(filtros, anios_sel=None):
+    """
+    Figura de la página para un estado de los filtros (sitio estático).
+    """
+    valores = (filtros.get('sexo'), filtros.get('hora'), filtros.get('manera'), anios_sel)
+    return {'grafico-mes': cache_figuras.obtener_o_construir('grafico-mes', valores, lambda: figura_mes(*valores))}
+
+
 def register_callbacks_muerte_por_mes(app):
     """
-    Registra callback para actualizar gráfico de líneas.
+    Registra los callbacks del gráfico de líneas. Se registran los dos
+    caminos y cada carga de la app elige según los datos de su versión:
+    en el navegador si la tabla es pequeña, en el servidor si no.
     """
-    @app.callback(
+    app.clientside_callback(
+        ClientsideFunction(namespace='cliente', function_name='enrutar'),
         Output('grafico-mes','figure'),
+        Output('consulta-mes','data'),
         Input('filtro-sexo-mes','value'),
         Input('filtro-hora-mes','value'),
-        Input('filtro-manera-mes','value')
+        Input('filtro-manera-mes','value'),
+        Input('filtro-anios','value'),
+        State('datos-cliente-mes','data')
     )
-    def update_line(sexo_sel, hora_sel, manera_sel):
-        # Filtrar datos
-        df_f = df.copy()
-        if sexo_sel:
-            df_f = df_f[df_f['SEXO']==sexo_sel]
-        if hora_sel:
-            df_f = df_f[df_f['HORA']==hora_sel]
-        if manera_sel:
-            df_f = df_f[df_f['MANERA_MUERTE']==manera_sel]
-
-        # 'MES' en este CSV ya es nombre (Enero, Febrero, ...)
-        # Agrupar muertes por mes_nombre directamente
-        df_agg = df_f.groupby('MES', as_index=False).agg({'Muertes':'sum'})
-        df_agg = df_agg.rename(columns={'MES':'mes_nombre'})
-        # Ordenar cronológicamente
-        df_agg['mes_nombre'] = pd.Categorical(df_agg['mes_nombre'], categories=o_months, ordered=True)
-        df_agg = df_agg.sort_values('mes_nombre')
-
-        # Gráfico de línea con tema oscuro
-        fig = px.line(
-            df_agg, x='mes_nombre', y='Muertes', markers=True,
-            labels={'mes_nombre':'Mes','Muertes':'# Muertes'}
-        )
-        fig.update_layout(
-            paper_bgcolor='black', plot_bgcolor='black', font_color='white',
-            title_font_color='fuchsia', title_font_size=28,
-            xaxis_title=None, yaxis_title=None,
-            margin={'r':0,'t':50,'l':0,'b':0}
-        )
-        return fig
+
+    @cache_figuras.memoizar('grafico-mes')
+    def figura(sexo_sel, hora_sel, manera_sel, anios_sel):
+        return figura_mes(sexo_sel, hora_sel, manera_sel, anios_sel)
+
+    @app.callback(
+        Output('grafico-mes','figure', allow_duplicate=True),
+        Input('consulta-mes','data'),
+        prevent_initial_call=True
+    )
+    def update_line(consulta):
+        return figura(*consulta)
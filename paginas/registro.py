@@ -0,0 +1,372 @@
+# ------------------------------------------------------------------
+# Archivo: paginas/registro.py
+# Descripción: Registro de páginas: ruta -> módulo, función de layout y
+#              registro de callbacks. Los callbacks se registran al
+#              arrancar, pero los datos de cada página (CSV, GeoJSON,
+#              cubos) se cargan la primera vez que se visita su ruta o en
+#              un hilo de calentamiento que arranca con la primera petición.
+#              El layout de cada página (con sus listas de opciones) se
+#              construye una sola vez y se reutiliza en cada navegación.
+#              Datos preparados y layouts son de una versión de los datos:
+#              al recargarlos se vuelven a preparar las páginas que ya
+#              estaban listas antes de publicar la versión nueva.
+#              Los filtros (sexo, mes, manera, hora) son uno solo para
+#              todas las páginas: viven en un dcc.Store de sesión que cada
+#              página lee al mostrarse y actualiza al cambiar sus dropdowns.
+#              El calentamiento también deja en caché las figuras de cada
+#              página con los filtros por defecto y, mientras el usuario
+#              está en una página, un pool de hilos calcula la siguiente
+#              del recorrido (botón Siguiente) con sus filtros actuales.
+# ------------------------------------------------------------------
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import plotly.graph_objects as go
+from dash import html, no_update
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+
+from datos import almacen
+
+# CALENTAR_PAGINAS=0 desactiva el calentamiento en segundo plano
+CALENTAR = os.environ.get('CALENTAR_PAGINAS', '1') != '0'
+# Hilos por proceso que precalculan la página siguiente (0 = no se anticipa)
+HILOS_ANTICIPAR = int(os.environ.get('ANTICIPAR_HILOS', '2'))
+
+# dcc.Store (layout principal) con el estado de los filtros: {'sexo': ..., 'mes': ...}
+FILTROS = 'filtros-globales'
+
+
+class Pagina:
+    """
+    Una ruta de la app. `layout` y `callbacks` son nombres de funciones
+    del módulo; si el módulo define `precargar()`, se llama una vez antes
+    de construir su layout, que después se reutiliza (una vez por versión
+    de los datos). `filtros` asocia cada filtro global ('sexo', 'mes',
+    'manera', 'hora') con el id del dropdown que lo representa en la página.
+    Si el módulo define `precalcular(filtros, anios_sel)`, deja en caché
+    lo que sus callbacks piden para ese estado de los filtros; si define
+    `exportar(filtros, anios_sel)`, devuelve lo que muestra la página en
+    ese estado ({id: figura o filas}) para el sitio estático (exportar.py).
+    """
+
+    def __init__(self, ruta, modulo, layout, callbacks=None, filtros=None):
+        self.ruta = ruta
+        self.modulo = modulo
+        self.layout = layout
+        self.callbacks = callbacks
+        self.filtros = dict(filtros or {})
+        self._lock = threading.Lock()
+
+    def _estado(self, version=None):
+        # Preparación y layout de la página en la versión de los datos
+        version = version or almacen.version()
+        return version.local(('pagina', self.ruta), lambda: {'preparada': False, 'segundos': None, 'layout': None})
+
+    @property
+    def preparada(self):
+        return self._estado()['preparada']
+
+    @property
+    def segundos(self):
+        return self._estado()['segundos']
+
+    def importar(self):
+        return importlib.import_module(self.modulo)
+
+    def preparar(self):
+        """
+        Carga los datos de la página una sola vez (seguro entre hilos).
+        """
+        estado = self._estado()
+        if estado['preparada']:
+            return
+        with self._lock:
+            if estado['preparada']:
+                return
+            inicio = time.perf_counter()
+            precargar = getattr(self.importar(), 'precargar', None)
+            if precargar is not None:
+                precargar()
+            estado['segundos'] = time.perf_counter() - inicio
+            estado['preparada'] = True
+
+    def obtener_layout(self):
+        """
+        Layout de la página, construido la primera vez y reutilizado.
+        Los layouts no dependen del usuario: los filtros viven en el navegador.
+        """
+        estado = self._estado()
+        if estado['layout'] is None:
+            self.preparar()
+            with self._lock:
+                if estado['layout'] is None:
+                    estado['layout'] = getattr(self.importar(), self.layout)()
+        return estado['layout']
+
+    def precalcular(self, filtros=None, anios_sel=None):
+        """
+        Prepara la página y calcula sus figuras para `filtros` (estado
+        global) y `anios_sel` (por defecto, los de la selección inicial).
+        """
+        self.obtener_layout()
+        precalcular = getattr(self.importar(), 'precalcular', None)
+        if precalcular is not None:
+            anios_sel = list(almacen.anios_defecto()) if anios_sel is None else anios_sel
+            precalcular({k: v for k, v in (filtros or {}).items() if k in self.filtros}, anios_sel)
+
+
+PORTADA = Pagina('/', 'paginas.portada', 'layout_portada')
+
+# En el orden de navegación; el calentamiento sigue este orden
+PAGINAS = [
+    PORTADA,
+    Pagina('/mapa', 'paginas.mapa', 'layout_mapa', 'register_callbacks_mapa',
+           {'sexo': 'filtro-sexo', 'manera': 'filtro-manera'}),
+    Pagina('/muerte-por-mes', 'paginas.muertePorMes',
+           'layout_muerte_por_mes', 'register_callbacks_muerte_por_mes',
+           {'sexo': 'filtro-sexo-mes', 'hora': 'filtro-hora-mes', 'manera': 'filtro-manera-mes'}),
+    Pagina('/ciudades-mas-violentas', 'paginas.CiudadesMasViolentas',
+           'layout_ciudades_mas_violentas', 'register_callbacks_ciudades_mas_violentas',
+           {'mes': 'filtro-mes-ciudades', 'sexo': 'filtro-sexo-ciudades'}),
+    Pagina('/indice-mortalidad', 'paginas.IndiceMortalidad',
+           'layout_indice_mortalidad', 'register_callbacks_indice_mortalidad',
+           {'mes': 'filtro-mes-indice', 'sexo': 'filtro-sexo-indice'}),
+    Pagina('/tabla-causas-muertes', 'paginas.TablaCausasMuertes',
+           'layout_tabla_causas', 'register_callbacks_tabla_causas',
+           {'mes': 'filtro-mes-causas', 'sexo': 'filtro-sexo-causas'}),
+    Pagina('/explorador-causas', 'paginas.ExploradorCausas',
+           'layout_explorador_causas', 'register_callbacks_explorador_causas'),
+    Pagina('/histograma-mortalidad', 'paginas.HistogramaMortalidad',
+           'layout_histograma_mortalidad', 'register_callbacks_histograma_mortalidad',
+           {'mes': 'filtro-mes-histo', 'sexo': 'filtro-sexo-histo'}),
+    Pagina('/muertes-por-sexo', 'paginas.MuertesPorSexo',
+           'layout_muertes_por_sexo', 'register_callbacks_muertes_por_sexo',
+           {'manera': 'filtro-manera-sexo'}),
+    Pagina('/resumen', 'paginas.Resumen', 'layout_resumen', 'register_callbacks_resumen',
+           {'mes': 'filtro-mes-resumen', 'sexo': 'filtro-sexo-resumen', 'manera': 'filtro-manera-resumen'}),
+]
+_por_ruta = {p.ruta: p for p in PAGINAS}
+
+_calentamiento = None
+_lock = threading.Lock()
+_ejecutor = None
+_pid_ejecutor = None
+_anticipando = set()
+
+
+def registrar_callbacks(app):
+    """
+    Registra los callbacks de todas las páginas (sin cargar sus datos)
+    y los que comparten sus filtros.
+    """
+    for pagina in PAGINAS:
+        if pagina.callbacks:
+            getattr(pagina.importar(), pagina.callbacks)(app)
+        if pagina.filtros:
+            _registrar_filtros(app, pagina)
+
+
+def _registrar_filtros(app, pagina):
+    """
+    Al mostrarse la página, sus dropdowns toman el estado global de los
+    filtros (los callbacks de sus figuras esperan a que termine, así que
+    corren una sola vez); al cambiar un dropdown, se actualiza el estado.
+    Ninguno de los dos lee y escribe a la vez el Store: no hay ciclos.
+    """
+    claves, ids = list(pagina.filtros), list(pagina.filtros.values())
+
+    def aplicar_filtros(_, estado):
+        estado = estado or {}
+        if not any(clave in estado for clave in claves):
+            raise PreventUpdate
+        return [estado.get(clave, no_update) for clave in claves]
+
+    def guardar_filtros(*valores):
+        *valores, estado, anios_sel = valores
+        estado = estado or {}
+        nuevo = {**estado, **dict(zip(claves, valores))}
+        if nuevo == estado:
+            raise PreventUpdate
+        anticipar(pagina.ruta, nuevo, anios_sel)
+        return nuevo
+
+    # Un nombre por página (es la etiqueta de sus métricas)
+    aplicar_filtros.__name__ = f'aplicar_filtros_{ids[0]}'
+    guardar_filtros.__name__ = f'guardar_filtros_{ids[0]}'
+    app.callback(
+        [Output(i, 'value') for i in ids],
+        # El id no cambia: sólo corre cuando la página entra al layout
+        Input(ids[0], 'id'),
+        State(FILTROS, 'data')
+    )(aplicar_filtros)
+    app.callback(
+        Output(FILTROS, 'data', allow_duplicate=True),
+        [Input(i, 'value') for i in ids],
+        State(FILTROS, 'data'),
+        State('filtro-anios', 'value'),
+        prevent_initial_call=True
+    )(guardar_filtros)
+
+
+def layout(ruta):
+    """
+    Layout de la página de `ruta` (la portada si no existe), cargando
+    antes sus datos si es la primera visita.
+    """
+    return _por_ruta.get(ruta, PORTADA).obtener_layout()
+
+
+def siguiente(ruta):
+    """
+    Página a la que lleva el botón Siguiente desde `ruta` (None en la última).
+    """
+    pagina = _por_ruta.get(ruta, PORTADA)
+    posicion = PAGINAS.index(pagina) + 1
+    return PAGINAS[posicion] if posicion < len(PAGINAS) else None
+
+
+def _ejecutor_proceso():
+    # Por proceso: los hilos de un pool creado antes del fork no existen en los workers
+    global _ejecutor, _pid_ejecutor
+    if _pid_ejecutor != os.getpid():
+        _ejecutor = ThreadPoolExecutor(max_workers=HILOS_ANTICIPAR, thread_name_prefix='anticipar')
+        _pid_ejecutor = os.getpid()
+    return _ejecutor
+
+
+def anticipar(ruta, filtros, anios_sel):
+    """
+    Calcula en segundo plano la página que sigue a `ruta` para el estado
+    de los filtros `filtros` y los años `anios_sel`, con la versión de los
+    datos de la petición en curso. Devuelve el Future, o None si no hay
+    página siguiente o ya se está calculando lo mismo.
+    """
+    pagina = siguiente(ruta)
+    if pagina is None or HILOS_ANTICIPAR <= 0:
+        return None
+    filtros = {k: v for k, v in (filtros or {}).items() if k in pagina.filtros}
+    clave = (pagina.ruta, json.dumps([filtros, anios_sel], sort_keys=True, default=str))
+    version = almacen.version()
+    with _lock:
+        if clave in _anticipando:
+            return None
+        _anticipando.add(clave)
+        ejecutor = _ejecutor_proceso()
+
+    def tarea():
+        try:
+            with almacen.usar(version):
+                pagina.precalcular(filtros, anios_sel)
+        except Exception as error:  # sólo se pierde el adelanto: la página calcula al llegar
+            print(f'Error al anticipar {pagina.ruta}: {error!r}', file=sys.stderr)
+        finally:
+            with _lock:
+                _anticipando.discard(clave)
+    return ejecutor.submit(tarea)
+
+
+def preparar_todas():
+    """
+    Prepara todas las páginas en este hilo (p. ej. en el proceso maestro
+    de gunicorn antes de crear los workers), todas con la misma versión
+    de los datos, y deja en caché sus figuras con los filtros por defecto.
+    """
+    with almacen.usar():
+        for pagina in PAGINAS:
+            pagina.obtener_layout()
+        # Figuras con los filtros por defecto: la primera visita sale de la caché
+        for pagina in PAGINAS:
+            pagina.precalcular()
+
+
+@almacen.al_recargar
+def _preparar_version(anterior):
+    # Con la versión nueva fijada: las páginas listas en la anterior, listas
+    # también en la nueva antes de publicarla (el esqueleto de validación
+    # sólo tiene ids y no cambia)
+    for pagina in PAGINAS:
+        if pagina._estado(anterior)['layout'] is not None:
+            pagina.precalcular()
+
+
+# Aviso de las páginas cuyos datos vienen de un ETL con cruces erróneos
+AVISO_NO_CONFIABLE = ('Datos no confiables: los archivos por municipio son de un ETL anterior a la '
+                      'corrección de los cruces con Divipola. Regenérelos con python -m datos.etl.')
+
+
+def figura_aviso(texto=AVISO_NO_CONFIABLE):
+    """
+    Figura vacía con `texto` en el centro, en lugar de un gráfico cuyos
+    datos no son confiables.
+    """
+    fig = go.Figure()
+    fig.add_annotation(text=texto, showarrow=False, x=0.5, y=0.5, xref='paper', yref='paper',
+                       font={'color': 'fuchsia', 'size': 16})
+    fig.update_layout(
+        paper_bgcolor='black', plot_bgcolor='black', font_color='white',
+        xaxis={'visible': False}, yaxis={'visible': False},
+        margin={'r':0,'t':50,'l':0,'b':0}
+    )
+    return fig
+
+
+def _con_id(componente):
+    # Recorre el árbol de componentes y devuelve los que tienen id
+    if isinstance(componente, (list, tuple)):
+        for hijo in componente:
+            yield from _con_id(hijo)
+        return
+    if not hasattr(componente, 'to_plotly_json'):
+        return
+    if getattr(componente, 'id', None) is not None:
+        yield componente
+    yield from _con_id(getattr(componente, 'children', None))
+
+
+def esqueleto(layout_principal):
+    """
+    Layout de validación: un componente vacío del mismo tipo por cada id
+    del layout principal y de todas las páginas. Basta para que Dash valide
+    los callbacks y pesa unos pocos KB (sin figuras ni opciones).
+    """
+    componentes = {}
+    for raiz in [layout_principal, *(p.obtener_layout() for p in PAGINAS)]:
+        for c in _con_id(raiz):
+            componentes.setdefault(c.id, type(c)(id=c.id))
+    return html.Div(list(componentes.values()))
+
+
+def calentar():
+    """
+    Lanza (una sola vez por proceso) el hilo que prepara todas las páginas.
+    """
+    global _calentamiento
+    if not CALENTAR or _calentamiento is not None:
+        return
+    with _lock:
+        if _calentamiento is None:
+            _calentamiento = threading.Thread(target=preparar_todas, name='calentar-paginas', daemon=True)
+            _calentamiento.start()
+
+
+def listas():
+    """
+    True si todas las páginas tienen sus datos cargados.
+    """
+    return all(p.preparada for p in PAGINAS)
+
+
+def estado():
+    """
+    Por ruta: si sus datos ya están cargados y cuánto tardó en prepararse.
+    """
+    return {
+        p.ruta: {'preparada': p.preparada, 'ms': None if p.segundos is None else p.segundos * 1000}
+        for p in PAGINAS
+    }
@@ -0,0 +1,21 @@
+# ------------------------------------------------------------------
+# Archivo: wsgi.py
+# Descripción: Punto de entrada de producción (gunicorn -c gunicorn.conf.py).
+#              Con preload_app el maestro importa este módulo una sola vez:
+#              carga todos los datasets, cubos y figuras base y congela el
+#              heap antes de crear los workers, que comparten esas páginas
+#              de memoria por copy-on-write.
+# ------------------------------------------------------------------
+import gc
+
+from app import app, server  # noqa: F401
+from paginas import registro
+
+# Datos, cubos, geometría, figuras base y tablas del navegador de todas las páginas
+registro.preparar_todas()
+
+# Mover los objetos ya creados a la generación permanente: el recolector
+# de los workers no los recorre ni escribe en ellos, así que sus páginas
+# no se copian tras el fork
+gc.collect()
+gc.freeze()